@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+技能生成提示词基准: 比较旧的 "Context: " + str(context) 与按token预算打包后的提示词
+用法: python bench_context_packing.py [记录文件或目录 ...] [--budget 4000] [--live] [--synthetic]
+
+记录文件由 LLM_PROMPT_RECORD_DIR 开启后 SkillGeneratorAgent 自动写入 ({"task", "context"})。
+未提供记录时使用 --synthetic 生成的典型上下文 (3个本地技能、5条网页搜索、视频转录、执行摘要)。
+--live 时对两种提示词各调用一次LLM (不走缓存), 记录延迟与 prompt_tokens。
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core_agents.skill_generator import build_prompt
+from src.services.tokens import count_tokens
+
+
+def synthetic_run(seed: int = 0) -> dict:
+    """生成一次典型运行的上下文 (规模与各来源的截断长度一致)"""
+    rng = random.Random(seed)
+    words = "browser automation playwright selector wait click page script login form table export retry".split()
+
+    def text(chars: int) -> str:
+        out = []
+        while sum(len(word) + 1 for word in out) < chars:
+            out.append(rng.choice(words))
+        return " ".join(out)[:chars]
+
+    transcript = "".join(rng.choice("打开浏览器等待页面加载然后点击登录按钮输入账号密码导出表格数据") for _ in range(4000))
+    return {
+        "task": "用 Playwright 实现浏览器自动化登录并导出表格",
+        "context": {
+            "sources": ["skills.sh", "github", "web", "youtube"],
+            "notes": [],
+            "local_skills": [
+                {"name": f"skill-{i}", "description": text(120), "content": text(2000)} for i in range(3)
+            ],
+            "skills_sh": [
+                {
+                    "id": f"owner/skill-{i}", "name": f"skill-{i}", "description": text(200), "author": "owner",
+                    "stars": rng.randint(0, 5000), "github_url": f"https://github.com/owner/skill-{i}",
+                    "raw_url": f"https://raw.githubusercontent.com/owner/skill-{i}/main/SKILL.md",
+                }
+                for i in range(5)
+            ],
+            "github": [
+                {
+                    "id": i, "full_name": f"owner/repo-{i}", "description": text(200), "stars": rng.randint(100, 90000),
+                    "forks": rng.randint(0, 900), "language": "Python", "url": f"https://github.com/owner/repo-{i}",
+                }
+                for i in range(5)
+            ],
+            "video": {"title": "Playwright 教程", "transcript": transcript[:2000]},
+            "web_search": [
+                {"title": text(60), "content": text(3000), "url": f"https://example.com/{i}"} for i in range(5)
+            ],
+            "execution_summary": {
+                "passed": True,
+                "issues": [],
+                "notes": "Execution succeeded.",
+                "outputs": {"video": {"title": "Playwright 教程", "transcript": transcript, "extracted_skills": []}},
+            },
+        },
+    }
+
+
+def load_runs(paths: list) -> list:
+    runs = []
+    for raw in paths:
+        path = Path(raw)
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            runs.append((file.name, json.loads(file.read_text(encoding="utf-8"))))
+    return runs
+
+
+async def timed_generate(prompt: str) -> tuple:
+    from src.services.llm import LLMUsage, _achat_json, _skill_request
+
+    usage = LLMUsage()
+    start = time.perf_counter()
+    await _achat_json(_skill_request(prompt), cache=False, usage=usage)
+    return time.perf_counter() - start, usage.prompt_tokens
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="技能生成提示词打包基准")
+    parser.add_argument("records", nargs="*", help="记录的运行 (JSON文件或目录)")
+    parser.add_argument("--budget", type=int, default=None, help="token上限 (默认 LLM_PROMPT_MAX_TOKENS)")
+    parser.add_argument("--synthetic", type=int, default=0, help="追加N次合成运行")
+    parser.add_argument("--live", action="store_true", help="实际调用LLM测量延迟 (需 OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    runs = load_runs(args.records)
+    runs += [(f"synthetic-{i}", synthetic_run(i)) for i in range(args.synthetic or (0 if runs else 3))]
+
+    print(f"{'运行':<36}{'旧tokens':>10}{'新tokens':>10}{'节省':>8}{'打包ms':>8}  裁剪/丢弃")
+    totals = [0, 0]
+    latencies = []
+    for name, run in runs:
+        task, context = run["task"], run["context"]
+        old_prompt = "Task: " + task + "\n" + "Context: " + str(context)
+        start = time.perf_counter()
+        new_prompt, report = build_prompt(task, context, args.budget)
+        pack_ms = (time.perf_counter() - start) * 1000
+        old_tokens, new_tokens = count_tokens(old_prompt), report["prompt_tokens"]
+        totals[0] += old_tokens
+        totals[1] += new_tokens
+        changed = ",".join(report["trimmed"]) + (" / " + ",".join(report["dropped"]) if report["dropped"] else "")
+        print(f"{name[:35]:<36}{old_tokens:>10}{new_tokens:>10}{1 - new_tokens / old_tokens:>8.0%}{pack_ms:>8.1f}  {changed}")
+        if args.live:
+            latencies.append((await timed_generate(old_prompt), await timed_generate(new_prompt)))
+
+    if totals[0]:
+        print(f"\n合计: {totals[0]} -> {totals[1]} tokens ({1 - totals[1] / totals[0]:.0%} 更少)")
+    if latencies:
+        old_avg = sum(old[0] for old, _ in latencies) / len(latencies)
+        new_avg = sum(new[0] for _, new in latencies) / len(latencies)
+        old_usage = sum(old[1] for old, _ in latencies)
+        new_usage = sum(new[1] for _, new in latencies)
+        print(f"LLM延迟: 平均 {old_avg:.2f}s -> {new_avg:.2f}s; 计费prompt_tokens: {old_usage} -> {new_usage}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+转录段落内存基准: 比较 List[Section] 与列式 CompactTranscript 每小时转录的内存占用
+用法: python bench_transcript_memory.py [--hours 1] [--segment-seconds 3] [--chars 20]
+
+以tracemalloc统计构建段落结构 (以及API序列化为字典) 时新分配的内存。
+"""
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.models.unified import Section
+from src.models.transcript import CompactTranscript
+
+
+def make_segments(hours: float, segment_seconds: float, chars: int) -> list:
+    """生成模拟的转录segments (中文文本, 时间连续)"""
+    rng = random.Random(0)
+    alphabet = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+    segments = []
+    t = 0.0
+    for _ in range(int(hours * 3600 / segment_seconds)):
+        length = max(1, int(rng.gauss(chars, chars / 4)))
+        text = "".join(rng.choice(alphabet) for _ in range(length))
+        segments.append({"start": round(t, 3), "end": round(t + segment_seconds, 3), "text": text})
+        t += segment_seconds
+    return segments
+
+
+def measure(build) -> tuple:
+    """返回 (结果, 新分配的峰值字节数, 保留的字节数, 耗时秒)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, current, elapsed
+
+
+def build_sections(segments: list) -> list:
+    """改造前的写法: 每段一个Section"""
+    return [
+        Section(title=f"段落 {i+1}", content=seg['text'], start_time=seg['start'], end_time=seg['end'])
+        for i, seg in enumerate(segments)
+    ]
+
+
+def sections_to_dicts(sections: list) -> list:
+    """改造前routes.get_content的写法"""
+    return [
+        {"title": s.title, "content": s.content, "start_time": s.start_time, "end_time": s.end_time}
+        for s in sections
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较段落存储方式的内存占用")
+    parser.add_argument("--hours", type=float, default=1.0, help="模拟的转录时长 (小时)")
+    parser.add_argument("--segment-seconds", type=float, default=3.0, help="平均每段时长")
+    parser.add_argument("--chars", type=int, default=20, help="平均每段字数")
+    args = parser.parse_args()
+
+    segments = make_segments(args.hours, args.segment_seconds, args.chars)
+    text_chars = sum(len(seg["text"]) for seg in segments)
+    print(f"段落数: {len(segments)}  总字数: {text_chars}  模拟时长: {args.hours} 小时")
+
+    def fresh() -> list:
+        """在统计范围内复制一份输入, 构建结束后释放, 保留的内存即为结果本身的占用"""
+        return [dict(seg, text="".join(list(seg["text"]))) for seg in segments]
+
+    sections, _, sections_bytes, sections_seconds = measure(lambda: build_sections(fresh()))
+    _, dicts_peak, _, _ = measure(lambda: sections_to_dicts(sections))
+    del sections
+
+    compact, _, compact_bytes, compact_seconds = measure(lambda: CompactTranscript.from_segments(fresh()))
+    _, compact_dicts_peak, _, _ = measure(lambda: compact.to_dicts())
+    _, view_peak, _, view_seconds = measure(lambda: compact.between(600, 1200))
+
+    per_hour = 1 / args.hours
+    rows = [
+        ("List[Section]", sections_bytes, sections_seconds),
+        ("CompactTranscript", compact_bytes, compact_seconds),
+    ]
+    print(f"{'存储方式':<20}{'常驻内存/小时':>16}{'构建耗时(含复制输入)':>12}")
+    for name, nbytes, seconds in rows:
+        print(f"{name:<20}{nbytes * per_hour / 2**20:>13.2f} MB{seconds * 1000:>10.1f}ms")
+    print(f"内存降低: {1 - compact_bytes / sections_bytes:.1%} (CompactTranscript.nbytes = {compact.nbytes} 字节)")
+    print(f"序列化为字典的峰值: List[Section] {dicts_peak / 2**20:.2f} MB, CompactTranscript {compact_dicts_peak / 2**20:.2f} MB")
+    print(f"按时间切片 [600s, 1200s): {len(compact.between(600, 1200))} 段, 额外分配 {view_peak} 字节, {view_seconds * 1e6:.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+转录引擎基准测试: 在相同音频上比较各后端的实时率 (RTF) 与峰值内存 (RSS)
+用法: python bench_transcription.py audio1.wav [audio2.mp3 ...] [--model base] [--backends whisper,faster-whisper]
+
+每个 (后端, 音频) 组合在独立子进程中运行, 峰值RSS互不影响。
+RTF = 转录耗时 / 音频时长, 越小越快; 模型加载耗时单独列出。
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.services.transcription_backends import BackendRegistry
+
+
+def run_worker(backend_name: str, model_size: str, audio_path: str, language: str) -> dict:
+    """子进程内执行: 加载模型并转录整段音频 (不经过VAD与分块, 只比较引擎本身)"""
+    from src.services.transcription import load_audio, SAMPLE_RATE
+
+    backend = BackendRegistry.get(backend_name)
+    audio = load_audio(Path(audio_path))
+
+    started = time.perf_counter()
+    model = backend.load(model_size, config.WHISPER_DEVICE, config.WHISPER_THREADS)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = backend.transcribe(model, audio, language or None)
+    transcribe_seconds = time.perf_counter() - started
+
+    audio_seconds = len(audio) / SAMPLE_RATE
+    return {
+        "backend": backend_name,
+        "model": model_size,
+        "audio": Path(audio_path).name,
+        "audio_seconds": round(audio_seconds, 2),
+        "load_seconds": round(load_seconds, 2),
+        "transcribe_seconds": round(transcribe_seconds, 2),
+        "rtf": round(transcribe_seconds / audio_seconds, 3) if audio_seconds else None,
+        # Linux上ru_maxrss单位为KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "segments": len(result["segments"]),
+        "chars": sum(len(seg["text"]) for seg in result["segments"]),
+    }
+
+
+def run_isolated(backend_name: str, model_size: str, audio_path: str, language: str) -> dict:
+    cmd = [
+        sys.executable, __file__, "--worker",
+        "--backends", backend_name, "--model", model_size, "--language", language, audio_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"backend": backend_name, "audio": Path(audio_path).name, "error": result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_table(rows: list) -> None:
+    columns = ["backend", "audio", "audio_seconds", "load_seconds", "transcribe_seconds", "rtf", "peak_rss_mb", "segments"]
+    print("\t".join(columns))
+    for row in rows:
+        if "error" in row:
+            print(f"{row['backend']}\t{row['audio']}\t失败: {row['error']}")
+        else:
+            print("\t".join(str(row.get(column, "")) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较转录后端的RTF与峰值内存")
+    parser.add_argument("audio", nargs="+", help="音频文件 (任意ffmpeg可解码的格式)")
+    parser.add_argument("--model", default=config.WHISPER_MODEL if config.WHISPER_MODEL != "auto" else "base")
+    parser.add_argument("--backends", default="", help="逗号分隔, 默认所有已安装的后端")
+    parser.add_argument("--language", default="", help="留空则自动检测")
+    parser.add_argument("--json", action="store_true", help="输出JSON而不是表格")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.backends, args.model, args.audio[0], args.language)))
+        return
+
+    if args.backends:
+        backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    else:
+        backends = [backend.name for backend in BackendRegistry.list_backends() if backend.available()]
+    if not backends:
+        print("❌ 没有已安装的转录后端 (pip install openai-whisper 或 pip install faster-whisper)")
+        sys.exit(1)
+
+    rows = []
+    for audio_path in args.audio:
+        for backend_name in backends:
+            print(f"⏱  {backend_name} / {args.model} / {Path(audio_path).name} ...", file=sys.stderr)
+            rows.append(run_isolated(backend_name, args.model, audio_path, args.language))
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 from pathlib import Path
 from typing import AsyncIterator, Dict, Any, List, Optional
 
@@ -11,6 +10,8 @@ from fastapi.responses import HTMLResponse, StreamingResponse, FileResponse, Res
 
 from src.services.agent_middleware import apply_middlewares, BuiltinMiddleware, TerminalMiddleware
 from src.application.agent_service import run_augmented_stream
+from src.application.stream_processor import to_sse
+from src.services.video_pipeline import TRANSCRIPT_MODES
 from src.core.config import config
 
 
@@ -57,24 +58,26 @@ async def _simple_agent(task: str, sources: List[str], middlewares) -> AsyncIter
     yield await _emit("simple", "done", "Finished minimal pass.", middlewares)
 
 
-async def _system_agent(task: str, sources: List[str], middlewares) -> AsyncIterator[Dict[str, Any]]:
-    async for event in run_augmented_stream(task, sources=sources, middlewares=middlewares):
+async def _system_agent(task: str, sources: List[str], middlewares, transcript: str = "refined") -> AsyncIterator[Dict[str, Any]]:
+    async for event in run_augmented_stream(task, sources=sources, middlewares=middlewares, transcript=transcript):
         yield event
 
 
 @router.get("/api/agent-arena/stream")
-async def agent_arena_stream(task: str, sources: Optional[str] = None):
+async def agent_arena_stream(task: str, sources: Optional[str] = None, transcript: str = "refined"):
     if not task.strip():
         raise HTTPException(status_code=400, detail="task is required")
+    if transcript not in TRANSCRIPT_MODES:
+        raise HTTPException(status_code=400, detail=f"transcript must be one of {', '.join(TRANSCRIPT_MODES)}")
 
     source_list = _normalize_sources(sources)
     middlewares = [BuiltinMiddleware(), TerminalMiddleware()]
 
     async def event_stream() -> AsyncIterator[str]:
         async for event in _simple_agent(task, source_list, middlewares):
-            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-        async for event in _system_agent(task, source_list, middlewares):
-            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            yield to_sse(event)
+        async for event in _system_agent(task, source_list, middlewares, transcript):
+            yield to_sse(event)
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
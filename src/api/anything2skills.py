@@ -1,22 +1,27 @@
 """Anything2Skills API + UI routes."""
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 from src.services.skills_store import list_local_skills, save_skill, install_skill_from_content, resolve_local_path
 from src.services.skills_sh import search_skills_sh, fetch_skill_content
 from src.services.github_search import search_github_repos
-from src.services.llm import generate_skill_from_prompt
-from src.services.video_pipeline import extract_from_video
+from src.services.llm import agenerate_skill_from_prompt, astream_skill_from_prompt
+from src.services.llm_scheduler import LLMDeadlineError
+from src.services.video_pipeline import TRANSCRIPT_MODES, extract_from_video_shared, stream_video_sections
+from src.services.agent_middleware import apply_middlewares, BuiltinMiddleware, TerminalMiddleware
+from src.application.stream_processor import DeltaCoalescer, build_event, to_sse
 from src.core.config import config
 
 
 class GenerateRequest(BaseModel):
     prompt: str
+    stream: bool = False  # also selected by Accept: text/event-stream
 
 
 class InstallRequest(BaseModel):
@@ -27,6 +32,7 @@ class VideoExtractRequest(BaseModel):
     video_url: Optional[str] = None
     local_path: Optional[str] = None
     save: bool = True
+    transcript: str = "refined"
 
 
 router = APIRouter()
@@ -115,16 +121,7 @@ async def anything2skills_search(query: str):
     }
 
 
-@router.post("/api/anything2skills/generate")
-async def anything2skills_generate(payload: GenerateRequest):
-    if not payload.prompt.strip():
-        raise HTTPException(status_code=400, detail="prompt is required")
-
-    try:
-        spec = generate_skill_from_prompt(payload.prompt)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
-
+def _generated_payload(spec: Dict[str, Any]) -> Dict[str, Any]:
     saved = save_skill(spec["name"], spec["description"], spec["content"], source="generated")
     
     # Build evaluation response
@@ -145,6 +142,57 @@ async def anything2skills_generate(payload: GenerateRequest):
     }
 
 
+@router.post("/api/anything2skills/generate")
+async def anything2skills_generate(payload: GenerateRequest, request: Request):
+    if not payload.prompt.strip():
+        raise HTTPException(status_code=400, detail="prompt is required")
+
+    if payload.stream or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(_generate_stream(payload.prompt), media_type="text/event-stream")
+
+    try:
+        spec = await agenerate_skill_from_prompt(payload.prompt)
+    except LLMDeadlineError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "60"})
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    return _generated_payload(spec)
+
+
+async def _generate_stream(prompt: str) -> AsyncIterator[str]:
+    """SSE: throttled delta events with the partial completion, then done (or error)."""
+    queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    async def send_delta(text: str, chars: int) -> None:
+        await queue.put(to_sse(build_event("generator", "delta", text, {"chars": chars})))
+
+    async def runner() -> None:
+        deltas = DeltaCoalescer(send_delta, config.LLM_STREAM_DELTAS_PER_SECOND)
+        try:
+            spec = await astream_skill_from_prompt(prompt, deltas)
+            await deltas.flush()
+            result = await asyncio.to_thread(_generated_payload, spec)
+            await queue.put(to_sse(build_event("generator", "done", result["message"], result)))
+        except Exception as exc:
+            await deltas.flush()
+            await queue.put(to_sse(build_event("generator", "error", str(exc))))
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(runner())
+    try:
+        yield to_sse(build_event("generator", "action", "Generating skill with LLM..."))
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 @router.post("/api/anything2skills/install")
 async def anything2skills_install(payload: InstallRequest):
     skill = payload.skill or {}
@@ -164,6 +212,8 @@ async def anything2skills_install(payload: InstallRequest):
 async def videos_extract(payload: VideoExtractRequest):
     if not payload.video_url and not payload.local_path:
         raise HTTPException(status_code=400, detail="video_url or local_path is required")
+    if payload.transcript not in TRANSCRIPT_MODES:
+        raise HTTPException(status_code=400, detail=f"transcript must be one of {', '.join(TRANSCRIPT_MODES)}")
 
     local_path = None
     if payload.local_path:
@@ -172,16 +222,70 @@ async def videos_extract(payload: VideoExtractRequest):
             raise HTTPException(status_code=400, detail="local_path must be inside downloads/")
 
     try:
-        result = extract_from_video(video_url=payload.video_url, local_path=local_path)
+        result = await extract_from_video_shared(
+            video_url=payload.video_url,
+            local_path=local_path,
+            transcript=payload.transcript,
+        )
+    except LLMDeadlineError as exc:
+        # The transcript is cached, so retrying later only repeats the LLM step.
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "60"})
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
     extracted = result.extracted_skills
-    if payload.save:
+    # Keyword fallback skills are returned for reference but not saved as real skills.
+    if payload.save and not result.llm_error:
         for skill in extracted:
             save_skill(skill.get("name", "Video Skill"), skill.get("description", "Video skill"), skill.get("content", ""), source="video")
 
     return {
-        "video": {"title": result.title, "transcript": result.transcript},
+        "video": {
+            "title": result.title,
+            "transcript": result.transcript,
+            "transcription_model": result.transcription_model,
+        },
         "extracted_skills": extracted,
+        "llm_usage": result.llm_usage,
+        "llm_error": result.llm_error,
     }
+
+
+@router.get("/api/videos/extract/stream")
+async def videos_extract_stream(
+    video_url: Optional[str] = None,
+    local_path: Optional[str] = None,
+    transcript: str = "refined",
+):
+    if not video_url and not local_path:
+        raise HTTPException(status_code=400, detail="video_url or local_path is required")
+    if transcript not in TRANSCRIPT_MODES:
+        raise HTTPException(status_code=400, detail=f"transcript must be one of {', '.join(TRANSCRIPT_MODES)}")
+
+    resolved = None
+    if local_path:
+        resolved = resolve_local_path(local_path)
+        if not resolved:
+            raise HTTPException(status_code=400, detail="local_path must be inside downloads/")
+
+    middlewares = [BuiltinMiddleware(), TerminalMiddleware()]
+
+    def event(stage: str, message: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        return to_sse(apply_middlewares(build_event("extractor", stage, message, payload), middlewares))
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield event("extract", f"Streaming transcript: {video_url or local_path}")
+        count = 0
+        try:
+            async for section in stream_video_sections(video_url=video_url, local_path=resolved, transcript=transcript):
+                count += 1
+                yield event(
+                    "observation",
+                    section.content,
+                    {"index": count, "start_time": section.start_time, "end_time": section.end_time},
+                )
+        except Exception as exc:
+            yield event("error", str(exc))
+        yield event("done", f"Transcript streamed: {count} sections", {"sections": count})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
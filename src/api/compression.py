@@ -0,0 +1,94 @@
+"""Response compression negotiated from Accept-Encoding (br when brotli is installed, else gzip).
+
+Applied per endpoint rather than as app-wide middleware so SSE streams are
+never buffered inside a compressor.
+"""
+from __future__ import annotations
+
+import zlib
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from src.core.config import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding the client accepts (q=0 means refused)."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    for name in candidates:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=config.RESPONSE_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(config.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so the client can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _headers(encoding: Optional[str], extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    headers = {**(extra or {}), "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def compressed_response(request: Request, body: bytes, media_type: str) -> Response:
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None or len(body) < config.RESPONSE_COMPRESS_MIN_BYTES:
+        return Response(body, media_type=media_type, headers=_headers(None))
+    compressor = _Compressor(encoding)
+    return Response(compressor.chunk(body) + compressor.finish(), media_type=media_type, headers=_headers(encoding))
+
+
+def compressed_stream(
+    request: Request,
+    chunks: AsyncIterator[bytes],
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return StreamingResponse(chunks, media_type=media_type, headers=_headers(None, headers))
+
+    async def encoded() -> AsyncIterator[bytes]:
+        compressor = _Compressor(encoding)
+        async for chunk in chunks:
+            yield compressor.chunk(chunk)
+        yield compressor.finish()
+
+    return StreamingResponse(encoded(), media_type=media_type, headers=_headers(encoding, headers))
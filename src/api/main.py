@@ -1,23 +1,62 @@
 """Skills Forge - FastAPI主入口"""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from src.api.routes import router
+from src.api.routes import router, job_manager, batch_manager
 from src.api.anything2skills import router as a2s_router
 from src.api.agent_arena import router as arena_router
 from src.core.config import config
+from src.services.whisper_pool import whisper_pool
+from src.services.transcription import shutdown_executor
+from src.services.refinement import refinements
+from src.services.storage import storage
+from src.services import llm
 
 # 确保目录存在
 config.ensure_dirs()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期: 启动时清理上次遗留的临时文件、预加载Whisper模型、打开共享LLM客户端、启动提取worker并续跑中断的批量导入"""
+    # 此时尚无任务在运行, 遗留的中间音频/未完成下载都是孤儿文件
+    removed = await asyncio.to_thread(storage.sweep_orphans)
+    await asyncio.to_thread(storage.collect)
+    if removed:
+        print(f"[startup] Removed {removed} orphaned temp files")
+    preload = [name.strip() for name in config.WHISPER_PRELOAD.split(",") if name.strip()]
+    if preload:
+        try:
+            await asyncio.to_thread(whisper_pool.preload, preload)
+        except Exception as e:
+            print(f"[startup] Whisper preload failed: {e}")
+    try:
+        await llm.open_client()
+    except Exception as e:
+        print(f"[startup] LLM client not initialized: {e}")
+    await job_manager.start()
+    await batch_manager.start()
+    yield
+    await batch_manager.stop()
+    await job_manager.stop()
+    await refinements.cancel_all()
+    shutdown_executor()
+    whisper_pool.evict_idle()
+    await llm.close_client()
+
+
 app = FastAPI(
     title="Skills Forge",
     description="从多源内容提取经验知识，自动生成 Claude Skills",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS配置
@@ -1,12 +1,32 @@
 """Skills Forge - API路由"""
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any
 from enum import Enum
+import json
 import uuid
 
-from src.sources.base import SourceRegistry
+from src.sources.base import SourceRegistry, run_blocking
 from src.models.unified import UnifiedContent, SourceType
+from src.models.transcript import CompactTranscript
+from src.services.whisper_pool import whisper_pool
+from src.services.transcription import worker_stats
+from src.services.transcript_cache import transcript_cache
+from src.services.single_flight import extraction_flights
+from src.services.job_queue import JobManager
+from src.services.bulk_ingest import BatchManager
+from src.services.stages import stage_limits
+from src.services.model_policy import model_policy
+from src.services.refinement import refinements
+from src.services.storage import storage
+from src.services.llm_cache import llm_cache
+from src.services.llm_scheduler import llm_scheduler
+from src.services.transcript_export import EXPORTERS
+from src.services.agent_middleware import apply_middlewares, BuiltinMiddleware, TerminalMiddleware
+from src.application.stream_processor import build_event, to_sse
+from src.core.config import config
+from src.api.compression import compressed_response, compressed_stream
 
 
 # ============= Request/Response Models =============
@@ -23,7 +43,8 @@ class ExtractRequest(BaseModel):
                 "options": {
                     "transcribe": True,
                     "model_size": "base",
-                    "language": "zh"
+                    "language": "zh",
+                    "progressive": False
                 }
             }
         }
@@ -31,13 +52,30 @@ class ExtractRequest(BaseModel):
 
 class ExtractResponse(BaseModel):
     """内容提取响应"""
-    content_id: str
+    content_id: Optional[str] = None
+    job_id: Optional[str] = None
     status: str
     source_type: str
     title: Optional[str] = None
     message: Optional[str] = None
 
 
+class BatchRequest(BaseModel):
+    """批量导入请求 (播放列表、合集、UP主空间)"""
+    url: str
+    options: Optional[Dict[str, Any]] = None
+    limit: Optional[int] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "url": "https://space.bilibili.com/12345/channel/collectiondetail?sid=67890",
+                "options": {"model_size": "base", "language": "zh"},
+                "limit": 60
+            }
+        }
+
+
 class ContentResponse(BaseModel):
     """内容详情响应"""
     content_id: str
@@ -50,6 +88,11 @@ class ContentResponse(BaseModel):
     full_text: str
     sections: List[Dict[str, Any]]
     raw_metadata: Dict[str, Any]
+    transcription_model: Optional[str] = None
+    transcript_status: str = "final"
+    # 按时间窗口/分页获取时返回
+    total_sections: Optional[int] = None
+    next_offset: Optional[int] = None
 
 
 class GenerateRequest(BaseModel):
@@ -81,6 +124,10 @@ class SkillResponse(BaseModel):
 content_store: Dict[str, UnifiedContent] = {}
 skill_store: Dict[str, Dict[str, Any]] = {}
 
+# 后台提取任务 (worker在应用生命周期中启动)
+job_manager = JobManager(content_store)
+batch_manager = BatchManager(content_store)
+
 
 # ============= Router =============
 
@@ -108,9 +155,47 @@ async def list_sources():
     }
 
 
+@router.get("/transcription/stats")
+async def transcription_stats():
+    """Whisper模型池状态 (主进程; 各转录worker进程的模型池见workers)、转录缓存状态与自动选模的运行时估计"""
+    return {
+        **whisper_pool.stats(),
+        "workers": worker_stats(),
+        "transcript_cache": transcript_cache.stats(),
+        "single_flight": extraction_flights.stats(),
+        "model_policy": model_policy.stats(),
+        "refinement": refinements.stats(),
+    }
+
+
+@router.get("/admin/storage")
+async def storage_stats():
+    """磁盘配额状态: 各区域 (downloads/temp/transcripts) 的占用、配额、固定中的文件数与回收计数"""
+    return storage.stats()
+
+
+@router.post("/admin/storage/gc")
+async def storage_gc():
+    """立即按配额回收 (LRU, 跳过正在使用的文件)"""
+    removed = await run_blocking(storage.collect)
+    return {"removed": removed, **storage.stats()}
+
+
+@router.get("/admin/llm")
+async def llm_stats():
+    """LLM状态: 响应缓存 (条目数、占用、命中率、回收) 与调度器 (各优先级队列深度、等待时间、重试与限流次数)"""
+    return {"cache": await run_blocking(llm_cache.stats), "scheduler": llm_scheduler.stats()}
+
+
+@router.delete("/admin/llm/cache")
+async def clear_llm_cache():
+    """清空LLM响应缓存"""
+    return {"removed": await run_blocking(llm_cache.clear)}
+
+
 @router.post("/extract", response_model=ExtractResponse)
-async def extract_content(request: ExtractRequest, background_tasks: BackgroundTasks):
-    """从URL提取内容"""
+async def extract_content(request: ExtractRequest):
+    """从URL提取内容: 立即返回任务ID, 提取在后台worker中执行"""
     processor = SourceRegistry.get_processor(request.url)
     
     if not processor:
@@ -119,54 +204,265 @@ async def extract_content(request: ExtractRequest, background_tasks: BackgroundT
             detail=f"Unsupported URL: {request.url}"
         )
     
-    options = request.options or {}
+    job = job_manager.submit(request.url, request.options or {})
+    
+    return ExtractResponse(
+        job_id=job.job_id,
+        status=job.status,
+        source_type=processor.source_type.value,
+        message=f"Extraction queued, poll /api/v1/jobs/{job.job_id}"
+    )
+
+
+@router.get("/jobs")
+async def list_jobs():
+    """列出提取任务及各阶段并发状态"""
+    return {
+        "jobs": [job.to_dict() for job in job_manager.list()],
+        "queue_depth": job_manager.queue_depth(),
+        "stages": stage_limits.stats(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """获取任务状态与分阶段进度"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """取消任务 (排队中直接取消, 执行中则终止下载与转录)"""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/batches")
+async def create_batch(request: BatchRequest):
+    """批量导入: 平铺枚举列表中的视频, 后台并发提取, 进度持久化 (中断后可续跑)"""
+    if not SourceRegistry.get_list_processor(request.url):
+        raise HTTPException(status_code=400, detail=f"Unsupported list URL: {request.url}")
     
-    try:
-        # 同步执行提取 (MVP简化版)
-        content = await processor.extract_content(request.url, **options)
-        
-        # 存储
-        content_store[content.content_id] = content
-        
-        return ExtractResponse(
-            content_id=content.content_id,
-            status="completed",
-            source_type=content.source_type.value,
-            title=content.title,
-            message="Content extracted successfully"
+    batch = batch_manager.submit(request.url, request.options or {}, request.limit)
+    return batch.to_dict(include_items=False)
+
+
+@router.get("/batches")
+async def list_batches():
+    """列出批量导入任务"""
+    return {"batches": [batch.to_dict(include_items=False) for batch in batch_manager.list()]}
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str, include_contents: bool = False):
+    """批次详情: 各条目进度与汇总报告; include_contents=true 时附带每个条目的完整内容"""
+    batch = batch_manager.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    result = {**batch.to_dict(), "report": batch_manager.report(batch)}
+    if include_contents:
+        result["contents"] = [_content_response(content) for content in batch_manager.contents(batch)]
+    return result
+
+
+@router.post("/batches/{batch_id}/resume")
+async def resume_batch(batch_id: str):
+    """续跑批次: 跳过已完成条目, 重试失败与取消的条目"""
+    batch = batch_manager.resume(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.to_dict(include_items=False)
+
+
+@router.delete("/batches/{batch_id}")
+async def cancel_batch(batch_id: str):
+    """取消批次 (已完成的条目保留)"""
+    batch = batch_manager.cancel(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.to_dict(include_items=False)
+
+
+@router.get("/extract/stream")
+async def extract_content_stream(
+    url: str,
+    model_size: str = config.WHISPER_MODEL,
+    language: str = config.WHISPER_LANGUAGE,
+):
+    """流式提取: 以SSE逐段推送转录结果 (事件格式与Agent Arena一致)"""
+    processor = SourceRegistry.get_processor(url)
+    
+    if not processor:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported URL: {url}"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    middlewares = [BuiltinMiddleware(), TerminalMiddleware()]
+    
+    def event(stage: str, message: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        return to_sse(apply_middlewares(build_event("extractor", stage, message, payload), middlewares))
+    
+    async def event_stream() -> AsyncIterator[str]:
+        yield event("extract", f"Streaming transcript: {url}")
+        count = 0
+        try:
+            async for section in processor.stream_sections(url, model_size=model_size, language=language):
+                count += 1
+                yield event("observation", section.content, {
+                    "index": count,
+                    "title": section.title,
+                    "start_time": section.start_time,
+                    "end_time": section.end_time,
+                })
+        except Exception as e:
+            yield event("error", str(e))
+        yield event("done", f"Transcript streamed: {count} sections", {"sections": count})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+# fields参数的简写
+FIELD_ALIASES = {"text": "full_text", "metadata": "raw_metadata"}
+NDJSON_BATCH = 200  # NDJSON每次写出的段落数
+
+
+def _content_payload(
+    content: UnifiedContent,
+    sections: Optional[CompactTranscript] = None,
+    full_text: Optional[str] = None,
+) -> Dict[str, Any]:
+    sections = CompactTranscript.of(content.sections) if sections is None else sections
+    return {
+        "content_id": content.content_id,
+        "source_type": content.source_type.value,
+        "source_url": content.source_url,
+        "title": content.title,
+        "author": content.author,
+        "description": content.description,
+        "tags": content.tags,
+        "full_text": content.full_text if full_text is None else full_text,
+        "sections": sections.to_dicts(),
+        "raw_metadata": content.raw_metadata,
+        "transcription_model": content.transcription_model,
+        "transcript_status": content.transcript_status,
+    }
+
+
+def _content_response(content: UnifiedContent) -> ContentResponse:
+    return ContentResponse(**_content_payload(content))
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[set]:
+    """fields=sections / fields=text,title ...; 为空时返回全部字段"""
+    if not fields:
+        return None
+    selected = {FIELD_ALIASES.get(name.strip(), name.strip()) for name in fields.split(",") if name.strip()}
+    unknown = selected - set(ContentResponse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
 
 
 @router.get("/content/{content_id}", response_model=ContentResponse)
-async def get_content(content_id: str):
-    """获取已提取的内容"""
+async def get_content(
+    request: Request,
+    content_id: str,
+    start: Optional[float] = Query(None, ge=0, description="时间窗口起点 (秒), 返回与窗口有重叠的段落"),
+    end: Optional[float] = Query(None, ge=0, description="时间窗口终点 (秒)"),
+    offset: int = Query(0, ge=0, description="窗口内的段落偏移"),
+    limit: Optional[int] = Query(None, ge=1, description="最多返回的段落数"),
+    fields: Optional[str] = Query(None, description="逗号分隔的字段, 如 sections 或 text (=full_text)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson: 首行为内容信息, 之后每行一个段落"),
+):
+    """获取已提取的内容: 支持时间窗口、分页、字段选择、gzip/br压缩与NDJSON流式输出
+    
+    指定时间窗口时full_text仅包含窗口内段落的文本; 段落按开始时间二分查找, 不做线性扫描。
+    """
     if content_id not in content_store:
         raise HTTPException(status_code=404, detail="Content not found")
+    content = content_store[content_id]
+    selected = _parse_fields(fields)
+    
+    windowed = start is not None or end is not None
+    sections = CompactTranscript.of(content.sections)
+    window = sections.between(start, end) if windowed else sections
+    page = window[offset:offset + limit] if limit else window[offset:]
+    paged = windowed or offset or limit
+    full_text = window.text if windowed else None
+    
+    if format == "ndjson":
+        return compressed_stream(
+            request, _content_ndjson(content, window, page, full_text, selected), "application/x-ndjson"
+        )
     
+    payload = _content_payload(content, page, full_text)
+    if paged:
+        payload["total_sections"] = len(window)
+        end_offset = offset + len(page)
+        payload["next_offset"] = end_offset if end_offset < len(window) else None
+    if selected is not None:
+        payload = {key: value for key, value in payload.items() if key in selected}
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    return compressed_response(request, body, "application/json")
+
+
+async def _content_ndjson(
+    content: UnifiedContent,
+    window: CompactTranscript,
+    page: CompactTranscript,
+    full_text: Optional[str],
+    selected: Optional[set],
+) -> AsyncIterator[bytes]:
+    """首行: 内容信息 (不含sections) 与段落总数; 之后每行一个段落, 分批写出"""
+    header = _content_payload(content, CompactTranscript(), full_text)
+    del header["sections"]
+    if selected is not None:
+        header = {key: value for key, value in header.items() if key in selected}
+    header["total_sections"] = len(window)
+    yield (json.dumps({"type": "content", **header}, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+    if selected is not None and "sections" not in selected:
+        return
+    for batch_start in range(0, len(page), NDJSON_BATCH):
+        lines = [
+            json.dumps({"type": "section", **section}, ensure_ascii=False)
+            for section in page[batch_start:batch_start + NDJSON_BATCH].to_dicts()
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@router.get("/content/{content_id}/transcript.{fmt}")
+async def export_transcript(request: Request, content_id: str, fmt: str):
+    """导出转录: srt / vtt / jsonl, 按段落分块流式输出; ETag取自转录内容哈希, 未变化时返回304"""
+    if content_id not in content_store:
+        raise HTTPException(status_code=404, detail="Content not found")
+    if fmt not in EXPORTERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt} (use {', '.join(EXPORTERS)})")
     content = content_store[content_id]
+    sections = CompactTranscript.of(content.sections)
+    exporter, media_type = EXPORTERS[fmt]
     
-    return ContentResponse(
-        content_id=content.content_id,
-        source_type=content.source_type.value,
-        source_url=content.source_url,
-        title=content.title,
-        author=content.author,
-        description=content.description,
-        tags=content.tags,
-        full_text=content.full_text,
-        sections=[
-            {
-                "title": s.title,
-                "content": s.content,
-                "start_time": s.start_time,
-                "end_time": s.end_time
-            }
-            for s in content.sections
-        ],
-        raw_metadata=content.raw_metadata
-    )
+    # 弱ETag: 压缩与否内容等价; 精修替换转录后哈希随之变化
+    etag = f'W/"{sections.digest[:32]}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    filename = f"{content.source_id or content.content_id}.{fmt}"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    
+    async def body() -> AsyncIterator[bytes]:
+        for chunk in exporter(sections):
+            yield chunk.encode("utf-8")
+    
+    return compressed_stream(request, body(), media_type, headers=headers)
 
 
 @router.get("/content")
@@ -187,7 +483,15 @@ async def list_contents():
 
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_skill(request: GenerateRequest):
-    """生成Skills (预留接口)"""
+    """生成Skills (预留接口)
+    
+    options.transcript: "refined" (默认, 等待后台精修完成) 或 "draft" (直接使用草稿转录)
+    """
+    options = request.options or {}
+    if options.get("transcript", "refined") == "refined":
+        for content_id in request.content_ids:
+            await refinements.wait(content_id, timeout=config.REFINE_WAIT_TIMEOUT)
+    
     # TODO: 实现Skills生成逻辑
     skill_id = str(uuid.uuid4())
     
@@ -15,6 +15,7 @@ async def run_augmented_stream(
     sources: Optional[List[str]] = None,
     middlewares=None,
     max_rounds: int = 2,
+    transcript: str = "refined",
 ) -> AsyncIterator[Dict[str, Any]]:
     sources = sources or []
     middlewares = middlewares or []
@@ -27,7 +28,7 @@ async def run_augmented_stream(
         await queue.put(event)
 
     async def runner() -> None:
-        tools = ToolRegistry()
+        tools = ToolRegistry(transcript=transcript)
         orchestrator = Orchestrator(max_rounds=max_rounds)
         result = await orchestrator.run(task, sources, tools, emit)
         await emit("orchestrator", "done", f"Workflow completed: {result.status}", {"result": result.model_dump()})
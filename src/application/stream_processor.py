@@ -1,8 +1,9 @@
 """Stream event normalization for SSE."""
 from __future__ import annotations
 
+import json
 import time
-from typing import Dict, Any
+from typing import Awaitable, Callable, Dict, Any, List
 
 
 def build_event(agent: str, stage: str, message: str, payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
@@ -13,3 +14,38 @@ def build_event(agent: str, stage: str, message: str, payload: Dict[str, Any] |
         "payload": payload or {},
         "timestamp": time.time(),
     }
+
+
+def to_sse(event: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class DeltaCoalescer:
+    """Buffers streamed text and forwards it at most per_second times a second.
+
+    The first delta goes out immediately; later ones are joined until the
+    interval has passed. Call flush() when the stream ends to send the rest.
+    """
+
+    def __init__(self, send: Callable[[str, int], Awaitable[None]], per_second: float) -> None:
+        self.send = send
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.buffer: List[str] = []
+        self.chars = 0
+        self.events = 0
+        self._last = 0.0
+
+    async def __call__(self, text: str) -> None:
+        self.buffer.append(text)
+        self.chars += len(text)
+        if time.monotonic() - self._last >= self.interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.buffer:
+            return
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        self._last = time.monotonic()
+        self.events += 1
+        await self.send(text, self.chars)
@@ -1,5 +1,6 @@
 """Skills Forge - 配置管理"""
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -15,19 +16,114 @@ class Config:
     SKILLS_DIR = OUTPUT_DIR / "skills"
     CONTENT_DIR = OUTPUT_DIR / "content"
     DOWNLOADS_DIR = BASE_DIR / "downloads"
+    TEMP_DIR = Path(os.getenv("TEMP_DIR", str(Path(tempfile.gettempdir()) / "skills_forge")))
     
     # API配置
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", "8000"))
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))  # 小于此大小的响应不压缩
+    RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))  # 需安装brotli
     
     # LLM配置
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     DEFAULT_LLM = os.getenv("DEFAULT_LLM", "claude")
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # 同时进行的LLM请求数
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))  # 共享客户端的连接池大小 (keep-alive复用)
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # 空闲连接保留秒数
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    LLM_RPM = float(os.getenv("LLM_RPM", "500"))  # 每分钟请求数上限 (按端点配额设置, 0 = 不限制)
+    LLM_TPM = float(os.getenv("LLM_TPM", "200000"))  # 每分钟token数上限 (0 = 不限制)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))  # 429/5xx/连接错误的重试次数 (优先遵循Retry-After)
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))  # 退避基数秒 (指数退避 + 随机抖动)
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "300"))  # 单个请求排队+重试的总时限, 超时报错
+    LLM_EXTRACT_WINDOW_TOKENS = int(os.getenv("LLM_EXTRACT_WINDOW_TOKENS", "6000"))  # 长转录按段落切分为此大小的窗口分别提取 (map-reduce)
+    LLM_EXTRACT_CONCURRENCY = int(os.getenv("LLM_EXTRACT_CONCURRENCY", "4"))  # 单个转录同时提取的窗口数
+    LLM_STREAM_DELTAS_PER_SECOND = float(os.getenv("LLM_STREAM_DELTAS_PER_SECOND", "4"))  # 流式生成时每秒最多推送的delta事件数 (其余合并)
+    LLM_PROMPT_MAX_TOKENS = int(os.getenv("LLM_PROMPT_MAX_TOKENS", "4000"))  # 技能生成提示词 (任务+上下文) 的token上限, 超出按优先级裁剪
+    LLM_PROMPT_RECORD_DIR = os.getenv("LLM_PROMPT_RECORD_DIR", "")  # 非空时记录每次生成的原始上下文 (JSON), 供 bench_context_packing.py 回放
+    
+    # LLM响应缓存 (sqlite, 相同请求直接返回)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", str(BASE_DIR / "data" / "llm_cache.sqlite3")))
+    LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+    LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "64"))
+    LLM_CACHE_SAMPLED = os.getenv("LLM_CACHE_SAMPLED", "false").lower() == "true"  # 是否缓存 temperature > 0 的请求
     
     # Whisper配置
     WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
     WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "zh")
+    WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+    WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", "0"))  # 0 = 使用torch默认值
+    # 模型池按进程独立: 分块并行转录的每个worker进程各自加载模型 (worker启动时预加载WHISPER_PRELOAD),
+    # worker数量同时受核数与可用内存限制 (每个worker约占一个模型的内存)
+    WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "")  # 逗号分隔的模型列表, 启动时预加载
+    WHISPER_MAX_CONCURRENCY = int(os.getenv("WHISPER_MAX_CONCURRENCY", "1"))  # 每个模型实例的并发上限
+    WHISPER_MIN_FREE_MB = int(os.getenv("WHISPER_MIN_FREE_MB", "256"))  # 可用内存低于该值时淘汰空闲模型
+    
+    # 转录引擎: whisper (openai-whisper/PyTorch) / faster-whisper (CTranslate2量化) / auto
+    TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "whisper")
+    FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+    FASTER_WHISPER_BEAM_SIZE = int(os.getenv("FASTER_WHISPER_BEAM_SIZE", "1"))  # 1 = 贪心解码, 与whisper默认一致
+    
+    # 分块并行转录
+    TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "0"))  # CPU预算, 0 = 可用核数
+    TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "300"))
+    TRANSCRIBE_CHUNK_OVERLAP = float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP", "2"))
+    
+    # model_size="auto" 时的模型选择: 候选模型 (由快到慢) 与转录延迟目标 (秒)
+    WHISPER_AUTO_MODELS = os.getenv("WHISPER_AUTO_MODELS", "tiny,base,small,medium")
+    TRANSCRIBE_SLO_SECONDS = float(os.getenv("TRANSCRIBE_SLO_SECONDS", "300"))
+    
+    # 渐进式转录 (progressive=True): 草稿模型, 以及生成Skills时等待精修完成的最长时间 (秒)
+    WHISPER_DRAFT_MODEL = os.getenv("WHISPER_DRAFT_MODEL", "tiny")
+    REFINE_WAIT_TIMEOUT = float(os.getenv("REFINE_WAIT_TIMEOUT", "600"))
+    
+    # 转录前的语音活动检测 (VAD): 跳过长静音与音乐段
+    VAD_ENGINE = os.getenv("VAD_ENGINE", "auto")  # auto / webrtc / energy / off
+    VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))  # webrtcvad 0-3
+    VAD_ENERGY_MARGIN_DB = float(os.getenv("VAD_ENERGY_MARGIN_DB", "12"))  # 高于噪声底多少dB视为语音
+    VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", "2.0"))  # 短于该值的停顿不跳过
+    # 音乐检测: 约1秒内电平起伏小于该值 (dB) 且频谱平坦度低于VAD_MUSIC_MAX_FLATNESS (有音调) 视为音乐, 0 = 关闭
+    VAD_MUSIC_MAX_MODULATION_DB = float(os.getenv("VAD_MUSIC_MAX_MODULATION_DB", "2"))
+    VAD_MUSIC_MAX_FLATNESS = float(os.getenv("VAD_MUSIC_MAX_FLATNESS", "0.3"))  # 0 = 纯音, 约0.56 = 白噪声
+    VAD_PADDING = float(os.getenv("VAD_PADDING", "0.2"))
+    VAD_MIN_SKIP_RATIO = float(os.getenv("VAD_MIN_SKIP_RATIO", "0.05"))  # 可跳过比例低于该值时整段转录
+    
+    # 内容源处理器阻塞操作 (yt-dlp等) 的线程池大小
+    SOURCE_IO_WORKERS = int(os.getenv("SOURCE_IO_WORKERS", "4"))
+    
+    # yt-dlp解析结果 (元数据+格式URL) 的缓存时长, 需短于格式URL的有效期
+    METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", "600"))
+    
+    # 后台提取任务
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_HISTORY = int(os.getenv("JOB_HISTORY", "200"))  # 保留的已结束任务数
+    JOB_EVENT_HISTORY = int(os.getenv("JOB_EVENT_HISTORY", "50"))  # 每个任务保留的进度事件数
+    STAGE_METADATA_CONCURRENCY = int(os.getenv("STAGE_METADATA_CONCURRENCY", "4"))
+    STAGE_DOWNLOAD_CONCURRENCY = int(os.getenv("STAGE_DOWNLOAD_CONCURRENCY", "2"))
+    STAGE_DECODE_CONCURRENCY = int(os.getenv("STAGE_DECODE_CONCURRENCY", "2"))
+    STAGE_TRANSCRIBE_CONCURRENCY = int(os.getenv("STAGE_TRANSCRIBE_CONCURRENCY", "1"))
+    
+    # 平台字幕优先: 存在质量达标的字幕轨时跳过Whisper
+    SUBTITLE_FAST_PATH = os.getenv("SUBTITLE_FAST_PATH", "true").lower() == "true"
+    SUBTITLE_MIN_QUALITY = float(os.getenv("SUBTITLE_MIN_QUALITY", "0.3"))  # 0-1, 覆盖率 x 去重率
+    SUBTITLE_MAX_TRACKS = int(os.getenv("SUBTITLE_MAX_TRACKS", "3"))  # 最多尝试下载的字幕轨数, 均不达标时回退到转录
+    
+    # 批量导入 (播放列表/合集/UP主空间)
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # 每个批次同时处理的条目数
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    
+    # 转录缓存
+    TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "100"))
+    
+    # 磁盘配额 (超出时按LRU回收未被使用的文件; 正在处理的文件不会被删除)
+    # 默认值按1 GB的fly.io卷设计: 下载256 + 临时384 + 转录缓存100 + LLM缓存64 ≈ 800 MB,
+    # 其余留给数据库与生成的技能。卷更大时可按比例调高。
+    STORAGE_DOWNLOADS_MAX_MB = int(os.getenv("STORAGE_DOWNLOADS_MAX_MB", "256"))  # downloads/ 中生成的 yt-* 音频
+    STORAGE_TEMP_MAX_MB = int(os.getenv("STORAGE_TEMP_MAX_MB", "384"))  # TEMP_DIR 中的视频与中间音频
     
     # 数据库
     DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/data/skills_forge.db")
@@ -5,12 +5,16 @@ import csv
 import importlib.util
 import re
 from datetime import date, timedelta
-from typing import List, Dict, Any
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 
 from src.core.config import config
 from src.application.types import ExecutionReport
 
 
+# Partial transcripts longer than this are handed to on_partial so drafting can start early.
+PARTIAL_DRAFT_CHARS = 1500
+
+
 class ExecutorAgent:
     name = "executor"
 
@@ -24,7 +28,46 @@ class ExecutorAgent:
                         return match.group(0)
         return None
 
-    async def run(self, task: str, sources: List[str], tools, emit) -> ExecutionReport:
+    async def _extract_video(
+        self,
+        label: str,
+        url: str,
+        tools,
+        emit,
+        on_partial: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+    ) -> Dict[str, Any]:
+        await emit(self.name, "action", f"Extracting {label} transcript...", {})
+        video: Dict[str, Any] = {}
+        drafted = False
+        async for update in tools.video_extract_stream(url):
+            video = {
+                "title": update.get("title"),
+                "transcript": update.get("transcript", "")[:4000],
+                "extracted_skills": update.get("extracted_skills", []),
+            }
+            if update.get("final"):
+                break
+            section = update.get("section") or {}
+            await emit(
+                self.name,
+                "observation",
+                f"Partial transcript up to {section.get('end_time') or 0:.0f}s",
+                {"chars": len(update.get("transcript", ""))},
+            )
+            if on_partial and not drafted and len(update.get("transcript", "")) >= PARTIAL_DRAFT_CHARS:
+                drafted = True
+                await on_partial({"video": dict(video, partial=True)})
+        await emit(self.name, "observation", f"{label} transcript captured.", {})
+        return video
+
+    async def run(
+        self,
+        task: str,
+        sources: List[str],
+        tools,
+        emit,
+        on_partial: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> ExecutionReport:
         await emit(self.name, "plan", "Execute task using available tools.", {})
         issues: List[str] = []
         outputs: Dict[str, Any] = {}
@@ -111,27 +154,13 @@ class ExecutorAgent:
 
         if "bilibili" in sources and (bilibili_url or "bilibili.com" in task):
             try:
-                await emit(self.name, "action", "Extracting Bilibili transcript...", {})
-                result = await tools.video_extract(video_url=bilibili_url or task)
-                outputs["video"] = {
-                    "title": result.get("title"),
-                    "transcript": result.get("transcript", "")[:4000],
-                    "extracted_skills": result.get("extracted_skills", []),
-                }
-                await emit(self.name, "observation", "Bilibili transcript captured.", {})
+                outputs["video"] = await self._extract_video("Bilibili", bilibili_url or task, tools, emit, on_partial)
             except Exception as exc:
                 issues.append(f"Bilibili execution failed: {exc}")
 
         if "youtube" in sources and (youtube_url or "youtube.com" in task or "youtu.be" in task):
             try:
-                await emit(self.name, "action", "Extracting YouTube transcript...", {})
-                result = await tools.video_extract(video_url=youtube_url or task)
-                outputs["video"] = {
-                    "title": result.get("title"),
-                    "transcript": result.get("transcript", "")[:4000],
-                    "extracted_skills": result.get("extracted_skills", []),
-                }
-                await emit(self.name, "observation", "YouTube transcript captured.", {})
+                outputs["video"] = await self._extract_video("YouTube", youtube_url or task, tools, emit, on_partial)
             except Exception as exc:
                 issues.append(f"YouTube execution failed: {exc}")
 
@@ -1,8 +1,9 @@
 """Orchestrator for multi-agent workflow."""
 from __future__ import annotations
 
+import asyncio
 import uuid
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from src.application.types import AgentOutput, SkillSpec, TestCaseSpec, ExecutionReport
 from src.core_agents.skill_generator import SkillGeneratorAgent
@@ -36,9 +37,32 @@ class Orchestrator:
         last_validation: Optional[ExecutionReport] = None
         execution_report: Optional[ExecutionReport] = None
 
+        early_draft: Optional[asyncio.Task] = None
+
+        async def on_partial(outputs: Dict[str, Any]) -> None:
+            # Start drafting from the partial transcript while transcription continues.
+            nonlocal early_draft
+            await emit(self.name, "plan", "Partial transcript ready; drafting preview skill.", {})
+            early_draft = asyncio.create_task(
+                self.skill_agent.run(
+                    task,
+                    sources,
+                    tools,
+                    emit,
+                    execution_summary={"passed": True, "notes": "Partial transcript.", "outputs": outputs},
+                )
+            )
+
         await emit(self.name, "plan", "Execute task first, then derive skill.", {})
-        execution_report = await self.executor_agent.run(task, sources, tools, emit)
+        try:
+            execution_report = await self.executor_agent.run(task, sources, tools, emit, on_partial=on_partial)
+        except BaseException:
+            if early_draft:
+                early_draft.cancel()
+            raise
         if not execution_report.passed:
+            if early_draft:
+                early_draft.cancel()
             return AgentOutput(
                 status="fail",
                 next_agent=None,
@@ -49,6 +73,27 @@ class Orchestrator:
 
         execution_summary = execution_report.model_dump()
 
+        # The early draft only saw a partial transcript: publish it as a preview and
+        # let round 1 refine it against the full execution summary. A draft still
+        # running at this point is stale and is dropped.
+        preview: Optional[SkillSpec] = None
+        if early_draft is not None:
+            if early_draft.done():
+                try:
+                    preview = early_draft.result()
+                except (Exception, asyncio.CancelledError) as exc:
+                    await emit(self.name, "error", f"Early draft failed: {exc}", {})
+            else:
+                early_draft.cancel()
+            early_draft = None
+        if preview is not None:
+            await emit(
+                self.name,
+                "observation",
+                "Preview skill from partial transcript; refining with full transcript.",
+                {"preview": preview.model_dump()},
+            )
+
         for round_id in range(1, self.max_rounds + 1):
             await emit(self.name, "plan", f"Skill draft round {round_id}/{self.max_rounds}.", {})
 
@@ -59,6 +104,7 @@ class Orchestrator:
                 emit,
                 feedback=feedback,
                 execution_summary=execution_summary,
+                draft=preview if round_id == 1 else None,
             )
             tests = await self.scenario_agent.run(task, skill, tools, emit)
             validation = await self.validator_agent.run(skill, tests, emit)
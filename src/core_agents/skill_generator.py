@@ -1,12 +1,34 @@
 """Skill generation agent."""
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import json
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 
+from src.application.stream_processor import DeltaCoalescer
 from src.application.types import SkillSpec
+from src.core.config import config
+from src.services.context_packer import ContextSection, pack_context
 from src.services.skill_library import build_skill_context
 
 
+# Packing order and caps of the generation context; higher priority is kept first.
+# The caps sum to under the default LLM_PROMPT_MAX_TOKENS so every source keeps a share;
+# draft (round 1) and feedback (later rounds) never appear together.
+CONTEXT_SECTIONS: Dict[str, Dict[str, Any]] = {
+    "feedback": {"priority": 100, "max_tokens": 400},
+    "draft": {"priority": 100, "max_tokens": 400, "fields": ["name", "description", "content"]},
+    "sources": {"priority": 90},
+    "execution_summary": {"priority": 80, "max_tokens": 700},
+    "video": {"priority": 70, "max_tokens": 600, "fields": ["title", "transcript"]},
+    "local_skills": {"priority": 60, "max_tokens": 900, "fields": ["name", "description", "content"]},
+    "skills_sh": {"priority": 50, "max_tokens": 300, "fields": ["name", "description", "stars", "github_url"], "max_items": 5},
+    "github": {"priority": 40, "max_tokens": 300, "fields": ["full_name", "description", "stars", "language", "url"], "max_items": 5},
+    "web_search": {"priority": 30, "max_tokens": 600, "fields": ["title", "content", "url"], "max_items": 5},
+}
+
+
 def _expand_queries(task: str) -> List[str]:
     queries = [task.strip()]
     lowered = task.lower()
@@ -25,6 +47,23 @@ def _expand_queries(task: str) -> List[str]:
     return unique
 
 
+def build_prompt(task: str, context: Dict[str, Any], budget: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Task plus the context packed into at most budget tokens (LLM_PROMPT_MAX_TOKENS)."""
+    sections = [
+        ContextSection(name, value, **CONTEXT_SECTIONS.get(name, {}))
+        for name, value in context.items()
+    ]
+    return pack_context(sections, budget or config.LLM_PROMPT_MAX_TOKENS, header="Task: " + task + "\nContext:")
+
+
+def _record(task: str, context: Dict[str, Any]) -> None:
+    """Keep the raw context of a run for replay by bench_context_packing.py."""
+    directory = Path(config.LLM_PROMPT_RECORD_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"run_{time.strftime('%Y%m%d_%H%M%S')}_{time.time_ns() % 10**6:06d}.json"
+    path.write_text(json.dumps({"task": task, "context": context}, ensure_ascii=False, default=str), encoding="utf-8")
+
+
 class SkillGeneratorAgent:
     name = "skill_generator"
 
@@ -36,6 +75,7 @@ class SkillGeneratorAgent:
         emit,
         feedback: Optional[str] = None,
         execution_summary: Optional[Dict[str, Any]] = None,
+        draft: Optional[SkillSpec] = None,
     ) -> SkillSpec:
         await emit(self.name, "plan", "Generate a draft skill spec from available sources.", {})
 
@@ -94,15 +134,33 @@ class SkillGeneratorAgent:
 
         if feedback:
             context["feedback"] = feedback
+        if draft is not None:
+            # A preview drafted from partial input: refine it against the full context.
+            context["draft"] = draft.model_dump()
         if execution_summary:
             context["execution_summary"] = execution_summary
 
-        prompt = (
-            "Task: " + task + "\n" +
-            "Context: " + str(context)
+        if config.LLM_PROMPT_RECORD_DIR:
+            try:
+                _record(task, context)
+            except OSError:
+                pass
+        prompt, packing = build_prompt(task, context)
+        await emit(
+            self.name,
+            "action",
+            "Generating skill with LLM...",
+            {"prompt_tokens": packing["prompt_tokens"], "trimmed": packing["trimmed"], "dropped": packing["dropped"]},
         )
-        await emit(self.name, "action", "Generating skill with LLM...", {})
-        skill_data = await tools.generate_skill(prompt)
+
+        async def send_delta(text: str, chars: int) -> None:
+            await emit(self.name, "delta", text, {"chars": chars})
+
+        deltas = DeltaCoalescer(send_delta, config.LLM_STREAM_DELTAS_PER_SECOND)
+        try:
+            skill_data = await tools.generate_skill(prompt, on_delta=deltas)
+        finally:
+            await deltas.flush()
         skill = SkillSpec(**skill_data)
         await emit(self.name, "observation", f"Skill drafted: {skill.name}", {})
         return skill
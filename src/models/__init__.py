@@ -6,5 +6,6 @@ from src.models.unified import (
     Skill, 
     SourceType
 )
+from src.models.transcript import CompactTranscript, SectionView
 
-__all__ = ['UnifiedContent', 'Section', 'Experience', 'Skill', 'SourceType']
+__all__ = ['UnifiedContent', 'Section', 'Experience', 'Skill', 'SourceType', 'CompactTranscript', 'SectionView']
@@ -0,0 +1,218 @@
+"""Skills Forge - 紧凑的列式转录存储
+
+长视频会产生成千上万个段落, 若每段都是一个Section对象 (各自的__dict__、标题字符串与装箱的float),
+内存开销远大于文本本身。CompactTranscript 按列存储:
+起止时间各一个 array('d'), 全部文本拼接为一个字符串并以偏移量定位, 标题按需生成。
+"""
+import sys
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from math import isnan
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+NAN = float("nan")
+DEFAULT_TITLE = "段落 {}"
+
+
+class SectionView:
+    """CompactTranscript中一个段落的只读视图, 属性与Section一致 (title/content/start_time/end_time)"""
+
+    __slots__ = ("_transcript", "_index")
+
+    def __init__(self, transcript: "CompactTranscript", index: int):
+        self._transcript = transcript
+        self._index = index
+
+    @property
+    def title(self) -> str:
+        return self._transcript._title(self._index)
+
+    @property
+    def content(self) -> str:
+        return self._transcript._content(self._index)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return _optional(self._transcript._starts[self._index])
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return _optional(self._transcript._ends[self._index])
+
+    def __eq__(self, other: Any) -> bool:
+        return all(getattr(self, name) == getattr(other, name, None) for name in ("title", "content", "start_time", "end_time"))
+
+    def __repr__(self) -> str:
+        return (
+            f"Section(title={self.title!r}, content={self.content!r}, "
+            f"start_time={self.start_time!r}, end_time={self.end_time!r})"
+        )
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if isnan(value) else value
+
+
+def _time(value: Optional[float]) -> float:
+    return NAN if value is None else float(value)
+
+
+class CompactTranscript(Sequence):
+    """列式存储的段落序列, 可替代 List[Section]
+
+    支持 len / 迭代 / 下标 / 切片; 切片与 between() 返回共享底层存储的视图, 不复制数据。
+    时间缺失的段落以NaN存储, 读取时还原为None。
+    """
+
+    __slots__ = ("_starts", "_ends", "_text", "_offsets", "_titles", "_title_format", "_lo", "_hi", "_digest")
+
+    def __init__(
+        self,
+        starts: Optional[array] = None,
+        ends: Optional[array] = None,
+        text: str = "",
+        offsets: Optional[array] = None,
+        titles: Optional[List[str]] = None,
+        title_format: str = DEFAULT_TITLE,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ):
+        self._starts = starts if starts is not None else array("d")
+        self._ends = ends if ends is not None else array("d")
+        self._text = text
+        self._offsets = offsets if offsets is not None else array("q", [0])
+        self._titles = titles  # 仅当标题无法由title_format生成时保存
+        self._title_format = title_format
+        self._lo = lo
+        self._hi = len(self._starts) if hi is None else hi
+        self._digest: Optional[str] = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]], title_format: str = DEFAULT_TITLE) -> "CompactTranscript":
+        """由转录segments ({start, end, text}) 构建"""
+        starts, ends, offsets = array("d"), array("d"), array("q", [0])
+        texts = []
+        position = 0
+        for seg in segments:
+            starts.append(_time(seg.get("start")))
+            ends.append(_time(seg.get("end")))
+            texts.append(seg["text"])
+            position += len(seg["text"])
+            offsets.append(position)
+        return cls(starts, ends, "".join(texts), offsets, title_format=title_format)
+
+    @classmethod
+    def from_sections(cls, sections: Iterable[Any], title_format: str = DEFAULT_TITLE) -> "CompactTranscript":
+        """由Section (或任何有相同属性的对象) 构建; 标题不符合title_format时原样保留"""
+        sections = list(sections)
+        transcript = cls.from_segments(
+            ({"start": s.start_time, "end": s.end_time, "text": s.content} for s in sections),
+            title_format=title_format,
+        )
+        titles = [s.title for s in sections]
+        if any(title != title_format.format(i + 1) for i, title in enumerate(titles)):
+            transcript._titles = titles
+        return transcript
+
+    @classmethod
+    def of(cls, sections: Union["CompactTranscript", Iterable[Any]]) -> "CompactTranscript":
+        """已是CompactTranscript时原样返回, 否则由Section列表构建"""
+        if isinstance(sections, cls):
+            return sections
+        return cls.from_sections(sections)
+
+    # 内部按绝对下标访问, 视图通过 _lo/_hi 限定范围
+    def _title(self, index: int) -> str:
+        if self._titles is not None:
+            return self._titles[index]
+        return self._title_format.format(index + 1)
+
+    def _content(self, index: int) -> str:
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def _view(self, lo: int, hi: int) -> "CompactTranscript":
+        return CompactTranscript(
+            self._starts, self._ends, self._text, self._offsets, self._titles, self._title_format, lo, max(lo, hi)
+        )
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[SectionView, "CompactTranscript"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CompactTranscript slices must be contiguous")
+            return self._view(self._lo + start, self._lo + stop)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("section index out of range")
+        return SectionView(self, self._lo + key)
+
+    def __iter__(self) -> Iterator[SectionView]:
+        for index in range(self._lo, self._hi):
+            yield SectionView(self, index)
+
+    def __bool__(self) -> bool:
+        return self._hi > self._lo
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"CompactTranscript({len(self)} sections, {self.nbytes} bytes)"
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> "CompactTranscript":
+        """与时间区间 [start, end) 有重叠的段落视图 (要求段落按时间排序, 二分查找)"""
+        lo, hi = self._lo, self._hi
+        if start is not None:
+            # 第一个结束时间晚于start的段落
+            lo = bisect_right(self._ends, start, lo, hi)
+        if end is not None:
+            # 第一个开始时间不早于end的段落之前
+            hi = bisect_left(self._starts, end, lo, hi)
+        return self._view(lo, hi)
+
+    @property
+    def text(self) -> str:
+        """视图内全部段落文本 (按段拼接, 不含分隔符)"""
+        return self._text[self._offsets[self._lo]:self._offsets[self._hi]]
+
+    @property
+    def nbytes(self) -> int:
+        """底层列存储占用的内存字节数 (视图与原对象共享)"""
+        return sum(sys.getsizeof(column) for column in (self._starts, self._ends, self._offsets, self._text))
+
+    @property
+    def digest(self) -> str:
+        """视图内容 (时间、文本、标题) 的sha256, 用作ETag; 内容不可变, 计算一次后缓存"""
+        if self._digest is None:
+            digest = hashlib.sha256()
+            digest.update(self._starts[self._lo:self._hi].tobytes())
+            digest.update(self._ends[self._lo:self._hi].tobytes())
+            digest.update(self.text.encode("utf-8"))
+            digest.update(self._offsets[self._lo:self._hi + 1].tobytes())
+            if self._titles is not None:
+                digest.update("\x1f".join(self._titles[self._lo:self._hi]).encode("utf-8"))
+            else:
+                digest.update(self._title_format.encode("utf-8"))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """直接由列数据生成API输出的字典列表, 不经过Section对象"""
+        starts, ends, offsets, text = self._starts, self._ends, self._offsets, self._text
+        return [
+            {
+                "title": self._title(i),
+                "content": text[offsets[i]:offsets[i + 1]],
+                "start_time": _optional(starts[i]),
+                "end_time": _optional(ends[i]),
+            }
+            for i in range(self._lo, self._hi)
+        ]
@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
+from src.models.transcript import CompactTranscript
+
 
 class SourceType(str, Enum):
     """内容源类型"""
@@ -40,7 +42,7 @@ class UnifiedContent:
     
     # 内容 (文本化后)
     full_text: str = ""
-    sections: List[Section] = field(default_factory=list)
+    sections: CompactTranscript = field(default_factory=CompactTranscript)  # 列式存储, 接口同 List[Section]
     
     # 原始数据
     raw_metadata: Dict[str, Any] = field(default_factory=dict)
@@ -48,6 +50,11 @@ class UnifiedContent:
     # 处理状态
     extracted_at: datetime = field(default_factory=datetime.now)
     transcription_model: Optional[str] = None
+    transcript_status: str = "final"  # 渐进式转录: 草稿返回后为"refining", 精修完成后为"final", 失败为"refine_failed"
+    
+    def __post_init__(self):
+        if not isinstance(self.sections, CompactTranscript):
+            self.sections = CompactTranscript.from_sections(self.sections)
 
 
 @dataclass
@@ -0,0 +1,51 @@
+"""Audio-only ingest: best audio stream -> 16 kHz mono PCM in one ffmpeg pass."""
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# yt-dlp format selector for the smallest useful download.
+AUDIO_FORMAT = "bestaudio/best"
+
+PCM_SAMPLE_RATE = 16000
+
+
+def select_audio_format(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the format dict yt-dlp chose for AUDIO_FORMAT (url + http_headers)."""
+    for fmt in info.get("requested_formats") or []:
+        if fmt.get("acodec") not in (None, "none") and fmt.get("vcodec") in (None, "none"):
+            return fmt
+    if info.get("url"):
+        return info
+    audio_only = [
+        fmt for fmt in info.get("formats") or []
+        if fmt.get("url") and fmt.get("acodec") not in (None, "none")
+    ]
+    if not audio_only:
+        raise RuntimeError("No audio stream available")
+    audio_only.sort(key=lambda fmt: (fmt.get("vcodec") in (None, "none"), fmt.get("abr") or 0))
+    return audio_only[-1]
+
+
+def pcm_command(source: str, output_path: Path, headers: Optional[Dict[str, str]] = None) -> List[str]:
+    """ffmpeg argv that reads source (URL or path) and writes 16 kHz mono s16 WAV."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if headers:
+        cmd += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+    cmd += [
+        "-i", source,
+        "-vn", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE), "-c:a", "pcm_s16le",
+        "-y", str(output_path),
+    ]
+    return cmd
+
+
+def download_pcm(info: Dict[str, Any], output_path: Path) -> Path:
+    """Fetch the selected audio stream of a resolved yt-dlp info dict straight into WAV."""
+    fmt = select_audio_format(info)
+    headers = fmt.get("http_headers") or info.get("http_headers")
+    result = subprocess.run(pcm_command(fmt["url"], output_path, headers), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "ffmpeg failed to fetch audio")
+    return output_path
@@ -0,0 +1,245 @@
+"""Bulk ingestion of playlists, collections (合集) and uploader channels.
+
+A batch enumerates its entries with flat extraction, then runs each entry
+through the normal extraction path (per-stage limits, single-flight,
+transcript cache) with at most BATCH_CONCURRENCY entries in flight. Batch
+state is persisted after every item transition, so a batch interrupted by
+a restart resumes with its unfinished items only.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.config import config
+from src.models.unified import UnifiedContent
+from src.services.single_flight import extraction_flights, flight_key
+from src.sources.base import SourceRegistry
+
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+@dataclass
+class BatchItem:
+    index: int
+    url: str
+    title: str = ""
+    status: str = "pending"  # pending -> running -> completed / failed / cancelled
+    stage: Optional[str] = None
+    content_id: Optional[str] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+@dataclass
+class Batch:
+    batch_id: str
+    url: str
+    options: Dict[str, Any]
+    limit: Optional[int] = None
+    title: str = ""
+    status: str = "queued"  # queued -> enumerating -> running -> completed / failed / cancelled (interrupted: resumes on start)
+    items: List[BatchItem] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self, include_items: bool = True) -> Dict[str, Any]:
+        data = {
+            "batch_id": self.batch_id,
+            "url": self.url,
+            "options": self.options,
+            "limit": self.limit,
+            "title": self.title,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "counts": dict(Counter(item.status for item in self.items)),
+            "total": len(self.items),
+        }
+        if include_items:
+            data["items"] = [asdict(item) for item in self.items]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Batch":
+        items = [BatchItem(**item) for item in data.get("items", [])]
+        fields = {key: data.get(key) for key in ("batch_id", "url", "options", "limit", "title", "status", "error", "created_at", "finished_at")}
+        return cls(items=items, **fields)
+
+
+class BatchManager:
+    """Runs bulk ingestion batches and persists their progress under OUTPUT_DIR/batches."""
+
+    def __init__(self, content_store: Dict[str, UnifiedContent], root: Optional[Path] = None) -> None:
+        self.content_store = content_store
+        self.root = root or config.OUTPUT_DIR / "batches"
+        self._batches: Dict[str, Batch] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Load persisted batches and resume the ones a shutdown interrupted."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.root.glob("*.json")):
+            try:
+                batch = Batch.from_dict(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError, TypeError) as exc:
+                print(f"[batches] Skipping unreadable {path.name}: {exc}")
+                continue
+            self._batches[batch.batch_id] = batch
+            if batch.status not in TERMINAL_STATUSES:
+                for item in batch.items:
+                    if item.status == "running":  # the process died mid-item
+                        item.status = "pending"
+                self._launch(batch)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        tasks = [batch.task for batch in self._batches.values() if batch.task and not batch.task.done()]
+        for task in tasks:
+            task.cancel()
+        # Interrupted batches keep their non-terminal status on disk and resume on next start.
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, url: str, options: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> Batch:
+        batch = Batch(batch_id=str(uuid.uuid4()), url=url, options=options or {}, limit=limit)
+        self._batches[batch.batch_id] = batch
+        self._save(batch)
+        self._launch(batch)
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        return self._batches.get(batch_id)
+
+    def list(self) -> List[Batch]:
+        return sorted(self._batches.values(), key=lambda batch: batch.created_at, reverse=True)
+
+    def resume(self, batch_id: str) -> Optional[Batch]:
+        """Retry the failed and cancelled items of a finished batch, or restart a stopped one."""
+        batch = self._batches.get(batch_id)
+        if batch is None or (batch.task and not batch.task.done()):
+            return batch
+        for item in batch.items:
+            if item.status in ("failed", "cancelled"):
+                item.status, item.error = "pending", None
+        batch.status, batch.error, batch.finished_at = "queued", None, None
+        self._save(batch)
+        self._launch(batch)
+        return batch
+
+    def cancel(self, batch_id: str) -> Optional[Batch]:
+        batch = self._batches.get(batch_id)
+        if batch and batch.task and not batch.task.done():
+            batch.task.cancel()
+        return batch
+
+    def contents(self, batch: Batch) -> List[UnifiedContent]:
+        return [
+            self.content_store[item.content_id]
+            for item in batch.items
+            if item.content_id and item.content_id in self.content_store
+        ]
+
+    def report(self, batch: Batch) -> Dict[str, Any]:
+        """Aggregate outcome of a batch: status counts, audio covered, transcription sources, failures."""
+        contents = self.contents(batch)
+        durations = [item.finished_at - item.started_at for item in batch.items if item.started_at and item.finished_at]
+        return {
+            "total": len(batch.items),
+            "counts": dict(Counter(item.status for item in batch.items)),
+            "audio_seconds": sum(content.raw_metadata.get("duration") or 0 for content in contents),
+            "transcript_chars": sum(len(content.full_text) for content in contents),
+            "transcription_models": dict(Counter(content.transcription_model or "none" for content in contents)),
+            "item_seconds_avg": round(sum(durations) / len(durations), 2) if durations else None,
+            "elapsed_seconds": round((batch.finished_at or time.time()) - batch.created_at, 2),
+            "failures": [
+                {"index": item.index, "url": item.url, "error": item.error}
+                for item in batch.items
+                if item.status == "failed"
+            ],
+        }
+
+    def _launch(self, batch: Batch) -> None:
+        batch.task = asyncio.create_task(self._run(batch))
+
+    def _save(self, batch: Batch) -> None:
+        """Atomic write: a crash leaves either the previous or the new state."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{batch.batch_id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(batch.to_dict(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    async def _run(self, batch: Batch) -> None:
+        try:
+            if not batch.items:
+                batch.status = "enumerating"
+                processor = SourceRegistry.get_list_processor(batch.url)
+                if not processor:
+                    raise ValueError(f"Unsupported list URL: {batch.url}")
+                limit = min(batch.limit or config.BATCH_MAX_ITEMS, config.BATCH_MAX_ITEMS)
+                batch.title, entries = await processor.list_entries(batch.url, limit=limit)
+                batch.items = [
+                    BatchItem(index=i, url=entry["url"], title=entry.get("title", ""))
+                    for i, entry in enumerate(entries)
+                ]
+            batch.status = "running"
+            self._save(batch)
+
+            semaphore = asyncio.Semaphore(max(1, config.BATCH_CONCURRENCY))
+            await asyncio.gather(*(self._run_item(batch, item, semaphore) for item in batch.items))
+            batch.status = "completed"
+        except asyncio.CancelledError:
+            batch.status = "interrupted" if self._stopping else "cancelled"
+            raise
+        except Exception as exc:
+            batch.status, batch.error = "failed", str(exc)
+        finally:
+            if batch.status in TERMINAL_STATUSES:
+                batch.finished_at = time.time()
+            self._save(batch)
+
+    async def _run_item(self, batch: Batch, item: BatchItem, semaphore: asyncio.Semaphore) -> None:
+        if item.status in ("failed", "cancelled"):
+            return
+        if item.status == "completed" and item.content_id in self.content_store:
+            return
+        # Anything else runs; an item completed before a restart is rebuilt from the transcript cache.
+        async with semaphore:
+            processor = SourceRegistry.get_processor(item.url)
+            item.status, item.error = "running", None
+            item.started_at = item.started_at or time.time()
+            self._save(batch)
+
+            def report(stage: str, message: str) -> None:
+                item.stage = stage
+
+            try:
+                if not processor:
+                    raise ValueError(f"Unsupported URL: {item.url}")
+                content = await extraction_flights.run(
+                    flight_key("content", item.url, **batch.options),
+                    lambda progress: processor.extract_content(item.url, progress=progress, **batch.options),
+                    on_progress=report,
+                )
+                self.content_store[content.content_id] = content
+                item.content_id, item.status = content.content_id, "completed"
+            except asyncio.CancelledError:
+                item.status = "pending" if self._stopping else "cancelled"
+                raise
+            except Exception as exc:
+                item.status, item.error = "failed", str(exc)
+            finally:
+                item.finished_at = time.time()
+                self._save(batch)
@@ -0,0 +1,174 @@
+"""Token-budgeted packing of agent context into an LLM prompt.
+
+Each ContextSection has a priority, an optional token cap and optionally the
+fields worth keeping from its records. Sections are allotted budget in
+priority order; a value that does not fit its allotment is shrunk (longest
+strings truncated first, then trailing list items dropped) and a section
+that cannot keep even min_tokens is dropped. Values are serialized as
+compact JSON, and the packed prompt is guaranteed to stay within budget.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.services.tokens import count_tokens, truncate_to_tokens
+
+
+ELLIPSIS = "…"
+MIN_STRING_TOKENS = 16  # strings are not cut below this; list items are dropped instead
+
+
+@dataclass
+class ContextSection:
+    name: str
+    value: Any
+    priority: int = 0  # higher is packed first
+    max_tokens: Optional[int] = None
+    fields: Optional[Sequence[str]] = None  # keep only these keys of dict records
+    max_items: Optional[int] = None
+    min_tokens: int = 24  # below this the section is dropped rather than squeezed
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, (list, tuple, dict)) and not value)
+
+
+def _select(value: Any, fields: Optional[Sequence[str]], max_items: Optional[int]) -> Any:
+    """Drop empty values, unlisted fields and surplus items."""
+    if isinstance(value, dict):
+        return {
+            key: _select(item, None, None)
+            for key, item in value.items()
+            if not _empty(item) and (fields is None or key in fields)
+        }
+    if isinstance(value, (list, tuple)):
+        items = [_select(item, fields, None) for item in value if not _empty(item)]
+        return items[:max_items] if max_items is not None else items
+    return value
+
+
+def _strings(value: Any, path: Tuple = ()) -> List[Tuple[Tuple, str]]:
+    if isinstance(value, str):
+        return [(path, value)]
+    if isinstance(value, dict):
+        return [leaf for key, item in value.items() for leaf in _strings(item, path + (key,))]
+    if isinstance(value, list):
+        return [leaf for index, item in enumerate(value) for leaf in _strings(item, path + (index,))]
+    return []
+
+
+def _replace(value: Any, path: Tuple, new: Any) -> Any:
+    if not path:
+        return new
+    head, rest = path[0], path[1:]
+    if isinstance(value, dict):
+        return {**value, head: _replace(value[head], rest, new)}
+    copy = list(value)
+    copy[head] = _replace(copy[head], rest, new)
+    return copy
+
+
+def _longest_list(value: Any, path: Tuple = ()) -> Optional[Tuple[Tuple, int]]:
+    best = (path, len(value)) if isinstance(value, list) and len(value) > 1 else None
+    children = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, item in children:
+        found = _longest_list(item, path + (key,))
+        if found and (best is None or found[1] > best[1]):
+            best = found
+    return best
+
+
+def shrink(value: Any, budget: int, model: Optional[str] = None) -> Optional[Any]:
+    """Smallest change to value whose compact JSON fits budget tokens; None if impossible."""
+    while True:
+        tokens = count_tokens(_dumps(value), model)
+        if tokens <= budget:
+            return value
+        excess = tokens - budget
+        leaves = [(count_tokens(text, model), path, text) for path, text in _strings(value)]
+        leaves = [leaf for leaf in leaves if leaf[0] > MIN_STRING_TOKENS]
+        if leaves:
+            size, path, text = max(leaves, key=lambda leaf: leaf[0])
+            # Cut the longest string by the excess, but at most by half per round.
+            keep = max(MIN_STRING_TOKENS, size - max(excess, 1), size // 2)
+            cut = truncate_to_tokens(text, keep - 1, model).rstrip() + ELLIPSIS
+            if cut != text:
+                value = _replace(value, path, cut)
+                continue
+        longest = _longest_list(value)
+        if longest is None:
+            if isinstance(value, str):
+                cut = truncate_to_tokens(value, budget - 3, model)
+                return cut + ELLIPSIS if cut else None
+            return None
+        path, length = longest
+        value = _replace(value, path, _get(value, path)[: length - 1])
+
+
+def _get(value: Any, path: Tuple) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _block(name: str, value: Any) -> str:
+    return f"## {name}\n{value if isinstance(value, str) else _dumps(value)}"
+
+
+def pack_context(
+    sections: Sequence[ContextSection],
+    budget: int,
+    header: str = "",
+    model: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Pack sections under header into at most budget tokens; returns (prompt, report).
+
+    The report lists per-section tokens (before and after), which sections
+    were trimmed or dropped, and the total prompt tokens.
+    """
+    header_tokens = count_tokens(header, model)
+    if header_tokens > budget // 2:
+        header = truncate_to_tokens(header, budget // 2, model)
+        header_tokens = count_tokens(header, model)
+    remaining = budget - header_tokens - 1
+    packed: Dict[str, Tuple[int, str]] = {}
+    report: Dict[str, Any] = {"budget": budget, "sections": {}, "trimmed": [], "dropped": []}
+
+    ordered = sorted(enumerate(sections), key=lambda item: (-item[1].priority, item[0]))
+    for index, section in ordered:
+        value = _select(section.value, section.fields, section.max_items)
+        if _empty(value):
+            continue
+        original = count_tokens(_block(section.name, section.value), model)
+        name_tokens = count_tokens(_block(section.name, ""), model) + 1
+        allowance = remaining - name_tokens
+        if section.max_tokens is not None:
+            allowance = min(allowance, section.max_tokens)
+        fitted = shrink(value, allowance, model) if allowance >= section.min_tokens else None
+        if fitted is None or _empty(fitted):
+            report["dropped"].append(section.name)
+            report["sections"][section.name] = {"original": original, "packed": 0}
+            continue
+        block = _block(section.name, fitted)
+        tokens = count_tokens(block, model)
+        if fitted != value:
+            report["trimmed"].append(section.name)
+        packed[section.name] = (index, block)
+        report["sections"][section.name] = {"original": original, "packed": tokens}
+        remaining -= tokens + 1
+
+    blocks = [block for _, block in sorted(packed.values())]
+    prompt = "\n".join([header] + blocks) if header else "\n".join(blocks)
+    # Per-block counts can undercount the joined text slightly; trim the tail to be exact.
+    total = count_tokens(prompt, model)
+    if total > budget:
+        prompt = truncate_to_tokens(prompt, budget, model)
+        total = count_tokens(prompt, model)
+    report["prompt_tokens"] = total
+    return prompt, report
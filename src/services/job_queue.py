@@ -0,0 +1,176 @@
+"""Background extraction jobs with a bounded worker pool."""
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.core.config import config
+from src.models.unified import UnifiedContent
+from src.services.refinement import refinements
+from src.services.single_flight import extraction_flights, flight_key
+from src.sources.base import SourceRegistry
+
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+@dataclass
+class Job:
+    job_id: str
+    url: str
+    options: Dict[str, Any]
+    status: str = "queued"  # queued -> running -> completed / failed / cancelled
+    stage: Optional[str] = None
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    content_id: Optional[str] = None
+    transcript_status: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def report(self, stage: str, message: str) -> None:
+        """Record stage progress: the previous stage is marked done when a new one starts."""
+        now = time.time()
+        if self.stage and self.stage != stage and self.stage in self.stages:
+            self.stages[self.stage].update(status="done", finished_at=now)
+        entry = self.stages.setdefault(stage, {"status": "running", "started_at": now})
+        entry["message"] = message
+        self.stage = stage
+        self.note(stage, message)
+
+    def note(self, stage: str, message: str) -> None:
+        """Append an event without touching stage state (also used after the job ended)."""
+        self.events.append({"stage": stage, "message": message, "timestamp": time.time()})
+        del self.events[:-config.JOB_EVENT_HISTORY]
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        now = time.time()
+        if self.stage in self.stages and self.stages[self.stage]["status"] == "running":
+            self.stages[self.stage].update(status="done" if status == "completed" else status, finished_at=now)
+        self.status = status
+        self.error = error
+        self.finished_at = now
+        self.events.append({"stage": status, "message": error or status, "timestamp": now})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "url": self.url,
+            "options": self.options,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": self.stages,
+            "events": self.events,
+            "content_id": self.content_id,
+            "transcript_status": self.transcript_status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Queues extraction jobs and runs them on a fixed number of worker tasks."""
+
+    def __init__(self, content_store: Dict[str, UnifiedContent], workers: Optional[int] = None) -> None:
+        self.content_store = content_store
+        self.workers = max(1, workers or config.JOB_WORKERS)
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue[str]] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for job in self._jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, url: str, options: Optional[Dict[str, Any]] = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobManager is not started")
+        job = Job(job_id=str(uuid.uuid4()), url=url, options=options or {})
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job.job_id)
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+        if job.task and not job.task.done():
+            job.task.cancel()
+        else:
+            job.finish("cancelled")
+        return job
+
+    def _prune(self) -> None:
+        finished = [job for job in self.list() if job.status in TERMINAL_STATUSES]
+        for job in finished[config.JOB_HISTORY:]:
+            self._jobs.pop(job.job_id, None)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            job.task = asyncio.create_task(self._execute(job))
+            try:
+                job.content_id = await job.task
+                job.finish("completed")
+            except asyncio.CancelledError:
+                job.finish("cancelled")
+                if asyncio.current_task().cancelling():
+                    raise  # the worker itself is being stopped
+            except Exception as exc:
+                job.finish("failed", str(exc))
+            finally:
+                job.task = None
+
+    async def _execute(self, job: Job) -> str:
+        processor = SourceRegistry.get_processor(job.url)
+        if not processor:
+            raise ValueError(f"Unsupported URL: {job.url}")
+        content = await extraction_flights.run(
+            flight_key("content", job.url, **job.options),
+            lambda progress: processor.extract_content(job.url, progress=progress, **job.options),
+            on_progress=job.report,
+        )
+        self.content_store[content.content_id] = content
+        job.transcript_status = content.transcript_status
+        if content.transcript_status == "refining":
+            # Draft returned: background refinement events keep landing on this job.
+            def on_refine(stage: str, message: str) -> None:
+                job.note(stage, message)
+                job.transcript_status = content.transcript_status
+
+            refinements.subscribe(content.content_id, on_refine)
+        return content.content_id
@@ -1,37 +1,287 @@
-"""LLM helpers for skill generation."""
+"""LLM helpers for skill generation.
+
+All calls share one long-lived client per mode: an AsyncOpenAI opened and
+closed by the app lifespan (open_client / close_client) and a sync OpenAI
+for callers that run in worker threads. Both reuse keep-alive connections
+from a bounded pool. The a-prefixed coroutines are the native async variants.
+
+Every call that reaches the endpoint goes through llm_scheduler, which
+bounds concurrency, requests and tokens per minute, admits interactive
+generation before test generation before background extraction, and
+retries 429s and transient failures until LLM_DEADLINE_SECONDS.
+
+Responses go through llm_cache: pass cache=False to force a fresh call, or
+cache=True to allow caching a sampled (temperature > 0) request.
+
+astream_skill_from_prompt streams the completion and hands each content
+delta to an on_delta coroutine as it arrives, so callers can show progress
+long before the JSON is complete.
+"""
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import List, Dict, Any
+import threading
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
+from src.core.config import config
+from src.services.llm_cache import llm_cache, request_key
+from src.services.llm_scheduler import BACKGROUND, DEFAULT, INTERACTIVE, llm_scheduler
+from src.services.tokens import MESSAGE_OVERHEAD, count_tokens
 
-def _client() -> OpenAI:
+
+SKILL_SYSTEM_PROMPT = "Generate a concise skill spec. Return JSON with name, description, tags (array), content (SKILL.md body, no frontmatter)."
+EXTRACT_SYSTEM_PROMPT = "Extract 1-3 skills from the transcript. Return JSON { skills: [{ name, description, tags, content }] }. content is SKILL.md body only."
+TESTS_SYSTEM_PROMPT = (
+    "Generate 2-3 test cases for the skill. "
+    "Return JSON with key 'tests' (array). "
+    "Each test must include: name, input, expected, environment, edge_cases (array)."
+)
+MERGE_SYSTEM_PROMPT = (
+    "These candidate skills were extracted from consecutive parts of one transcript. "
+    "Merge duplicates and near-duplicates, keep the most concrete steps, and return the 1-3 most valuable skills. "
+    "Return JSON { skills: [{ name, description, tags, content }] }. content is SKILL.md body only."
+)
+
+@dataclass
+class LLMUsage:
+    """Token usage accumulated over calls; cached calls cost no tokens."""
+
+    calls: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def record(self, request: Dict[str, Any], response: Any = None) -> None:
+        self.calls += 1
+        if response is None:
+            self.cached += 1
+            return
+        usage = getattr(response, "usage", None)
+        self._count(request, usage, lambda: response.choices[0].message.content or "")
+
+    def record_stream(self, request: Dict[str, Any], usage: Any, content: str) -> None:
+        self.calls += 1
+        self._count(request, usage, lambda: content)
+
+    def _count(self, request: Dict[str, Any], usage: Any, content: Callable[[], str]) -> None:
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+        else:
+            # Some compatible endpoints omit usage: estimate.
+            self.prompt_tokens += sum(
+                count_tokens(message["content"], request["model"]) + MESSAGE_OVERHEAD for message in request["messages"]
+            )
+            self.completion_tokens += count_tokens(content(), request["model"])
+
+    def to_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "total_tokens": self.prompt_tokens + self.completion_tokens}
+
+
+COMPLETION_ESTIMATE = 1000  # tokens reserved for the answer until the real usage is known
+
+_async_client: Optional[AsyncOpenAI] = None
+_sync_client: Optional[OpenAI] = None
+_sync_lock = threading.Lock()
+
+
+def _credentials() -> Dict[str, Any]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is required for LLM generation")
-    base_url = os.getenv("OPENAI_BASE_URL") or None
-    return OpenAI(api_key=api_key, base_url=base_url)
+    return {"api_key": api_key, "base_url": os.getenv("OPENAI_BASE_URL") or None}
 
 
-def generate_skill_from_prompt(prompt: str) -> Dict[str, Any]:
-    client = _client()
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL") or "gpt-4o-mini",
-        temperature=0.4,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "Generate a concise skill spec. Return JSON with name, description, tags (array), content (SKILL.md body, no frontmatter).",
-            },
-            {"role": "user", "content": prompt},
-        ],
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+        keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
     )
+
+
+def _model() -> str:
+    return os.getenv("OPENAI_MODEL") or "gpt-4o-mini"
+
+
+async def open_client() -> AsyncOpenAI:
+    """Create the shared async client (idempotent); called from the app lifespan."""
+    global _async_client
+    if _async_client is None:
+        # Retries are llm_scheduler's job, so the client does not retry on its own.
+        _async_client = AsyncOpenAI(
+            **_credentials(),
+            timeout=config.LLM_TIMEOUT,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=config.LLM_TIMEOUT),
+        )
+    return _async_client
+
+
+async def close_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+    _async_client = None
+
+
+def _client() -> OpenAI:
+    """The shared sync client, for callers running in worker threads."""
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None:
+            _sync_client = OpenAI(
+                **_credentials(),
+                timeout=config.LLM_TIMEOUT,
+                max_retries=0,
+                http_client=httpx.Client(limits=_limits(), timeout=config.LLM_TIMEOUT),
+            )
+        return _sync_client
+
+
+def _request(system: str, user: str, temperature: float) -> Dict[str, Any]:
+    return {
+        "model": _model(),
+        "temperature": temperature,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+    }
+
+
+def _estimate(request: Dict[str, Any]) -> int:
+    prompt = sum(count_tokens(message["content"], request["model"]) + MESSAGE_OVERHEAD for message in request["messages"])
+    return prompt + COMPLETION_ESTIMATE
+
+
+def _settle(estimate: int, reported: Any) -> None:
+    if reported is not None and reported.total_tokens:
+        llm_scheduler.settle(estimate, reported.total_tokens)
+
+
+def _chat_json(
+    request: Dict[str, Any],
+    cache: Optional[bool] = None,
+    usage: Optional[LLMUsage] = None,
+    priority: int = DEFAULT,
+) -> Dict[str, Any]:
+    key = request_key(request) if llm_cache.cacheable(request, cache) else None
+    if key is None:
+        llm_cache.skip()
+    else:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            if usage is not None:
+                usage.record(request)
+            return json.loads(cached)
+    estimate = _estimate(request)
+    response = llm_scheduler.call(lambda: _client().chat.completions.create(**request), priority, estimate)
+    _settle(estimate, response.usage)
+    if usage is not None:
+        usage.record(request, response)
     message = response.choices[0].message.content or "{}"
     parsed = json.loads(message)
+    if key is not None:
+        llm_cache.put(key, message)
+    return parsed
+
+
+async def _achat_json(
+    request: Dict[str, Any],
+    cache: Optional[bool] = None,
+    usage: Optional[LLMUsage] = None,
+    priority: int = DEFAULT,
+) -> Dict[str, Any]:
+    key = request_key(request) if llm_cache.cacheable(request, cache) else None
+    if key is None:
+        llm_cache.skip()
+    else:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            if usage is not None:
+                usage.record(request)
+            return json.loads(cached)
+    client = await open_client()  # lazily, for scripts that run without the app lifespan
+    estimate = _estimate(request)
+    response = await llm_scheduler.acall(lambda: client.chat.completions.create(**request), priority, estimate)
+    _settle(estimate, response.usage)
+    if usage is not None:
+        usage.record(request, response)
+    message = response.choices[0].message.content or "{}"
+    parsed = json.loads(message)
+    if key is not None:
+        await asyncio.to_thread(llm_cache.put, key, message)
+    return parsed
+
+
+async def _astream_json(
+    request: Dict[str, Any],
+    on_delta: Callable[[str], Awaitable[None]],
+    cache: Optional[bool] = None,
+    usage: Optional[LLMUsage] = None,
+    priority: int = INTERACTIVE,
+) -> Dict[str, Any]:
+    """_achat_json with a streamed completion; a cached answer arrives as one delta."""
+    key = request_key(request) if llm_cache.cacheable(request, cache) else None
+    if key is None:
+        llm_cache.skip()
+    else:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            if usage is not None:
+                usage.record(request)
+            await on_delta(cached)
+            return json.loads(cached)
+    client = await open_client()
+    parts: List[str] = []
+    reported = None
+
+    async def attempt() -> None:
+        nonlocal reported
+        stream = await client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    reported = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    await on_delta(delta)
+        except Exception as exc:
+            # Deltas already went out; a retry would repeat them.
+            raise RuntimeError(f"LLM stream interrupted: {exc}") from exc
+
+    estimate = _estimate(request)
+    await llm_scheduler.acall(attempt, priority, estimate)
+    _settle(estimate, reported)
+    message = "".join(parts) or "{}"
+    if usage is not None:
+        usage.record_stream(request, reported, message)
+    parsed = json.loads(message)
+    if key is not None:
+        await asyncio.to_thread(llm_cache.put, key, message)
+    return parsed
+
+
+# Skill generation from a prompt stays sampled and uncached: asking again is how a user gets a new draft.
+# Extraction, merging and test generation are deterministic (temperature 0), so repeat runs hit the cache.
+def _skill_request(prompt: str) -> Dict[str, Any]:
+    return _request(SKILL_SYSTEM_PROMPT, prompt, 0.4)
+
+
+def _parse_skill(parsed: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "name": str(parsed.get("name") or "Untitled Skill"),
         "description": str(parsed.get("description") or "Generated skill"),
@@ -40,59 +290,25 @@ def generate_skill_from_prompt(prompt: str) -> Dict[str, Any]:
     }
 
 
-def extract_skills_from_transcript(payload: Dict[str, str]) -> List[Dict[str, Any]]:
-    client = _client()
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL") or "gpt-4o-mini",
-        temperature=0.3,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "Extract 1-3 skills from the transcript. Return JSON { skills: [{ name, description, tags, content }] }. content is SKILL.md body only.",
-            },
-            {"role": "user", "content": json.dumps(payload)},
-        ],
-    )
-    message = response.choices[0].message.content or "{}"
-    parsed = json.loads(message)
-    skills = parsed.get("skills") or []
-    results: List[Dict[str, Any]] = []
-    for skill in skills:
-        results.append(
-            {
-                "name": str(skill.get("name") or "Untitled Skill"),
-                "description": str(skill.get("description") or "Generated skill"),
-                "tags": [str(tag) for tag in skill.get("tags", []) if tag],
-                "content": str(skill.get("content") or ""),
-            }
-        )
-    return results
+def _extract_request(payload: Dict[str, str]) -> Dict[str, Any]:
+    return _request(EXTRACT_SYSTEM_PROMPT, json.dumps(payload, ensure_ascii=False), 0.0)
 
 
-def generate_test_cases(task: str, skill: Dict[str, Any]) -> List[Dict[str, Any]]:
-    client = _client()
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL") or "gpt-4o-mini",
-        temperature=0.3,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "Generate 2-3 test cases for the skill. "
-                    "Return JSON with key 'tests' (array). "
-                    "Each test must include: name, input, expected, environment, edge_cases (array)."
-                ),
-            },
-            {"role": "user", "content": json.dumps({"task": task, "skill": skill})},
-        ],
-    )
-    message = response.choices[0].message.content or "{}"
-    parsed = json.loads(message)
-    tests = parsed.get("tests") or []
+def _merge_request(title: str, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _request(MERGE_SYSTEM_PROMPT, json.dumps({"title": title, "candidates": candidates}, ensure_ascii=False), 0.0)
+
+
+def _parse_skills(parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [_parse_skill(skill) for skill in parsed.get("skills") or []]
+
+
+def _tests_request(task: str, skill: Dict[str, Any]) -> Dict[str, Any]:
+    return _request(TESTS_SYSTEM_PROMPT, json.dumps({"task": task, "skill": skill}, ensure_ascii=False), 0.0)
+
+
+def _parse_tests(parsed: Dict[str, Any], task: str) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
-    for test in tests:
+    for test in parsed.get("tests") or []:
         results.append(
             {
                 "name": str(test.get("name") or "Test"),
@@ -103,3 +319,43 @@ def generate_test_cases(task: str, skill: Dict[str, Any]) -> List[Dict[str, Any]
             }
         )
     return results
+
+
+def generate_skill_from_prompt(prompt: str, cache: Optional[bool] = None) -> Dict[str, Any]:
+    return _parse_skill(_chat_json(_skill_request(prompt), cache, priority=INTERACTIVE))
+
+
+async def agenerate_skill_from_prompt(prompt: str, cache: Optional[bool] = None) -> Dict[str, Any]:
+    return _parse_skill(await _achat_json(_skill_request(prompt), cache, priority=INTERACTIVE))
+
+
+async def astream_skill_from_prompt(
+    prompt: str, on_delta: Callable[[str], Awaitable[None]], cache: Optional[bool] = None
+) -> Dict[str, Any]:
+    """agenerate_skill_from_prompt, passing raw completion deltas to on_delta as they arrive."""
+    return _parse_skill(await _astream_json(_skill_request(prompt), on_delta, cache))
+
+
+def extract_skills_from_transcript(payload: Dict[str, str], cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+    return _parse_skills(_chat_json(_extract_request(payload), cache, priority=BACKGROUND))
+
+
+async def aextract_skills_from_transcript(
+    payload: Dict[str, str], cache: Optional[bool] = None, usage: Optional[LLMUsage] = None
+) -> List[Dict[str, Any]]:
+    return _parse_skills(await _achat_json(_extract_request(payload), cache, usage, BACKGROUND))
+
+
+async def amerge_skills(
+    title: str, candidates: List[Dict[str, Any]], cache: Optional[bool] = None, usage: Optional[LLMUsage] = None
+) -> List[Dict[str, Any]]:
+    """Reduce step of chunked extraction: merge per-window candidates into 1-3 skills."""
+    return _parse_skills(await _achat_json(_merge_request(title, candidates), cache, usage, BACKGROUND))
+
+
+def generate_test_cases(task: str, skill: Dict[str, Any], cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+    return _parse_tests(_chat_json(_tests_request(task, skill), cache), task)
+
+
+async def agenerate_test_cases(task: str, skill: Dict[str, Any], cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+    return _parse_tests(await _achat_json(_tests_request(task, skill), cache), task)
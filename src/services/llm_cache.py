@@ -0,0 +1,146 @@
+"""Persistent LLM response cache (sqlite) keyed by normalized request.
+
+The key hashes the model, temperature, response format and normalized
+messages, so identical prompts from retries, reruns and repeat extractions
+are answered from disk. Entries expire after LLM_CACHE_TTL_HOURS; past
+LLM_CACHE_MAX_MB the least recently used entries are evicted. Sampled
+requests (temperature > 0) are only cached when the caller or
+LLM_CACHE_SAMPLED allows it, since their answers are not reproducible.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.core.config import config
+
+
+def _normalize(text: str) -> str:
+    """Line endings and trailing whitespace do not change the answer."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    normalized = {
+        "model": request.get("model"),
+        "temperature": request.get("temperature"),
+        "response_format": request.get("response_format"),
+        "messages": [
+            {"role": message["role"], "content": _normalize(message.get("content") or "")}
+            for message in request.get("messages", [])
+        ],
+    }
+    canonical = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Optional[Path] = None, max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        self.path = path or config.LLM_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else config.LLM_CACHE_MAX_MB * 2**20
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.LLM_CACHE_TTL_HOURS * 3600
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._db = db
+        return self._db
+
+    def cacheable(self, request: Dict[str, Any], cache: Optional[bool]) -> bool:
+        """cache=False opts out; sampled requests need cache=True or LLM_CACHE_SAMPLED."""
+        if cache is False or not config.LLM_CACHE_ENABLED:
+            return False
+        if (request.get("temperature") or 0) > 0:
+            return bool(cache) or config.LLM_CACHE_SAMPLED
+        return True
+
+    def skip(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self.stores += 1
+            self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        expired = db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        self.evictions += max(0, expired)
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self.evictions += removed
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._conn().execute("DELETE FROM responses").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+llm_cache = LLMCache()
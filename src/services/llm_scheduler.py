@@ -0,0 +1,345 @@
+"""Rate-limit-aware scheduling of LLM calls.
+
+Every request that reaches the endpoint needs a free slot (at most
+LLM_MAX_CONCURRENCY in flight), one request from a requests-per-minute
+bucket and its estimated tokens from a tokens-per-minute bucket. Waiting
+requests are admitted strictly by priority (INTERACTIVE before DEFAULT
+before BACKGROUND), then in arrival order. A 429 or transient failure is
+retried after Retry-After (or a jittered exponential backoff), and a 429
+also pauses admission for everyone until then. Retries give up with
+LLMDeadlineError once the request's deadline would be passed.
+
+The state is guarded by a thread lock, so the async client and the sync
+client used from worker threads share the same budget.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import openai
+
+from src.core.config import config
+
+
+INTERACTIVE = 0
+DEFAULT = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", DEFAULT: "default", BACKGROUND: "background"}
+
+T = TypeVar("T")
+
+
+class LLMDeadlineError(RuntimeError):
+    """The LLM endpoint did not accept the request before its deadline."""
+
+
+class TokenBucket:
+    """Refills per_minute units per minute up to one minute's worth; 0 disables the limit."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket instead of forever.
+        amount = min(amount, self.per_minute)
+        return max(0.0, (amount - self.level) * 60.0 / self.per_minute)
+
+    def take(self, amount: float, now: float) -> None:
+        if self.per_minute > 0:
+            self._refill(now)
+            self.level -= min(amount, self.per_minute)
+
+    def adjust(self, amount: float) -> None:
+        """Correct an earlier take once the real amount is known (negative refunds)."""
+        if self.per_minute > 0:
+            self.level = min(self.per_minute, self.level - amount)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "enqueued", "granted", "cancelled", "_notify")
+
+    def __init__(self, priority: int, tokens: int, notify: Callable[[], None]) -> None:
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self._notify = notify
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (retry-after-ms, or Retry-After as seconds or an HTTP date)."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        self.requests = TokenBucket(config.LLM_RPM if rpm is None else rpm)
+        self.tokens = TokenBucket(config.LLM_TPM if tpm is None else tpm)
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.deadline = config.LLM_DEADLINE_SECONDS if deadline is None else deadline
+        self.max_concurrency = max(1, config.LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency)
+        self.active = 0
+        self._lock = threading.Lock()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+        # Metrics
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.wait_total = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.wait_max = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.retries = 0
+        self.rate_limited = 0
+        self.deadline_exceeded = 0
+
+    # Admission
+
+    def _enqueue(self, priority: int, tokens: int, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(priority, tokens, notify)
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        self._dispatch()
+        return waiter
+
+    def _cancel(self, waiter: _Waiter) -> bool:
+        """Withdraw a waiter; False if it was admitted in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.cancelled = True
+        self._dispatch()
+        return True
+
+    def _dispatch(self) -> None:
+        """Admit queued requests in priority order while the buckets allow."""
+        notify: List[_Waiter] = []
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            while self._queue and self.active < self.max_concurrency:
+                waiter = self._queue[0][2]
+                if waiter.cancelled:
+                    heapq.heappop(self._queue)
+                    continue
+                delay = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(waiter.tokens, now),
+                )
+                if delay > 0:
+                    break
+                heapq.heappop(self._queue)
+                self.requests.take(1, now)
+                self.tokens.take(waiter.tokens, now)
+                waiter.granted = True
+                self.active += 1
+                name = PRIORITY_NAMES.get(waiter.priority, "default")
+                waited = now - waiter.enqueued
+                self.admitted[name] += 1
+                self.wait_total[name] += waited
+                self.wait_max[name] = max(self.wait_max[name], waited)
+                notify.append(waiter)
+            if self._queue and delay > 0:
+                self._schedule(now + delay)
+        for waiter in notify:
+            waiter._notify()
+
+    def _schedule(self, due: float) -> None:
+        # Called with the lock held; one timer re-runs dispatch when the head can go.
+        now = time.monotonic()
+        if self._timer is not None and self._timer.is_alive() and now < self._timer_due <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = threading.Timer(max(0.0, due - now) + 0.001, self._dispatch)
+        self._timer.daemon = True
+        self._timer.start()
+
+    async def _aadmit(self, priority: int, tokens: int, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def notify() -> None:
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+
+        waiter = self._enqueue(priority, tokens, notify)
+        try:
+            await asyncio.wait_for(asyncio.shield(admitted), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if self._cancel(waiter):
+                self._deadline_exceeded()
+                raise LLMDeadlineError(
+                    f"LLM request not admitted within {self.deadline:.0f}s "
+                    f"(rate limits {self.requests.per_minute:g} RPM / {self.tokens.per_minute:g} TPM)"
+                ) from None
+        except BaseException:
+            if not self._cancel(waiter):
+                self.settle(tokens, 0)
+                self._release()
+            raise
+
+    def _admit(self, priority: int, tokens: int, deadline: float) -> None:
+        admitted = threading.Event()
+        waiter = self._enqueue(priority, tokens, admitted.set)
+        if not admitted.wait(max(0.0, deadline - time.monotonic())) and self._cancel(waiter):
+            self._deadline_exceeded()
+            raise LLMDeadlineError(
+                f"LLM request not admitted within {self.deadline:.0f}s "
+                f"(rate limits {self.requests.per_minute:g} RPM / {self.tokens.per_minute:g} TPM)"
+            )
+
+    def _release(self) -> None:
+        with self._lock:
+            self.active -= 1
+        self._dispatch()
+
+    def _deadline_exceeded(self) -> None:
+        with self._lock:
+            self.deadline_exceeded += 1
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Charge the tokens bucket with real usage instead of the estimate."""
+        with self._lock:
+            self.tokens.adjust(actual - estimated)
+
+    # Retries
+
+    def _backoff(self, exc: BaseException, attempt: int, deadline: float) -> float:
+        """Delay before the next attempt; raises LLMDeadlineError if it would pass the deadline."""
+        delay = retry_after(exc)
+        if delay is None:
+            base = config.LLM_BACKOFF_BASE * 2**attempt
+            delay = random.uniform(0, min(config.LLM_BACKOFF_MAX, base))  # full jitter
+        else:
+            delay += random.uniform(0, 0.1 * delay + 0.05)  # spread out the clients told the same time
+        rate_limited = isinstance(exc, openai.RateLimitError) or getattr(exc, "status_code", None) == 429
+        with self._lock:
+            self.retries += 1
+            if rate_limited:
+                self.rate_limited += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+            self._deadline_exceeded()
+            reason = "rate limited" if rate_limited else type(exc).__name__
+            limit = (
+                f"{self.max_retries} retries used"
+                if attempt >= self.max_retries
+                else f"waiting {delay:.1f}s more would pass the {self.deadline:.0f}s deadline"
+            )
+            raise LLMDeadlineError(f"LLM request gave up after {attempt + 1} attempt(s), {reason}; {limit}: {exc}") from exc
+        return delay
+
+    async def acall(self, call: Callable[[], Awaitable[T]], priority: int = DEFAULT, tokens: int = 0) -> T:
+        """Run call when admitted, retrying rate-limited and transient failures until the deadline."""
+        deadline = time.monotonic() + self.deadline
+        for attempt in itertools.count():
+            await self._aadmit(priority, tokens, deadline)
+            try:
+                return await call()
+            except Exception as exc:
+                if not _retryable(exc):
+                    raise
+                delay = self._backoff(exc, attempt, deadline)
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    def call(self, call: Callable[[], T], priority: int = DEFAULT, tokens: int = 0) -> T:
+        """Blocking acall, for the sync client in worker threads."""
+        deadline = time.monotonic() + self.deadline
+        for attempt in itertools.count():
+            self._admit(priority, tokens, deadline)
+            try:
+                return call()
+            except Exception as exc:
+                if not _retryable(exc):
+                    raise
+                delay = self._backoff(exc, attempt, deadline)
+            finally:
+                self._release()
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            oldest = 0.0
+            for priority, _, waiter in self._queue:
+                if not waiter.cancelled:
+                    depth[PRIORITY_NAMES.get(priority, "default")] += 1
+                    oldest = max(oldest, now - waiter.enqueued)
+            return {
+                "rpm": self.requests.per_minute,
+                "tpm": self.tokens.per_minute,
+                "active": self.active,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": depth,
+                "oldest_wait_seconds": round(oldest, 3),
+                "paused_seconds": round(max(0.0, self._paused_until - now), 3),
+                "admitted": dict(self.admitted),
+                "wait_avg_seconds": {
+                    name: round(self.wait_total[name] / count, 3) if count else None
+                    for name, count in self.admitted.items()
+                },
+                "wait_max_seconds": {name: round(value, 3) for name, value in self.wait_max.items()},
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "deadline_exceeded": self.deadline_exceeded,
+            }
+
+
+llm_scheduler = LLMScheduler()
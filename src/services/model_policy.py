@@ -0,0 +1,105 @@
+"""Duration- and load-aware Whisper model selection for model_size="auto".
+
+Runtime is predicted from a per-model real-time factor (compute seconds per
+audio second on one core), corrected online with an EWMA of observed runs.
+The largest model whose predicted finish time (queue wait + transcription)
+fits the latency SLO wins.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from src.core.config import config
+
+
+# Rough CPU fp32 figures for openai-whisper; refined by observe().
+DEFAULT_RTF = {"tiny": 0.15, "base": 0.3, "small": 1.0, "medium": 3.0, "large": 6.0}
+PARALLEL_EXPONENT = 0.75  # chunked decoding scales sub-linearly with cores
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class ModelDecision:
+    model_size: str
+    threads: int
+    duration: float
+    queue_depth: int
+    cores: int
+    slo_seconds: float
+    expected_wait_seconds: float
+    predicted_seconds: float
+    refine_model: Optional[str]
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ModelPolicy:
+    def __init__(self, ladder: List[str], slo_seconds: float) -> None:
+        self.ladder = ladder
+        self.slo_seconds = slo_seconds
+        self._rtf = {name: DEFAULT_RTF.get(name.split(".")[0].split("-")[0], 1.0) for name in ladder}
+        self._job_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _speedup(cores: int) -> float:
+        return max(1, cores) ** PARALLEL_EXPONENT
+
+    def predict(self, model_size: str, duration: float, cores: int) -> float:
+        rtf = self._rtf.get(model_size, DEFAULT_RTF.get(model_size, 1.0))
+        return duration * rtf / self._speedup(cores)
+
+    def choose(self, duration: float, queue_depth: int, cores: int) -> ModelDecision:
+        cores = max(1, cores)
+        wait = queue_depth * (self._job_seconds or 0.0)
+        budget = self.slo_seconds - wait
+        chosen, reason = self.ladder[0], "no model meets the SLO; using the fastest"
+        if duration <= 0:
+            chosen, reason = ("base" if "base" in self.ladder else self.ladder[0]), "unknown duration"
+        else:
+            for name in reversed(self.ladder):
+                if self.predict(name, duration, cores) <= budget:
+                    chosen, reason = name, "largest model within the SLO"
+                    break
+        largest = self.ladder[-1]
+        return ModelDecision(
+            model_size=chosen,
+            threads=cores,
+            duration=round(duration, 3),
+            queue_depth=queue_depth,
+            cores=cores,
+            slo_seconds=self.slo_seconds,
+            expected_wait_seconds=round(wait, 2),
+            predicted_seconds=round(self.predict(chosen, duration, cores), 2),
+            refine_model=largest if chosen != largest else None,
+            reason=reason,
+        )
+
+    def observe(self, decision: ModelDecision, actual_seconds: float) -> Dict[str, Any]:
+        """Fold a finished run into the estimates; returns the record for raw_metadata."""
+        with self._lock:
+            if decision.duration > 0 and actual_seconds > 0:
+                measured = actual_seconds * self._speedup(decision.cores) / decision.duration
+                previous = self._rtf.get(decision.model_size, measured)
+                self._rtf[decision.model_size] = previous + EWMA_ALPHA * (measured - previous)
+            previous = self._job_seconds if self._job_seconds is not None else actual_seconds
+            self._job_seconds = previous + EWMA_ALPHA * (actual_seconds - previous)
+        return {**decision.to_dict(), "actual_seconds": round(actual_seconds, 2)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ladder": self.ladder,
+            "slo_seconds": self.slo_seconds,
+            "rtf": {name: round(value, 4) for name, value in self._rtf.items()},
+            "avg_job_seconds": round(self._job_seconds, 2) if self._job_seconds is not None else None,
+        }
+
+
+model_policy = ModelPolicy(
+    [name.strip() for name in config.WHISPER_AUTO_MODELS.split(",") if name.strip()],
+    config.TRANSCRIBE_SLO_SECONDS,
+)
@@ -0,0 +1,74 @@
+"""Background refinement of draft transcripts (progressive two-tier transcription)."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# (stage, message), as in single_flight; not imported from there because
+# single_flight -> sources -> bilibili -> refinement would be an import cycle.
+ProgressCallback = Callable[[str, str], None]
+
+
+class RefinementTracker:
+    """Owns the refinement task of each draft content and relays its events to subscribers.
+
+    Events sent before a subscriber arrives are replayed to it, so a job that
+    subscribes right after extraction returns sees the whole refinement.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._listeners: Dict[str, List[ProgressCallback]] = defaultdict(list)
+        self._history: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+
+    def start(self, content_id: str, work: Awaitable[Any]) -> asyncio.Task:
+        task = asyncio.ensure_future(work)
+        self._tasks[content_id] = task
+        task.add_done_callback(lambda _: self._finish(content_id, task))
+        return task
+
+    def _finish(self, content_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(content_id) is task:
+            del self._tasks[content_id]
+        self._listeners.pop(content_id, None)
+        self._history.pop(content_id, None)
+
+    def subscribe(self, content_id: str, callback: ProgressCallback) -> None:
+        if content_id not in self._tasks:
+            return
+        for stage, message in self._history.get(content_id, []):
+            callback(stage, message)
+        self._listeners[content_id].append(callback)
+
+    def notify(self, content_id: str, stage: str, message: str) -> None:
+        self._history[content_id].append((stage, message))
+        for listener in list(self._listeners.get(content_id, [])):
+            try:
+                listener(stage, message)
+            except Exception:
+                pass
+
+    def is_refining(self, content_id: str) -> bool:
+        return content_id in self._tasks
+
+    async def wait(self, content_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait for the refinement to end (either way); False on timeout."""
+        task = self._tasks.get(content_id)
+        if task is None:
+            return True
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        return bool(done)
+
+    async def cancel_all(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"refining": len(self._tasks)}
+
+
+refinements = RefinementTracker()
@@ -0,0 +1,171 @@
+"""In-process single-flight de-duplication of concurrent extractions."""
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from src.sources.base import canonical_source_key
+
+
+# (stage, message); safe to call from worker threads.
+ProgressCallback = Callable[[str, str], None]
+
+
+@dataclass
+class _Flight:
+    loop: asyncio.AbstractEventLoop
+    task: Optional[asyncio.Task] = None
+    listeners: List[ProgressCallback] = field(default_factory=list)
+    waiters: int = 0
+
+    def deliver(self, stage: str, message: str) -> None:
+        for listener in list(self.listeners):
+            try:
+                listener(stage, message)
+            except Exception:
+                pass
+
+    def broadcast(self, stage: str, message: str) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.deliver(stage, message)
+        else:
+            self.loop.call_soon_threadsafe(self.deliver, stage, message)
+
+
+@dataclass
+class _StreamFlight:
+    """A shared stream: every item produced so far, replayed to each subscriber."""
+
+    items: List[Any] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    task: Optional[asyncio.Task] = None
+    waiters: int = 0
+    updated: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def wake(self) -> None:
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+    async def produce(self, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for item in factory():
+                self.items.append(item)
+                self.wake()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.done = True
+            self.wake()
+
+
+def flight_key(kind: str, url: str, **options: Any) -> str:
+    """Canonical source ID plus the options that change the result."""
+    source_type, source_id = canonical_source_key(url)
+    relevant = {key: value for key, value in options.items() if not callable(value)}
+    return f"{kind}:{source_type}:{source_id}:{json.dumps(relevant, sort_keys=True, default=str)}"
+
+
+class SingleFlight:
+    """Concurrent callers with the same key share one execution, its result and its error."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[ProgressCallback], Awaitable[Any]],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(loop=asyncio.get_running_loop())
+            flight.task = asyncio.ensure_future(factory(flight.broadcast))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.joined += 1
+
+        if on_progress:
+            flight.listeners.append(on_progress)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # This caller went away; stop the shared work only if nobody else is waiting.
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+            if on_progress in flight.listeners:
+                flight.listeners.remove(on_progress)
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Like run, for async iterators: one producer per key, its items fanned out to every caller.
+
+        A caller that joins late first gets the items produced so far. The
+        producer is cancelled when the last caller stops iterating.
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            flight.task = asyncio.ensure_future(flight.produce(factory))
+            self._streams[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget_stream(key, flight))
+            self.started += 1
+        else:
+            self.joined += 1
+
+        flight.waiters += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.items):
+                    item = flight.items[index]
+                    index += 1
+                    yield item
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.updated.wait()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read it; a new caller starts a fresh stream.
+                flight.task.cancel()
+                self._forget_stream(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _forget_stream(self, key: str, flight: _StreamFlight) -> None:
+        if self._streams.get(key) is flight:
+            del self._streams[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights) + len(self._streams),
+            "waiters": sum(flight.waiters for flight in [*self._flights.values(), *self._streams.values()]),
+            "started": self.started,
+            "joined": self.joined,
+        }
+
+
+extraction_flights = SingleFlight()
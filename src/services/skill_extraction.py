@@ -0,0 +1,162 @@
+"""Map-reduce skill extraction for transcripts longer than one prompt.
+
+Map: the transcript is packed along segment (Section) boundaries into
+windows of at most LLM_EXTRACT_WINDOW_TOKENS, and each window is extracted
+concurrently (at most LLM_EXTRACT_CONCURRENCY calls at once). Reduce: the
+candidates are de-duplicated by name and merged by the LLM into the final
+1-3 skills; if the candidates themselves exceed a window they are merged in
+groups first. Token usage is reported per phase.
+
+Both phases run at temperature 0 and go through the LLM cache, so a retry
+after a deadline reuses the windows that already finished.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import openai
+
+from src.core.config import config
+from src.services.llm import LLMUsage, aextract_skills_from_transcript, amerge_skills
+from src.services.tokens import count_tokens, truncate_to_tokens
+
+
+# Split after sentence punctuation without consuming the whitespace, so windows join back losslessly.
+_SENTENCE_END = re.compile(r"(?<=[。！？!?.\n])")
+
+
+def _units(transcript: str, segments: Optional[Sequence[str]]) -> List[str]:
+    """Smallest pieces a window boundary may fall between."""
+    if segments:
+        return [segment for segment in segments if segment and segment.strip()]
+    return [part for part in _SENTENCE_END.split(transcript) if part.strip()]
+
+
+def split_windows(transcript: str, budget: int, segments: Optional[Sequence[str]] = None) -> List[str]:
+    """Greedily pack consecutive segments into windows of at most budget tokens."""
+    windows: List[str] = []
+    current: List[str] = []
+    used = 0
+    for unit in _units(transcript, segments):
+        tokens = count_tokens(unit)
+        while tokens > budget:
+            # A single segment larger than a window is cut by length.
+            head = truncate_to_tokens(unit, budget)
+            if current:
+                windows.append("".join(current))
+                current, used = [], 0
+            windows.append(head)
+            unit = unit[len(head):]
+            tokens = count_tokens(unit)
+        if used + tokens > budget and current:
+            windows.append("".join(current))
+            current, used = [], 0
+        if unit:
+            current.append(unit)
+            used += tokens
+    if current:
+        windows.append("".join(current))
+    return windows
+
+
+def _dedupe(skills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    seen = set()
+    unique = []
+    for skill in skills:
+        key = re.sub(r"\W+", " ", skill["name"].lower()).strip()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(skill)
+    return unique
+
+
+def _groups(candidates: List[Dict[str, Any]], budget: int) -> List[List[Dict[str, Any]]]:
+    groups: List[List[Dict[str, Any]]] = [[]]
+    used = 0
+    for candidate in candidates:
+        tokens = count_tokens(candidate["name"] + candidate["description"] + candidate["content"])
+        if groups[-1] and used + tokens > budget:
+            groups.append([])
+            used = 0
+        groups[-1].append(candidate)
+        used += tokens
+    return groups
+
+
+async def extract_skills(
+    title: str,
+    transcript: str,
+    segments: Optional[Sequence[str]] = None,
+    description: str = "",
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Extract skills from a transcript of any length; returns (skills, usage per phase)."""
+    budget = max(256, config.LLM_EXTRACT_WINDOW_TOKENS)
+    map_usage, reduce_usage = LLMUsage(), LLMUsage()
+    windows = split_windows(transcript, budget, segments)
+    report: Dict[str, Any] = {
+        "windows": len(windows),
+        "map": map_usage,
+        "reduce": reduce_usage,
+        "failed_windows": 0,
+        "merge_error": None,
+    }
+
+    if len(windows) <= 1:
+        skills = await aextract_skills_from_transcript(
+            {"title": title, "description": description, "transcript": transcript}, usage=map_usage
+        )
+        return skills, _finish(report)
+
+    semaphore = asyncio.Semaphore(max(1, config.LLM_EXTRACT_CONCURRENCY))
+
+    async def extract_window(index: int, window: str) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await aextract_skills_from_transcript(
+                {
+                    "title": title,
+                    "description": description,
+                    "part": f"{index + 1}/{len(windows)}",
+                    "transcript": window,
+                },
+                usage=map_usage,
+            )
+
+    results = await asyncio.gather(
+        *(extract_window(index, window) for index, window in enumerate(windows)), return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, BaseException)]
+    report["failed_windows"] = len(failures)
+    if len(failures) == len(results):
+        raise failures[0]
+    candidates = _dedupe([skill for result in results if not isinstance(result, BaseException) for skill in result])
+    if len(candidates) <= 1:
+        return candidates, _finish(report)
+
+    # Reduce; oversized candidate lists are merged group-wise until one call fits.
+    while True:
+        groups = _groups(candidates, budget)
+        if len(groups) == 1:
+            break
+        merged = await asyncio.gather(*(amerge_skills(title, group, usage=reduce_usage) for group in groups))
+        merged_candidates = _dedupe([skill for group in merged for skill in group])
+        if len(merged_candidates) >= len(candidates):
+            # Merging no longer shrinks the list: keep what fits one prompt.
+            candidates = groups[0]
+            break
+        candidates = merged_candidates
+    try:
+        skills = await amerge_skills(title, candidates, usage=reduce_usage)
+    except (ValueError, openai.OpenAIError) as exc:
+        # A malformed or failed merge still leaves usable candidates; deadlines propagate.
+        report["merge_error"] = f"{type(exc).__name__}: {exc}"
+        skills = []
+    return (skills or candidates[:3]), _finish(report)
+
+
+def _finish(report: Dict[str, Any]) -> Dict[str, Any]:
+    report["map"] = report["map"].to_dict()
+    report["reduce"] = report["reduce"].to_dict()
+    report["total_tokens"] = report["map"]["total_tokens"] + report["reduce"]["total_tokens"]
+    return report
@@ -0,0 +1,63 @@
+"""Per-stage concurrency limits for the extraction pipeline (metadata, download, decode, transcribe)."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from src.core.config import config
+
+
+class StageLimiter:
+    """Caps how many extractions may be inside each stage at once; 0 means unlimited."""
+
+    def __init__(self, limits: Dict[str, int]) -> None:
+        self.limits = limits
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._waiting: Dict[str, int] = defaultdict(int)
+        self._active: Dict[str, int] = defaultdict(int)
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore | None:
+        limit = self.limits.get(name, 0)
+        if limit <= 0:
+            return None
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(limit)
+        return self._semaphores[name]
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncIterator[None]:
+        semaphore = self._semaphore(name)
+        if semaphore is not None:
+            self._waiting[name] += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._waiting[name] -= 1
+        self._active[name] += 1
+        try:
+            yield
+        finally:
+            self._active[name] -= 1
+            if semaphore is not None:
+                semaphore.release()
+
+    def waiting(self, name: str) -> int:
+        return self._waiting[name]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"limit": self.limits.get(name, 0), "active": self._active[name], "waiting": self._waiting[name]}
+            for name in sorted(set(self.limits) | set(self._active))
+        }
+
+
+stage_limits = StageLimiter(
+    {
+        "metadata": config.STAGE_METADATA_CONCURRENCY,
+        "download": config.STAGE_DOWNLOAD_CONCURRENCY,
+        "decode": config.STAGE_DECODE_CONCURRENCY,
+        "transcribe": config.STAGE_TRANSCRIBE_CONCURRENCY,
+    }
+)
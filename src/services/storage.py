@@ -0,0 +1,195 @@
+"""Disk quota manager for downloaded media, temp files and cached transcripts.
+
+Each area owns the files matching its patterns under one directory and has a
+byte quota. Files in use are pinned with a reference count; making room
+evicts the least recently used unpinned files. On startup, leftovers of a
+previous process (partial downloads, intermediate WAVs, temp files) are
+swept as orphans since nothing can be using them yet.
+"""
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from contextlib import contextmanager
+
+from src.core.config import config
+from src.services.transcript_cache import transcript_cache
+
+
+@dataclass
+class StorageArea:
+    name: str
+    root: Path
+    quota_bytes: int
+    patterns: Tuple[str, ...]  # files this manager owns; anything else in root is left alone
+    orphan_patterns: Tuple[str, ...]  # owned files that are always garbage at startup
+
+
+class StorageManager:
+    def __init__(self, areas: List[StorageArea]) -> None:
+        self.areas = {area.name: area for area in areas}
+        self._pins: Counter[Path] = Counter()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.orphans_removed = 0
+
+    def _files(self, area: StorageArea) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of the area's owned files."""
+        if not area.root.exists():
+            return []
+        seen = set()
+        files = []
+        for pattern in area.patterns:
+            for path in area.root.glob(pattern):
+                if path in seen or not path.is_file():
+                    continue
+                seen.add(path)
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _area_of(self, path: Path) -> Optional[StorageArea]:
+        path = path.resolve()
+        for area in self.areas.values():
+            if path.parent == area.root.resolve():
+                return area
+        return None
+
+    def allocate(self, area_name: str, suffix: str, prefix: str = "", expected_bytes: int = 0) -> Path:
+        """A fresh pinned path in an area, after making room for expected_bytes. Release it when done."""
+        area = self.areas[area_name]
+        area.root.mkdir(parents=True, exist_ok=True)
+        self.ensure_space(area_name, expected_bytes)
+        path = area.root / f"{prefix}{uuid.uuid4().hex}{suffix}"
+        self.acquire(path)
+        return path
+
+    def acquire(self, path: Path) -> None:
+        """Pin a file so eviction skips it; calls nest."""
+        with self._lock:
+            self._pins[path.resolve()] += 1
+        if path.exists():
+            path.touch()  # counts as a use for LRU
+
+    def release(self, path: Optional[Path], delete: bool = False) -> None:
+        """Unpin a file; with delete, remove it once nobody else holds it (managed areas only)."""
+        if path is None:
+            return
+        key = path.resolve()
+        with self._lock:
+            if self._pins[key] > 1:
+                self._pins[key] -= 1
+                return
+            self._pins.pop(key, None)
+            if delete and self._area_of(path) is not None:
+                path.unlink(missing_ok=True)
+
+    @contextmanager
+    def pinned(self, path: Path) -> Iterator[Path]:
+        self.acquire(path)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def ensure_space(self, area_name: str, incoming_bytes: int = 0) -> int:
+        """Evict least recently used unpinned files until usage + incoming_bytes fits the quota."""
+        if area_name == "transcripts":
+            return transcript_cache.evict()
+        area = self.areas[area_name]
+        with self._lock:
+            files = sorted(self._files(area))
+            used = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, path in files:
+                if used + incoming_bytes <= area.quota_bytes:
+                    break
+                if self._pins.get(path.resolve()):
+                    continue
+                path.unlink(missing_ok=True)
+                used -= size
+                removed += 1
+                self.evicted_bytes += size
+            self.evictions += removed
+        if used + incoming_bytes > area.quota_bytes:
+            # Everything left is pinned: let the job proceed rather than fail it.
+            print(f"[storage] {area_name} over quota: {used / 2**20:.0f} MB in use by running jobs")
+        return removed
+
+    def collect(self) -> Dict[str, int]:
+        """Enforce every quota now."""
+        return {name: self.ensure_space(name) for name in list(self.areas) + ["transcripts"]}
+
+    def sweep_orphans(self) -> int:
+        """Delete owned files that only a dead process could have been using. Call before any job starts."""
+        removed = 0
+        with self._lock:
+            for area in self.areas.values():
+                if not area.root.exists():
+                    continue
+                for pattern in area.orphan_patterns:
+                    for path in area.root.glob(pattern):
+                        if path.is_file() and not self._pins.get(path.resolve()):
+                            path.unlink(missing_ok=True)
+                            removed += 1
+            self.orphans_removed += removed
+        removed += transcript_cache.sweep()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        areas = {}
+        with self._lock:
+            pinned = set(self._pins)
+        for area in self.areas.values():
+            files = self._files(area)
+            areas[area.name] = {
+                "root": str(area.root),
+                "quota_bytes": area.quota_bytes,
+                "used_bytes": sum(size for _, size, _ in files),
+                "files": len(files),
+                "pinned": sum(1 for _, _, path in files if path.resolve() in pinned),
+            }
+        cache = transcript_cache.stats()
+        areas["transcripts"] = {
+            "root": str(transcript_cache.root),
+            "quota_bytes": cache["max_bytes"],
+            "used_bytes": cache["bytes"],
+            "files": cache["entries"],
+            "pinned": 0,
+        }
+        return {
+            "areas": areas,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "orphans_removed": self.orphans_removed,
+        }
+
+
+storage = StorageManager(
+    [
+        StorageArea(
+            name="downloads",
+            root=config.DOWNLOADS_DIR,
+            quota_bytes=config.STORAGE_DOWNLOADS_MAX_MB * 2**20,
+            patterns=("yt-*",),
+            orphan_patterns=("yt-*.wav", "yt-*.mp3", "yt-*.part", "yt-*.tmp"),
+        ),
+        StorageArea(
+            name="temp",
+            root=config.TEMP_DIR,
+            quota_bytes=config.STORAGE_TEMP_MAX_MB * 2**20,
+            patterns=("*.mp4", "*.wav", "*.m4a", "*.part", "*.ytdl", "*.tmp"),
+            # Kept videos (keep_video=True) are not orphans; they only age out under the quota.
+            orphan_patterns=("*.wav", "*.m4a", "*.part", "*.ytdl", "*.tmp"),
+        ),
+    ]
+)
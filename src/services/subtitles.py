@@ -0,0 +1,200 @@
+"""Platform subtitle fast path: use existing CC / auto captions instead of Whisper."""
+from __future__ import annotations
+
+import html
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.core.config import config
+
+
+# Preferred formats first; all of them carry per-cue timestamps.
+SUBTITLE_EXTS = ["json3", "json", "srt", "vtt"]
+IGNORED_TRACKS = {"danmaku", "live_chat", "rechat"}
+
+_TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_TAG = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class SubtitleResult:
+    language: str
+    automatic: bool
+    segments: List[Dict[str, Any]]
+    score: float
+
+    @property
+    def text(self) -> str:
+        return "\n".join(seg["text"] for seg in self.segments)
+
+
+def cache_key(language: Optional[str]) -> str:
+    """Transcript-cache model key for subtitles, kept apart from every Whisper model's key."""
+    return f"subtitle:{language or 'auto'}"
+
+
+def is_subtitle(transcription_model: Optional[str]) -> bool:
+    return bool(transcription_model) and transcription_model.startswith("subtitle:")
+
+
+def _seconds(match: re.Match) -> float:
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000
+
+
+def _cue_blocks(text: str) -> List[Tuple[float, float, str]]:
+    """Shared SRT/VTT parser: a timing line followed by text lines, blocks separated by blank lines."""
+    cues = []
+    for block in re.split(r"\r?\n\s*\r?\n", text.strip()):
+        lines = block.splitlines()
+        for i, line in enumerate(lines):
+            if "-->" not in line:
+                continue
+            left, right = line.split("-->", 1)
+            start, end = _TIMESTAMP.search(left), _TIMESTAMP.search(right)
+            if not start or not end:
+                break
+            body = " ".join(_TAG.sub("", item).strip() for item in lines[i + 1:])
+            body = html.unescape(body).strip()
+            if body:
+                cues.append((_seconds(start), _seconds(end), body))
+            break
+    return cues
+
+
+def _dedupe(cues: List[Tuple[float, float, str]]) -> List[Dict[str, Any]]:
+    """Merge consecutive identical cues (rolling auto-captions repeat each line)."""
+    segments: List[Dict[str, Any]] = []
+    for start, end, text in cues:
+        if segments and segments[-1]["text"] == text:
+            segments[-1]["end"] = max(segments[-1]["end"], end)
+            continue
+        segments.append({"start": start, "end": end, "text": text})
+    return segments
+
+
+def parse_srt(text: str) -> List[Dict[str, Any]]:
+    return _dedupe(_cue_blocks(text))
+
+
+def parse_vtt(text: str) -> List[Dict[str, Any]]:
+    return _dedupe(_cue_blocks(re.sub(r"^WEBVTT[^\n]*\n", "", text.lstrip("﻿"))))
+
+
+def parse_json3(text: str) -> List[Dict[str, Any]]:
+    """YouTube json3: {events: [{tStartMs, dDurationMs, segs: [{utf8}]}]}."""
+    cues = []
+    for event in json.loads(text).get("events") or []:
+        body = "".join(seg.get("utf8", "") for seg in event.get("segs") or []).strip()
+        if not body:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        cues.append((start, start + event.get("dDurationMs", 0) / 1000, body))
+    return _dedupe(cues)
+
+
+def parse_bilibili_json(text: str) -> List[Dict[str, Any]]:
+    """Bilibili subtitle JSON: {body: [{from, to, content}]}."""
+    body = json.loads(text).get("body") or []
+    return _dedupe([(item["from"], item["to"], item["content"].strip()) for item in body if item.get("content")])
+
+
+def parse_subtitles(text: str, ext: str) -> List[Dict[str, Any]]:
+    if ext == "json3":
+        return parse_json3(text)
+    if ext == "json":
+        return parse_bilibili_json(text)
+    if ext == "vtt":
+        return parse_vtt(text)
+    return parse_srt(text)
+
+
+def quality_score(segments: List[Dict[str, Any]], duration: Optional[float]) -> float:
+    """0..1: share of the runtime covered by cues, penalized by repeated lines."""
+    if not segments:
+        return 0.0
+    covered = sum(max(0.0, seg["end"] - seg["start"]) for seg in segments)
+    coverage = min(1.0, covered / duration) if duration else 1.0
+    texts = [seg["text"] for seg in segments]
+    unique_ratio = len(set(texts)) / len(texts)
+    return round(coverage * unique_ratio, 3)
+
+
+def _base_language(track_lang: str) -> str:
+    return track_lang.lower().removeprefix("ai-").removesuffix("-orig")
+
+
+def _language_matches(track_lang: str, language: Optional[str]) -> bool:
+    if not language:
+        return True
+    track = _base_language(track_lang)
+    wanted = language.lower()
+    return track == wanted or track.split("-")[0] == wanted.split("-")[0]
+
+
+def _is_original(track_lang: str) -> bool:
+    """Auto captions recognized from the audio itself: YouTube's -orig track, Bilibili's ai- tracks."""
+    return track_lang.endswith("-orig") or track_lang.startswith("ai-")
+
+
+def pick_tracks(info: Dict[str, Any], language: Optional[str]) -> List[Tuple[str, bool, Dict[str, Any]]]:
+    """Candidate (language, automatic, format) tracks in preference order.
+
+    Manual tracks come before automatic ones; within each, the original
+    (-orig / ai-) and exact-language tracks come first. Without a requested
+    language the video's own language is used, and automatic tracks other
+    than the original-language one are skipped: YouTube lists a
+    machine-translated auto track for every language it supports.
+    """
+    requested = language
+    language = language or info.get("language")
+    automatic_captions = info.get("automatic_captions") or {}
+    has_original = any(_is_original(lang) for lang in automatic_captions)
+    ranked = []
+    for automatic, tracks in ((False, info.get("subtitles") or {}), (True, automatic_captions)):
+        for lang, formats in tracks.items():
+            if lang in IGNORED_TRACKS or not _language_matches(lang, language):
+                continue
+            if automatic and not requested:
+                # Only the track in the spoken language; unknown language and no -orig means all are suspect.
+                if has_original and not _is_original(lang):
+                    continue
+                if not has_original and not language:
+                    continue
+            by_ext = {fmt.get("ext"): fmt for fmt in formats or [] if fmt.get("url") or fmt.get("data")}
+            fmt = next((by_ext[ext] for ext in SUBTITLE_EXTS if ext in by_ext), None)
+            if fmt:
+                exact = bool(language) and _base_language(lang) == language.lower()
+                ranked.append(((automatic, not _is_original(lang), not exact), lang, automatic, fmt))
+    ranked.sort(key=lambda item: item[0])
+    return [(lang, automatic, fmt) for _, lang, automatic, fmt in ranked]
+
+
+def fetch_subtitles(info: Dict[str, Any], language: Optional[str]) -> Optional[SubtitleResult]:
+    """Download candidate tracks in preference order; the first that clears the quality bar wins.
+
+    At most SUBTITLE_MAX_TRACKS tracks are tried, so a video with many
+    unusable tracks falls back to Whisper quickly.
+    """
+    headers = info.get("http_headers") or {}
+    candidates = pick_tracks(info, language)[:max(1, config.SUBTITLE_MAX_TRACKS)]
+    with httpx.Client(timeout=20, headers=headers, follow_redirects=True) as client:
+        for lang, automatic, fmt in candidates:
+            try:
+                # Some extractors (Bilibili) inline the converted track as `data`.
+                body = fmt.get("data")
+                if body is None:
+                    response = client.get(fmt["url"])
+                    response.raise_for_status()
+                    body = response.text
+                segments = parse_subtitles(body, fmt.get("ext", "srt"))
+            except (httpx.HTTPError, ValueError, KeyError):
+                continue
+            score = quality_score(segments, info.get("duration"))
+            if score >= config.SUBTITLE_MIN_QUALITY:
+                return SubtitleResult(lang, automatic, segments, score)
+    return None
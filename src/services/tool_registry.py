@@ -1,18 +1,32 @@
 """Unified tool registry for agent orchestration."""
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional
 import asyncio
 
 from src.services.skills_sh import search_skills_sh
 from src.services.github_search import search_github_repos
-from src.services.video_pipeline import extract_from_video
-from src.services.llm import generate_skill_from_prompt, generate_test_cases
+from src.core.config import config
+from src.services.video_pipeline import extract_from_video_shared, stream_video_sections, transcript_model, _fallback_skills
+from src.services.llm import agenerate_skill_from_prompt, agenerate_test_cases, astream_skill_from_prompt
+from src.services.skill_extraction import extract_skills
+from src.services.llm_scheduler import LLMDeadlineError
+from src.sources.base import SourceRegistry
 from src.services.bocha_search import bocha_search
+from src.services.single_flight import extraction_flights, flight_key
 
 
 class ToolRegistry:
-    """Thin wrappers over existing services to standardize calls."""
+    """Thin wrappers over existing services to standardize calls.
+
+    transcript picks the video transcript quality skills are generated from:
+    "refined" (default, WHISPER_MODEL) or "draft" (WHISPER_DRAFT_MODEL, faster).
+    """
+
+    def __init__(self, transcript: str = "refined") -> None:
+        transcript_model(transcript)  # validates the mode
+        self.transcript = transcript
 
     async def skills_sh_search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         results = await search_skills_sh(query, limit=limit, offset=0)
@@ -47,18 +61,75 @@ class ToolRegistry:
         return payload
 
     async def video_extract(self, video_url: Optional[str] = None, local_path: Optional[str] = None) -> Dict[str, Any]:
-        result = await asyncio.to_thread(extract_from_video, video_url=video_url, local_path=local_path)
+        result = await extract_from_video_shared(
+            video_url=video_url,
+            local_path=Path(local_path) if local_path else None,
+            transcript=self.transcript,
+        )
         return {
             "title": result.title,
             "transcript": result.transcript,
             "extracted_skills": result.extracted_skills,
         }
 
-    async def generate_skill(self, prompt: str) -> Dict[str, Any]:
-        return await asyncio.to_thread(generate_skill_from_prompt, prompt)
+    async def video_extract_stream(self, video_url: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield growing partial transcripts, then a final update with extracted skills.
+
+        Concurrent streams of the same video share one download, transcription
+        and extraction; a late joiner first catches up on the sections so far.
+        """
+        parts: List[str] = []
+        key = flight_key("video_stream", video_url, transcript=self.transcript)
+        shared = extraction_flights.stream(key, lambda: self._video_updates(video_url))
+        async for update in shared:
+            if update["final"]:
+                yield {**update, "transcript": "".join(parts)}
+                continue
+            # Updates are shared between callers: read them, never modify them.
+            section = update["section"]
+            parts.append(section.content)
+            yield {
+                "title": update["title"],
+                "transcript": "".join(parts),
+                "section": {"start_time": section.start_time, "end_time": section.end_time},
+                "final": False,
+            }
+
+    async def _video_updates(self, video_url: str) -> AsyncIterator[Dict[str, Any]]:
+        """The shared part of video_extract_stream: each section, then the extracted skills."""
+        processor = SourceRegistry.get_processor(video_url)
+        title = video_url
+        if processor:
+            metadata = await processor.extract_metadata(video_url)
+            title = metadata.get("title") or video_url
+            model_size = config.WHISPER_DRAFT_MODEL if self.transcript == "draft" else config.WHISPER_MODEL
+            sections = processor.stream_sections(video_url, model_size=model_size)
+        else:
+            sections = stream_video_sections(video_url=video_url, transcript=self.transcript)
+
+        parts: List[str] = []
+        async for section in sections:
+            parts.append(section.content)
+            yield {"title": title, "section": section, "final": False}
+
+        transcript = "".join(parts)
+        try:
+            skills, _ = await extract_skills(title, transcript, parts)
+        except LLMDeadlineError:
+            raise
+        except Exception:
+            skills = _fallback_skills(transcript)
+        yield {"title": title, "extracted_skills": skills, "final": True}
+
+    async def generate_skill(
+        self, prompt: str, on_delta: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        if on_delta is not None:
+            return await astream_skill_from_prompt(prompt, on_delta)
+        return await agenerate_skill_from_prompt(prompt)
 
     async def generate_test_cases(self, task: str, skill: Dict[str, Any]) -> List[Dict[str, Any]]:
-        tests = await asyncio.to_thread(generate_test_cases, task, skill)
+        tests = await agenerate_test_cases(task, skill)
         if tests:
             return tests
         return [
@@ -0,0 +1,204 @@
+"""Persistent, content-addressed transcript cache under config.CONTENT_DIR.
+
+Entries are keyed by (source_type, source_id, model size, language) and can
+also be found by the hash of the decoded audio, so the same media reached
+through a different URL is not transcribed twice. Segments are stored as
+parallel columns in gzip'd JSON; eviction is LRU by file mtime.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.config import config
+
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class CachedTranscript:
+    text: str
+    segments: List[Dict[str, Any]]
+    language: Optional[str]
+    transcription_model: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def hash_file(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest(*parts: Optional[str]) -> str:
+    return hashlib.sha256("\x1f".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:32]
+
+
+class TranscriptCache:
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None) -> None:
+        self.root = root or config.CONTENT_DIR / "transcripts"
+        self.max_bytes = max_bytes if max_bytes is not None else config.TRANSCRIPT_CACHE_MAX_MB * 2**20
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / f"{key}.json.gz"
+
+    def _alias_path(self, audio_hash: str, model_size: str, language: Optional[str]) -> Path:
+        return self.root / "by-audio" / f"{_digest(audio_hash, model_size, language)}.key"
+
+    @staticmethod
+    def source_key(source_type: str, source_id: str, model_size: str, language: Optional[str]) -> str:
+        return _digest(source_type, source_id, model_size, language)
+
+    def _load(self, path: Path) -> Optional[CachedTranscript]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("v") != FORMAT_VERSION:
+            return None
+        try:
+            os.utime(path)  # LRU touch
+        except OSError:
+            pass
+        return CachedTranscript(
+            text=data["text"],
+            segments=[
+                {"start": start, "end": end, "text": text}
+                for start, end, text in zip(data["starts"], data["ends"], data["texts"])
+            ],
+            language=data.get("language"),
+            transcription_model=data["transcription_model"],
+            metadata=data.get("metadata") or {},
+        )
+
+    def _record(self, found: Optional[CachedTranscript]) -> Optional[CachedTranscript]:
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def get(
+        self,
+        source_type: str,
+        source_id: str,
+        model_size: str,
+        language: Optional[str],
+    ) -> Optional[CachedTranscript]:
+        path = self._entry_path(self.source_key(source_type, source_id, model_size, language))
+        return self._record(self._load(path) if path.exists() else None)
+
+    def get_by_audio(self, audio_hash: str, model_size: str, language: Optional[str]) -> Optional[CachedTranscript]:
+        alias = self._alias_path(audio_hash, model_size, language)
+        found = None
+        try:
+            target = self._entry_path(alias.read_text(encoding="ascii").strip())
+        except OSError:
+            target = None
+        if target is not None:
+            found = self._load(target) if target.exists() else None
+            if found is None:
+                alias.unlink(missing_ok=True)
+        return self._record(found)
+
+    def put(
+        self,
+        source_type: str,
+        source_id: str,
+        model_size: str,
+        language: Optional[str],
+        transcript: Dict[str, Any],
+        transcription_model: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        audio_hash: Optional[str] = None,
+    ) -> None:
+        key = self.source_key(source_type, source_id, model_size, language)
+        segments = transcript.get("segments") or []
+        data = {
+            "v": FORMAT_VERSION,
+            "source_type": source_type,
+            "source_id": source_id,
+            "language": transcript.get("language", language),
+            "transcription_model": transcription_model,
+            "metadata": metadata or {},
+            "text": transcript.get("text", ""),
+            "starts": [round(seg["start"], 3) for seg in segments],
+            "ends": [round(seg["end"], 3) for seg in segments],
+            "texts": [seg["text"] for seg in segments],
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        if audio_hash:
+            alias = self._alias_path(audio_hash, model_size, language)
+            alias.parent.mkdir(parents=True, exist_ok=True)
+            alias.write_text(key, encoding="ascii")
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.root.glob("*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def sweep(self) -> int:
+        """Remove writes a crash left half-done and audio aliases whose entry was evicted."""
+        if not self.root.exists():
+            return 0
+        removed = 0
+        for path in self.root.glob("*.tmp"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        for alias in self.root.glob("by-audio/*.key"):
+            try:
+                target = self._entry_path(alias.read_text(encoding="ascii").strip())
+            except OSError:
+                continue
+            if not target.exists():
+                alias.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        files = list(self.root.glob("*.json.gz")) if self.root.exists() else []
+        return {
+            "entries": len(files),
+            "bytes": sum(path.stat().st_size for path in files if path.exists()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+transcript_cache = TranscriptCache()
@@ -0,0 +1,77 @@
+"""Streaming transcript exporters (SRT, WebVTT, JSON lines) shared by all source types.
+
+Each exporter is a generator over a CompactTranscript that yields the body
+in chunks of EXPORT_BATCH cues, so a long transcript is never assembled in
+memory as one string. Sections without timestamps are skipped by the
+subtitle formats but keep their cue number in SRT.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from src.models.transcript import CompactTranscript
+
+EXPORT_BATCH = 200
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    total_ms = int(round(seconds * 1000))
+    hours, rest = divmod(total_ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def _batches(sections: Iterable[Any]) -> Iterator[list]:
+    transcript = CompactTranscript.of(sections)
+    for start in range(0, len(transcript), EXPORT_BATCH):
+        yield transcript[start:start + EXPORT_BATCH].to_dicts()
+
+
+def iter_srt(sections: Iterable[Any]) -> Iterator[str]:
+    number = 0
+    for batch in _batches(sections):
+        cues = []
+        for section in batch:
+            number += 1
+            if section["start_time"] is None or section["end_time"] is None:
+                continue
+            cues.append(
+                f"{number}\n"
+                f"{_timestamp(section['start_time'], ',')} --> {_timestamp(section['end_time'], ',')}\n"
+                f"{section['content'].strip()}\n\n"
+            )
+        if cues:
+            yield "".join(cues)
+
+
+def _vtt_text(text: str) -> str:
+    # Cue payloads may not contain "-->", and & and < start entities/tags.
+    return text.strip().replace("&", "&amp;").replace("<", "&lt;").replace("-->", "--&gt;")
+
+
+def iter_vtt(sections: Iterable[Any]) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for batch in _batches(sections):
+        cues = [
+            f"{_timestamp(section['start_time'], '.')} --> {_timestamp(section['end_time'], '.')}\n"
+            f"{_vtt_text(section['content'])}\n\n"
+            for section in batch
+            if section["start_time"] is not None and section["end_time"] is not None
+        ]
+        if cues:
+            yield "".join(cues)
+
+
+def iter_jsonl(sections: Iterable[Any]) -> Iterator[str]:
+    for batch in _batches(sections):
+        yield "".join(json.dumps(section, ensure_ascii=False) + "\n" for section in batch)
+
+
+# format -> (exporter, media type)
+EXPORTERS: Dict[str, tuple[Callable[[Iterable[Any]], Iterator[str]], str]] = {
+    "srt": (iter_srt, "application/x-subrip; charset=utf-8"),
+    "vtt": (iter_vtt, "text/vtt; charset=utf-8"),
+    "jsonl": (iter_jsonl, "application/x-ndjson"),
+}
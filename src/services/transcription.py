@@ -0,0 +1,611 @@
+"""Chunked parallel transcription engine.
+
+A VAD pre-pass drops long silence and music beds; the remaining speech (or,
+without VAD, the whole file cut at silence boundaries) is split into chunks,
+the chunks are transcribed on a process pool sized to the CPU budget, and
+the segments are stitched back onto the original timeline.
+
+Pool workers are long-lived and each holds its own Whisper model pool
+(preloaded with WHISPER_PRELOAD at worker start), so every worker costs a
+model's worth of memory: the worker count is capped by available memory as
+well as by cores, a model is only fanned out to as many workers as memory
+allows, and each worker's pool stats come back with its chunk results
+(worker_stats, shown at /transcription/stats).
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import re
+import subprocess
+import threading
+import wave
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.core.config import config
+from src.services import vad
+from src.services.transcription_backends import BackendRegistry
+from src.services.whisper_pool import WORKER_OVERHEAD_MB, available_memory_mb, estimate_model_mb, whisper_pool
+
+
+SAMPLE_RATE = 16000
+WHISPER_WINDOW = 30.0  # Whisper decodes 30 s windows; shorter chunks cost the same
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+@dataclass
+class Chunk:
+    """A slice of the source audio; segments are kept only inside [owned_start, owned_end)."""
+    index: int
+    start: float
+    end: float
+    owned_start: float
+    owned_end: float
+
+
+def cpu_budget() -> int:
+    if config.TRANSCRIBE_WORKERS > 0:
+        return config.TRANSCRIBE_WORKERS
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _read_pcm_wav(audio_path: Path):
+    """Open a 16 kHz mono s16 WAV (what audio_ingest writes); None for anything else."""
+    if audio_path.suffix.lower() != ".wav":
+        return None
+    try:
+        wav = wave.open(str(audio_path), "rb")
+    except (wave.Error, EOFError):
+        return None
+    if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+        wav.close()
+        return None
+    return wav
+
+
+def probe_duration(audio_path: Path) -> float:
+    wav = _read_pcm_wav(audio_path)
+    if wav is not None:
+        with wav:
+            return wav.getnframes() / SAMPLE_RATE
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", str(audio_path),
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip() or 0)
+
+
+def detect_silences(
+    audio_path: Path,
+    noise_db: int = -35,
+    min_silence: float = 0.5,
+) -> List[Tuple[float, float]]:
+    """Return (start, end) silence intervals using ffmpeg's silencedetect filter."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostats", "-i", str(audio_path),
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+            "-f", "null", "-",
+        ],
+        capture_output=True, text=True,
+    )
+    silences: List[Tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in result.stderr.splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target_seconds: Optional[float] = None,
+    overlap: Optional[float] = None,
+) -> List[Chunk]:
+    """Cut near every target_seconds at the midpoint of the closest silence."""
+    target = target_seconds or config.TRANSCRIBE_CHUNK_SECONDS
+    overlap = config.TRANSCRIBE_CHUNK_OVERLAP if overlap is None else overlap
+    midpoints = [(start + end) / 2 for start, end in silences]
+
+    cuts: List[float] = []
+    position = 0.0
+    while duration - position > target * 1.5:
+        ideal = position + target
+        window = [m for m in midpoints if position + target * 0.5 <= m <= position + target * 1.5]
+        cut = min(window, key=lambda m: abs(m - ideal)) if window else ideal
+        cuts.append(cut)
+        position = cut
+
+    bounds = [0.0] + cuts + [duration]
+    return [
+        Chunk(
+            index=i,
+            start=max(0.0, bounds[i] - overlap),
+            end=min(duration, bounds[i + 1] + overlap),
+            owned_start=bounds[i],
+            owned_end=bounds[i + 1],
+        )
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _pcm_blocks(audio_path: Path, block_seconds: float = 10.0) -> Iterator[bytes]:
+    """Stream the file as 16 kHz mono s16le blocks without holding it all in memory."""
+    block_frames = int(block_seconds * SAMPLE_RATE)
+    wav = _read_pcm_wav(audio_path)
+    if wav is not None:
+        with wav:
+            while True:
+                frames = wav.readframes(block_frames)
+                if not frames:
+                    return
+                yield frames
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", str(audio_path), "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        while True:
+            frames = process.stdout.read(block_frames * 2)
+            if not frames:
+                break
+            yield frames
+    finally:
+        process.kill()
+        process.wait()
+
+
+def load_audio(audio_path: Path, start: float = 0.0, end: Optional[float] = None):
+    """Decode [start, end) of a file to 16 kHz mono float32, as Whisper expects."""
+    import numpy as np
+
+    wav = _read_pcm_wav(audio_path)
+    if wav is not None:
+        # Already decoded by audio_ingest: read the samples without another ffmpeg pass.
+        with wav:
+            first = min(int(start * SAMPLE_RATE), wav.getnframes())
+            wav.setpos(first)
+            count = wav.getnframes() - first if end is None else max(0, int(end * SAMPLE_RATE) - first)
+            frames = wav.readframes(count)
+        return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-ss", f"{start:.3f}"]
+    if end is not None and end > start:
+        cmd += ["-t", f"{max(0.0, end - start):.3f}"]
+    cmd += ["-i", str(audio_path), "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def transcribe_chunk(
+    audio_path: str,
+    chunk: Chunk,
+    model_size: str,
+    language: Optional[str],
+    threads: int,
+) -> Dict[str, Any]:
+    """Transcribe one chunk; in a pool worker this uses the worker's own model pool."""
+    audio = load_audio(Path(audio_path), chunk.start, chunk.end)
+    backend = BackendRegistry.get()
+    with whisper_pool.acquire(model_size, threads=threads, backend=backend.name) as model:
+        result = backend.transcribe(model, audio, language)
+    return {
+        "index": chunk.index,
+        "worker": {"pid": os.getpid(), "pool": whisper_pool.stats()},
+        "language": result.get("language", language),
+        "segments": [
+            {
+                "start": seg["start"] + chunk.start,
+                "end": seg["end"] + chunk.start,
+                "text": seg["text"],
+            }
+            for seg in result["segments"]
+        ],
+    }
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", text).lower()
+
+
+class SegmentStitcher:
+    """Incrementally stitches chunk results, which must be added in chunk order."""
+
+    def __init__(self, total_chunks: int) -> None:
+        self.total_chunks = total_chunks
+        self.segments: List[Dict[str, Any]] = []
+
+    def add(self, chunk: Chunk, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Keep each segment in the chunk that owns its midpoint, then drop repeated boundary text."""
+        added: List[Dict[str, Any]] = []
+        is_last = chunk.index == self.total_chunks - 1
+        for seg in result["segments"]:
+            middle = (seg["start"] + seg["end"]) / 2
+            if middle < chunk.owned_start or (middle >= chunk.owned_end and not is_last):
+                continue
+            text = _normalize(seg["text"])
+            if self.segments and text:
+                previous = self.segments[-1]
+                normalized = _normalize(previous["text"])
+                if text == normalized or (seg["start"] < previous["end"] and text in normalized):
+                    continue
+            stitched = {
+                "start": max(seg["start"], self.segments[-1]["end"] if self.segments else 0.0),
+                "end": seg["end"],
+                "text": seg["text"],
+            }
+            self.segments.append(stitched)
+            added.append(stitched)
+        return added
+
+
+def stitch_segments(chunks: List[Chunk], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_index = {result["index"]: result for result in results}
+    stitcher = SegmentStitcher(len(chunks))
+    for chunk in chunks:
+        if chunk.index in by_index:
+            stitcher.add(chunk, by_index[chunk.index])
+    return stitcher.segments
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_worker_threads = 1
+_executor_lock = threading.Lock()
+_worker_pools: Dict[int, Dict[str, Any]] = {}  # worker pid -> its latest whisper_pool.stats()
+
+
+def _preload_models() -> List[str]:
+    return [name.strip() for name in config.WHISPER_PRELOAD.split(",") if name.strip()]
+
+
+def _planned_workers() -> int:
+    """Cores, but no more workers than can each hold the configured model in memory."""
+    budget = cpu_budget()
+    available = available_memory_mb()
+    if available is None:
+        return budget
+    per_worker = max(estimate_model_mb(name) for name in [config.WHISPER_MODEL] + _preload_models()) + WORKER_OVERHEAD_MB
+    return max(1, min(budget, (available - config.WHISPER_MIN_FREE_MB) // per_worker))
+
+
+def _init_worker(threads: int, preload: List[str]) -> None:
+    """Runs once in every pool worker: load the preloaded models with the worker's thread count."""
+    if preload:
+        try:
+            whisper_pool.preload(preload, threads=threads)
+        except Exception as exc:
+            print(f"[transcription] Worker {os.getpid()} preload failed: {exc}")
+
+
+def _get_executor() -> Tuple[ProcessPoolExecutor, int]:
+    """The shared worker pool and the thread count of each worker.
+
+    Workers use a fixed thread count so the model each one preloads is the
+    one every chunk borrows (the pool keys models by thread count).
+    """
+    global _executor, _executor_workers, _worker_threads
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = _planned_workers()
+            _worker_threads = max(1, cpu_budget() // _executor_workers)
+            # spawn: forking a process that already holds torch threads can deadlock.
+            _executor = ProcessPoolExecutor(
+                max_workers=_executor_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_worker_threads, _preload_models()),
+            )
+        return _executor, _worker_threads
+
+
+def shutdown_executor() -> None:
+    executor = _detach_executor()
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _parallelism(model_size: str, chunks: int, cores: Optional[int]) -> int:
+    """Chunks in flight at once: bounded by chunks, the cores given to the job and memory.
+
+    Workers that already hold the model cost nothing more; every other one
+    needs room for another copy.
+    """
+    workers, threads = _executor_workers, _worker_threads
+    limit = min(workers, chunks, max(1, min(cores or cpu_budget(), cpu_budget()) // threads))
+    available = available_memory_mb()
+    if available is None:
+        return limit
+    with _executor_lock:
+        holding = sum(
+            1 for stats in _worker_pools.values()
+            if any(model["model_size"] == model_size for model in stats.get("models", []))
+        )
+    spare = max(0, (available - config.WHISPER_MIN_FREE_MB) // estimate_model_mb(model_size))
+    return max(1, min(limit, holding + spare))
+
+
+def _collect(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Record the pool stats a worker sent along with its chunk."""
+    worker = result.pop("worker", None)
+    if worker and worker["pid"] != os.getpid():
+        with _executor_lock:
+            _worker_pools[worker["pid"]] = worker["pool"]
+    return result
+
+
+def worker_stats() -> Dict[str, Any]:
+    """Transcription workers and the models each one holds, as last reported."""
+    with _executor_lock:
+        pools = [
+            {
+                "pid": pid,
+                "models": [f"{model['backend']}:{model['model_size']}" for model in stats.get("models", [])],
+                "loads": stats.get("loads", 0),
+                "evictions": stats.get("evictions", 0),
+                "memory_mb": stats.get("memory_mb", 0),
+            }
+            for pid, stats in _worker_pools.items()
+        ]
+        workers, threads = (_executor_workers, _worker_threads) if _executor is not None else (0, 0)
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "processes": pools,
+        "memory_mb": round(sum(pool["memory_mb"] for pool in pools), 1),
+    }
+
+
+_in_flight: Set[Future] = set()  # submitted chunks of every job, until done
+_in_flight_lock = threading.Lock()
+
+
+def _submit(audio_path: Path, chunk: Chunk, model_size: str, language: Optional[str]) -> Future:
+    with _in_flight_lock:
+        # Under the lock so a terminating pool is never handed new work (see _stop_chunks).
+        executor, threads = _get_executor()
+        future = executor.submit(transcribe_chunk, str(audio_path), chunk, model_size, language, threads)
+        _in_flight.add(future)
+    future.add_done_callback(_discard)
+    return future
+
+
+def _discard(future: Future) -> None:
+    with _in_flight_lock:
+        _in_flight.discard(future)
+
+
+def _detach_executor() -> Optional[ProcessPoolExecutor]:
+    """Take the pool out of service; the next job starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+        _worker_pools.clear()
+    return executor
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    """Kill the pool's workers, mid-chunk if need be."""
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _stop_chunks(futures: List[Future]) -> None:
+    """Stop a job's chunks: drop the queued ones and end the running ones.
+
+    A running chunk cannot be interrupted inside its worker, so the workers
+    are terminated when no other job has chunks in flight; otherwise (killing
+    a worker breaks the whole pool) the running chunks are awaited. Either way
+    the work has stopped when this returns, so the caller's transcribe stage
+    slot is not released while the CPU is still busy with it.
+    """
+    running = [future for future in futures if not future.cancel() and not future.done()]
+    if not running:
+        return
+    with _in_flight_lock:
+        # Decided under the submit lock: no other job can slip a chunk into a pool being killed.
+        shared = any(not future.done() for future in _in_flight.difference(futures))
+        executor = None if shared else _detach_executor()
+    if executor is not None:
+        _terminate(executor)
+    else:
+        await asyncio.wait([asyncio.wrap_future(future) for future in running])
+
+
+async def _chunk_results(
+    audio_path: Path,
+    chunks: List[Chunk],
+    model_size: str,
+    language: Optional[str],
+    threads: Optional[int],
+) -> AsyncIterator[Tuple[Chunk, Dict[str, Any]]]:
+    """Transcribe chunks on the worker pool, yielding (chunk, result) in timeline order.
+
+    A sliding window keeps at most _parallelism() chunks in flight. When the
+    caller is cancelled or stops iterating, the job's chunks are stopped
+    before this returns (_stop_chunks).
+    """
+    _get_executor()
+    window = _parallelism(model_size, len(chunks), threads)
+    futures = [_submit(audio_path, chunk, model_size, language) for chunk in chunks[:window]]
+    try:
+        for index, chunk in enumerate(chunks):
+            result = _collect(await asyncio.wrap_future(futures[index]))
+            if index + window < len(chunks):
+                futures.append(_submit(audio_path, chunks[index + window], model_size, language))
+            yield chunk, result
+    finally:
+        await _stop_chunks(futures)
+
+
+def speech_chunks(regions: List[Tuple[float, float]]) -> List[Chunk]:
+    """Pack speech regions into chunks; the gaps between chunks are never decoded.
+
+    Neighbouring regions share a chunk while they fit in one Whisper window,
+    since a short chunk costs a full window anyway. Long regions are split
+    like a whole file would be.
+    """
+    spans: List[Tuple[float, float]] = []
+    for start, end in regions:
+        if spans and end - spans[-1][0] <= WHISPER_WINDOW:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+
+    chunks: List[Chunk] = []
+    for start, end in spans:
+        if end - start <= config.TRANSCRIBE_CHUNK_SECONDS * 1.5:
+            parts = [Chunk(0, start, end, start, end)]
+        else:
+            parts = [
+                Chunk(0, start + part.start, start + part.end, start + part.owned_start, start + part.owned_end)
+                for part in plan_chunks(end - start, [])
+            ]
+        for part in parts:
+            part.index = len(chunks)
+            chunks.append(part)
+    return chunks
+
+
+def _vad_chunks(audio_path: Path, duration: float) -> Tuple[Optional[List[Chunk]], Dict[str, Any]]:
+    """Speech-only chunks, or None when VAD is off or would not skip anything worthwhile."""
+    name = vad.engine()
+    if name is None or duration <= 0:
+        return None, {}
+    regions = vad.speech_regions(_pcm_blocks(audio_path), SAMPLE_RATE, duration, name)
+    speech = sum(end - start for start, end in regions)
+    stats = {
+        "engine": name,
+        "duration": round(duration, 3),
+        "speech_seconds": round(speech, 3),
+        "skipped_ratio": round(1 - speech / duration, 4),
+        "applied": True,
+    }
+    # Almost no speech usually means a quiet recording rather than a silent one;
+    # almost all speech means there is nothing to gain. Decode everything in both cases.
+    if speech < duration * 0.05 or stats["skipped_ratio"] < config.VAD_MIN_SKIP_RATIO:
+        stats.update(skipped_ratio=0.0, applied=False)
+        return None, stats
+    return speech_chunks(regions), stats
+
+
+def _plan(audio_path: Path, always_chunk: bool = False) -> Tuple[List[Chunk], Dict[str, Any]]:
+    """Chunks to transcribe, plus the VAD statistics for the file."""
+    duration = probe_duration(audio_path)
+    chunks, stats = _vad_chunks(audio_path, duration)
+    if chunks is not None:
+        return chunks, stats
+    if duration <= config.TRANSCRIBE_CHUNK_SECONDS * 1.5 or (cpu_budget() <= 1 and not always_chunk):
+        return [Chunk(0, 0.0, duration, 0.0, duration)], stats
+    return plan_chunks(duration, detect_silences(audio_path)), stats
+
+
+def _result(
+    segments: List[Dict[str, Any]],
+    languages: List[Optional[str]],
+    language: Optional[str],
+    vad_stats: Dict[str, Any],
+) -> Dict[str, Any]:
+    result = {
+        "text": "".join(seg["text"] for seg in segments),
+        "segments": segments,
+        "language": next((item for item in languages if item), language),
+    }
+    if vad_stats:
+        result["vad"] = vad_stats
+    return result
+
+
+def transcribe_file(
+    audio_path: Path,
+    model_size: str = "base",
+    language: Optional[str] = None,
+    threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Transcribe a file, in parallel chunks when it is long enough and cores are available.
+
+    threads caps the cores given to this file (default: the whole CPU budget).
+    Returns {'text', 'segments': [{'start', 'end', 'text'}], 'language'} plus 'vad'
+    statistics when the VAD pre-pass ran.
+    """
+    chunks, vad_stats = _plan(audio_path)
+    if len(chunks) == 1 or cpu_budget() <= 1:
+        results = [
+            _collect(transcribe_chunk(str(audio_path), chunk, model_size, language, threads or config.WHISPER_THREADS))
+            for chunk in chunks
+        ]
+    else:
+        _get_executor()
+        window = _parallelism(model_size, len(chunks), threads)
+        futures = [_submit(audio_path, chunk, model_size, language) for chunk in chunks[:window]]
+        results = []
+        try:
+            for index in range(len(chunks)):
+                results.append(_collect(futures[index].result()))
+                if index + window < len(chunks):
+                    futures.append(_submit(audio_path, chunks[index + window], model_size, language))
+        finally:
+            for future in futures:
+                future.cancel()
+
+    segments = stitch_segments(chunks, results)
+    return _result(segments, [r.get("language") for r in results], language, vad_stats)
+
+
+async def atranscribe_file(
+    audio_path: Path,
+    model_size: str = "base",
+    language: Optional[str] = None,
+    threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """transcribe_file for the event loop, where the caller may be cancelled.
+
+    Every chunk, even a lone one, runs on the worker pool so that cancelling
+    the caller terminates the decoding instead of leaving it running in a
+    thread.
+    """
+    chunks, vad_stats = await asyncio.to_thread(_plan, audio_path)
+    results = [result async for _, result in _chunk_results(audio_path, chunks, model_size, language, threads)]
+    segments = stitch_segments(chunks, results)
+    return _result(segments, [r.get("language") for r in results], language, vad_stats)
+
+
+async def iter_transcription(
+    audio_path: Path,
+    model_size: str = "base",
+    language: Optional[str] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield stitched segments chunk by chunk, in timeline order, as soon as each is decoded.
+
+    Audio is always chunked here so even a single core produces early output.
+    Chunks run on the worker pool and are stopped when the caller goes away.
+    """
+    chunks, _ = await asyncio.to_thread(_plan, audio_path, True)
+    stitcher = SegmentStitcher(len(chunks))
+    results = _chunk_results(audio_path, chunks, model_size, language, None)
+    try:
+        async for chunk, result in results:
+            yield stitcher.add(chunk, result)
+    finally:
+        await results.aclose()
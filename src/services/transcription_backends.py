@@ -0,0 +1,155 @@
+"""Pluggable speech-to-text engines behind one segment contract.
+
+Every backend loads a model handle once (the model pool caches it) and
+transcribes 16 kHz mono float32 audio into
+{'language': str | None, 'segments': [{'start', 'end', 'text'}]}, with times
+relative to the start of the audio it was given.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from src.core.config import config
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+try:
+    import faster_whisper
+except ImportError:
+    faster_whisper = None
+
+
+class TranscriptionBackend(ABC):
+    """A speech-to-text engine."""
+
+    name: str = ""
+    install_hint: str = ""
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the engine's package is installed."""
+
+    @abstractmethod
+    def load(self, model_size: str, device: str, threads: int) -> Any:
+        """Load a model; threads <= 0 means the engine default."""
+
+    @abstractmethod
+    def transcribe(self, model: Any, audio: Any, language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe float32 16 kHz audio with a loaded model."""
+
+    def apply_threads(self, threads: int) -> None:
+        """Re-apply the thread count before each use, for engines with a global setting."""
+
+    def memory_bytes(self, model: Any) -> int:
+        return 0
+
+    def require(self) -> None:
+        if not self.available():
+            raise ImportError(f"{self.name} backend is not installed. Install with: {self.install_hint}")
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper on PyTorch (fp32 on CPU)."""
+
+    name = "whisper"
+    install_hint = "pip install openai-whisper"
+
+    def available(self) -> bool:
+        return whisper is not None
+
+    def load(self, model_size: str, device: str, threads: int) -> Any:
+        self.require()
+        self.apply_threads(threads)
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, model: Any, audio: Any, language: Optional[str]) -> Dict[str, Any]:
+        result = model.transcribe(audio, language=language)
+        return {
+            "language": result.get("language", language),
+            "segments": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+                for seg in result["segments"]
+            ],
+        }
+
+    def apply_threads(self, threads: int) -> None:
+        if threads <= 0:
+            return
+        try:
+            import torch
+        except ImportError:
+            return
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+    def memory_bytes(self, model: Any) -> int:
+        parameters = getattr(model, "parameters", None)
+        if not callable(parameters):
+            return 0
+        try:
+            return sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            return 0
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper (CTranslate2) with quantized weights, int8 on CPU by default."""
+
+    name = "faster-whisper"
+    install_hint = "pip install faster-whisper"
+
+    def available(self) -> bool:
+        return faster_whisper is not None
+
+    def load(self, model_size: str, device: str, threads: int) -> Any:
+        self.require()
+        return faster_whisper.WhisperModel(
+            model_size,
+            device=device,
+            compute_type=config.FASTER_WHISPER_COMPUTE_TYPE,
+            cpu_threads=max(0, threads),
+        )
+
+    def transcribe(self, model: Any, audio: Any, language: Optional[str]) -> Dict[str, Any]:
+        segments, info = model.transcribe(audio, language=language, beam_size=config.FASTER_WHISPER_BEAM_SIZE)
+        # segments is a lazy generator: decoding happens while it is consumed.
+        return {
+            "language": info.language or language,
+            "segments": [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments],
+        }
+
+
+class BackendRegistry:
+    """Transcription backend registry; TRANSCRIPTION_BACKEND picks the deployment default."""
+
+    _backends: Dict[str, TranscriptionBackend] = {}
+
+    @classmethod
+    def register(cls, backend: TranscriptionBackend) -> None:
+        cls._backends[backend.name] = backend
+
+    @classmethod
+    def get(cls, name: Optional[str] = None) -> TranscriptionBackend:
+        """Backend by name; "auto" prefers faster-whisper when installed."""
+        name = (name or config.TRANSCRIPTION_BACKEND).lower()
+        if name == "auto":
+            installed = [backend for backend in cls._backends.values() if backend.available()]
+            preferred = cls._backends.get("faster-whisper")
+            if preferred in installed:
+                return preferred
+            return installed[0] if installed else cls._backends["whisper"]
+        if name not in cls._backends:
+            raise ValueError(f"Unknown transcription backend: {name} (available: {', '.join(cls._backends)})")
+        return cls._backends[name]
+
+    @classmethod
+    def list_backends(cls) -> List[TranscriptionBackend]:
+        return list(cls._backends.values())
+
+
+BackendRegistry.register(WhisperBackend())
+BackendRegistry.register(FasterWhisperBackend())
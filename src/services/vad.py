@@ -0,0 +1,151 @@
+"""Voice activity detection: find the speech regions of a 16 kHz mono s16 stream.
+
+Uses webrtcvad when it is installed, otherwise a frame-energy detector with
+an adaptive noise floor. Neither tells music from speech, so seconds of
+sustained tonal sound (steady level, low spectral flatness) are then marked
+as music: speech has syllable-rate level swings and pauses that a music bed
+lacks. Non-speech shorter than VAD_MIN_SILENCE is kept so words are never
+clipped; only longer silence / music beds are dropped.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+
+from src.core.config import config
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+
+FRAME_SECONDS = 0.03
+MUSIC_WINDOW_FRAMES = 33  # ~1 s: long enough to span several syllables
+BATCH_FRAMES = 1024
+
+
+def engine() -> str | None:
+    """The detector VAD_ENGINE resolves to, or None when VAD is disabled."""
+    name = config.VAD_ENGINE.lower()
+    if name in ("off", "none", ""):
+        return None
+    if name == "webrtc" and webrtcvad is None:
+        raise ImportError("webrtcvad is required for VAD_ENGINE=webrtc. Install with: pip install webrtcvad")
+    if name == "auto":
+        return "webrtc" if webrtcvad is not None else "energy"
+    return name
+
+
+def _frames(blocks: Iterable[bytes], frame_bytes: int) -> Iterable[bytes]:
+    pending = b""
+    for block in blocks:
+        pending += block
+        usable = len(pending) - len(pending) % frame_bytes
+        for offset in range(0, usable, frame_bytes):
+            yield pending[offset:offset + frame_bytes]
+        pending = pending[usable:]
+
+
+def _frame_features(blocks: Iterable[bytes], frame_bytes: int):
+    """Per-frame level in dBFS and spectral flatness (0 = pure tone, ~0.56 = white noise)."""
+    import numpy as np
+
+    samples_per_frame = frame_bytes // 2
+    taper = np.hanning(samples_per_frame).astype(np.float32)
+    levels, flatness = [], []
+    batch: List[bytes] = []
+
+    def flush() -> None:
+        frames = np.frombuffer(b"".join(batch), np.int16).astype(np.float32).reshape(-1, samples_per_frame) / 32768.0
+        levels.append(20 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10))
+        power = np.abs(np.fft.rfft(frames * taper, axis=1)) ** 2 + 1e-12
+        flatness.append(np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1))
+        batch.clear()
+
+    for frame in _frames(blocks, frame_bytes):
+        batch.append(frame)
+        if len(batch) == BATCH_FRAMES:
+            flush()
+    if batch:
+        flush()
+    if not levels:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate(levels), np.concatenate(flatness)
+
+
+def _music_frames(db, flatness, active):
+    """Frames in ~1 s windows of sustained, tonal sound: a music bed rather than speech.
+
+    A window qualifies when nearly all of it is active (speech pauses between
+    phrases), its level barely moves (speech swings with every syllable) and
+    its spectrum is tonal rather than noise-like.
+    """
+    import numpy as np
+
+    music = np.zeros(len(db), dtype=bool)
+    if config.VAD_MUSIC_MAX_MODULATION_DB <= 0:
+        return music
+    for start in range(0, len(db) - MUSIC_WINDOW_FRAMES + 1, MUSIC_WINDOW_FRAMES):
+        window = slice(start, start + MUSIC_WINDOW_FRAMES)
+        if (
+            np.mean(active[window]) >= 0.9
+            and np.std(db[window]) < config.VAD_MUSIC_MAX_MODULATION_DB
+            and np.median(flatness[window]) < config.VAD_MUSIC_MAX_FLATNESS
+        ):
+            music[window] = True
+    return music
+
+
+def _speech_flags(blocks: Iterable[bytes], sample_rate: int, name: str) -> List[bool]:
+    import numpy as np
+
+    frame_bytes = int(sample_rate * FRAME_SECONDS) * 2
+    if name == "webrtc":
+        detector = webrtcvad.Vad(config.VAD_AGGRESSIVENESS)
+        decisions: List[bool] = []
+
+        def detected() -> Iterable[bytes]:
+            for frame in _frames(blocks, frame_bytes):
+                decisions.append(detector.is_speech(frame, sample_rate))
+                yield frame
+
+        db, flatness = _frame_features(detected(), frame_bytes)
+        active = np.asarray(decisions, dtype=bool)
+    else:
+        db, flatness = _frame_features(blocks, frame_bytes)
+        if not len(db):
+            return []
+        threshold = max(float(np.percentile(db, 10)) + config.VAD_ENERGY_MARGIN_DB, -55.0)
+        active = db > threshold
+    if not len(db):
+        return []
+    return (active & ~_music_frames(db, flatness, active)).tolist()
+
+
+def speech_regions(
+    blocks: Iterable[bytes],
+    sample_rate: int,
+    duration: float,
+    name: str = "energy",
+) -> List[Tuple[float, float]]:
+    """(start, end) speech regions in seconds, padded and with short pauses bridged."""
+    regions: List[Tuple[float, float]] = []
+    start = None
+    flags = _speech_flags(blocks, sample_rate, name)
+    for i, speech in enumerate(flags + [False]):
+        if speech and start is None:
+            start = i * FRAME_SECONDS
+        elif not speech and start is not None:
+            regions.append((start, i * FRAME_SECONDS))
+            start = None
+
+    padding = config.VAD_PADDING
+    merged: List[Tuple[float, float]] = []
+    for start, end in regions:
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if merged and start - merged[-1][1] < config.VAD_MIN_SILENCE:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    # A lone blip (click, cough) is not worth a decoding window.
+    return [(start, end) for start, end in merged if end - start >= 0.3]
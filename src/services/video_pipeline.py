@@ -3,20 +3,31 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
+import asyncio
+import json
 import os
 import subprocess
-import uuid
-
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    whisper = None
-    WHISPER_AVAILABLE = False
+import time
 
 from src.core.config import config
-from src.services.llm import extract_skills_from_transcript
+from src.services.skill_extraction import extract_skills
+from src.services.llm_scheduler import LLMDeadlineError
+from src.services.transcription_backends import BackendRegistry
+from src.services.transcription import transcribe_file, iter_transcription, probe_duration, cpu_budget
+from src.services.model_policy import model_policy
+from src.services.stages import stage_limits
+from src.services.storage import storage
+from src.services.audio_ingest import AUDIO_FORMAT, download_pcm
+from src.services.transcript_cache import transcript_cache, hash_file
+from src.services import subtitles
+from src.services.subtitles import SubtitleResult, fetch_subtitles
+from src.models.unified import Section
+from src.sources.base import canonical_source_key
+from src.services.single_flight import ProgressCallback, extraction_flights, flight_key
+
+
+TRANSCRIPT_MODES = ("refined", "draft")
 
 
 @dataclass
@@ -24,39 +35,135 @@ class VideoResult:
     title: str
     transcript: str
     extracted_skills: List[Dict[str, Any]]
+    transcription_model: Optional[str] = None
+    llm_usage: Optional[Dict[str, Any]] = None
+    llm_error: Optional[str] = None  # set when extracted_skills are the keyword fallback
 
 
-def _run_command(args: List[str]) -> None:
+def _run_command(args: List[str]) -> str:
     result = subprocess.run(args, capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError(result.stderr.strip() or "Command failed")
+    return result.stdout
 
 
-def _download_audio(video_url: str) -> Path:
-    config.ensure_dirs()
-    base_name = f"yt-{uuid.uuid4().hex}"
-    output_template = str(config.DOWNLOADS_DIR / f"{base_name}.%(ext)s")
-
-    args = ["yt-dlp", "-x", "--audio-format", "mp3", "-o", output_template, video_url]
+def _resolve_info(video_url: str) -> Dict[str, Any]:
+    """Resolve metadata, the best audio stream and the available subtitle tracks in one yt-dlp call."""
+    args = ["yt-dlp", "-j", "--no-playlist", "-f", AUDIO_FORMAT, "--write-subs", "--write-auto-subs", video_url]
     cookies_path = os.getenv("YTDLP_COOKIES_PATH") or str(config.BASE_DIR / "cookies" / "cookies.txt")
     if Path(cookies_path).exists():
         args.extend(["--cookies", cookies_path])
+    return json.loads(_run_command(args))
+
+
+def _download_audio(video_url: str, info: Optional[Dict[str, Any]] = None) -> Path:
+    """Decode the resolved audio stream straight to 16 kHz WAV, pinned until storage.release()."""
+    config.ensure_dirs()
+    info = info or _resolve_info(video_url)
+    # 16 kHz mono s16le is 32000 bytes per second.
+    expected_bytes = int((info.get("duration") or 0) * 32000)
+    output_path = storage.allocate("downloads", ".wav", prefix="yt-", expected_bytes=expected_bytes)
+    try:
+        return download_pcm(info, output_path)
+    except BaseException:
+        storage.release(output_path, delete=True)
+        raise
 
-    _run_command(args)
 
-    for candidate in config.DOWNLOADS_DIR.iterdir():
-        if candidate.name.startswith(base_name) and candidate.suffix == ".mp3":
-            return candidate
-    raise RuntimeError("yt-dlp did not produce mp3 output")
+def _subtitles(info: Dict[str, Any]) -> Optional[SubtitleResult]:
+    if not config.SUBTITLE_FAST_PATH:
+        return None
+    return fetch_subtitles(info, None)
+
+
+def _store_subtitles(subtitle: SubtitleResult, source_key: tuple, title: str) -> str:
+    # Under their own key: a subtitle text must never come back as a Whisper transcript.
+    transcript_cache.put(
+        *source_key,
+        subtitles.cache_key(None),
+        None,
+        {"text": subtitle.text, "segments": subtitle.segments, "language": subtitle.language},
+        f"subtitle:{subtitle.language}",
+        metadata={"title": title},
+    )
+    return subtitle.text.strip()
+
+
+def _cached_transcript(source_key: tuple, model_name: str):
+    """The cached transcript of model_name, else (with the fast path on) cached subtitles.
+
+    A draft request is also served by a cached refined transcript.
+    """
+    for name in dict.fromkeys([_model_name(), model_name] if model_name == config.WHISPER_DRAFT_MODEL else [model_name]):
+        cached = transcript_cache.get(*source_key, name, None)
+        if cached and not subtitles.is_subtitle(cached.transcription_model):
+            return cached
+    if config.SUBTITLE_FAST_PATH:
+        return transcript_cache.get(*source_key, subtitles.cache_key(None), None)
+    return None
+
+
+def _require_backend() -> None:
+    if not BackendRegistry.get().available():
+        raise RuntimeError(
+            f"Transcription backend '{BackendRegistry.get().name}' is not installed. "
+            "Video transcription is not available in this deployment."
+        )
 
 
-def _transcribe_audio(audio_path: Path) -> str:
-    if not WHISPER_AVAILABLE:
-        raise RuntimeError("Whisper is not installed. Video transcription is not available in this deployment.")
-    model_name = os.getenv("WHISPER_MODEL") or "base"
-    model = whisper.load_model(model_name)
-    result = model.transcribe(str(audio_path))
-    return (result.get("text") or "").strip() or "Transcript not available"
+def _model_name() -> str:
+    return os.getenv("WHISPER_MODEL") or "base"
+
+
+def transcript_model(transcript: str = "refined") -> str:
+    """Whisper model for a transcript quality: "refined" (WHISPER_MODEL) or "draft" (WHISPER_DRAFT_MODEL)."""
+    if transcript not in TRANSCRIPT_MODES:
+        raise ValueError(f"transcript must be one of {', '.join(TRANSCRIPT_MODES)}")
+    return config.WHISPER_DRAFT_MODEL if transcript == "draft" else _model_name()
+
+
+def _transcribe_audio(audio_path: Path, model_name: str) -> Dict[str, Any]:
+    """Transcribe with model_name; "auto" lets the model policy pick size and threads."""
+    _require_backend()
+    if model_name != "auto":
+        return transcribe_file(audio_path, model_size=model_name)
+    decision = model_policy.choose(probe_duration(audio_path), stage_limits.waiting("transcribe"), cpu_budget())
+    started = time.monotonic()
+    result = transcribe_file(audio_path, model_size=decision.model_size, threads=decision.threads)
+    result["policy"] = model_policy.observe(decision, time.monotonic() - started)
+    return result
+
+
+def _cached_or_transcribe(
+    audio_path: Path, source_key: Optional[tuple], title: str, model_name: str
+) -> tuple[str, str, List[str]]:
+    """Transcribe unless the same audio content was transcribed before; store the result.
+
+    Returns (transcript, transcription_model, segment texts).
+    """
+    audio_hash = hash_file(audio_path)
+    cached = transcript_cache.get_by_audio(audio_hash, model_name, None)
+    if cached:
+        result = {"text": cached.text, "segments": cached.segments, "language": cached.language}
+    else:
+        result = _transcribe_audio(audio_path, model_name)
+    if cached:
+        transcription_model = cached.transcription_model
+    else:
+        transcription_model = result.get("policy", {}).get("model_size", model_name)
+    source_type, source_id = source_key or ("file", audio_hash[:16])
+    transcript_cache.put(
+        source_type,
+        source_id,
+        model_name,
+        None,
+        result,
+        transcription_model,
+        metadata={"title": title, **{key: result[key] for key in ("vad", "policy") if result.get(key)}},
+        audio_hash=audio_hash,
+    )
+    segments = [seg["text"] for seg in result.get("segments") or []]
+    return (result.get("text") or "").strip(), transcription_model, segments
 
 
 def _fallback_skills(transcript: str) -> List[Dict[str, Any]]:
@@ -77,34 +184,207 @@ def _fallback_skills(transcript: str) -> List[Dict[str, Any]]:
     ]
 
 
-def extract_from_video(
+def transcribe_video(
     *,
     video_url: Optional[str] = None,
     local_path: Optional[Path] = None,
     title: Optional[str] = None,
-) -> VideoResult:
+    progress: Optional[ProgressCallback] = None,
+    transcript: str = "refined",
+) -> tuple[str, str, Optional[str], List[str]]:
+    """Blocking part of extraction. Returns (title, transcript, transcription_model, segment texts).
+
+    transcript="draft" transcribes with WHISPER_DRAFT_MODEL for a faster, rougher result.
+    """
     if not video_url and not local_path:
         raise ValueError("video_url or local_path is required")
+    report = progress or (lambda stage, message: None)
+    model_name = transcript_model(transcript)
 
-    if video_url:
-        audio_path = _download_audio(video_url)
-        title = title or video_url
+    source_key = canonical_source_key(video_url) if video_url else None
+    cached = _cached_transcript(source_key, model_name) if source_key else None
+    if cached:
+        # Cache hit: no download, no transcription.
+        report("cache", "Transcript cache hit")
+        title = title or cached.metadata.get("title") or video_url
+        text = cached.text.strip()
+        transcription_model = cached.transcription_model
+        segments = [seg["text"] for seg in cached.segments]
+    elif video_url:
+        report("metadata", "Resolving video info")
+        info = _resolve_info(video_url)
+        title = title or info.get("title") or video_url
+        subtitle = _subtitles(info)
+        if subtitle:
+            # Platform captions are good enough: skip download and Whisper entirely.
+            report("subtitle", f"Using platform subtitles ({subtitle.language})")
+            text = _store_subtitles(subtitle, source_key, title)
+            transcription_model = f"subtitle:{subtitle.language}"
+            segments = [seg["text"] for seg in subtitle.segments]
+        else:
+            report("download", "Downloading audio")
+            audio_path = _download_audio(video_url, info)
+            try:
+                report("transcribe", "Transcribing audio")
+                text, transcription_model, segments = _cached_or_transcribe(audio_path, source_key, title, model_name)
+            finally:
+                storage.release(audio_path, delete=True)
     else:
         audio_path = local_path
         title = title or audio_path.name
+        report("transcribe", "Transcribing audio")
+        text, transcription_model, segments = _cached_or_transcribe(audio_path, None, title, model_name)
+    return title, text, transcription_model, segments
 
-    transcript = _transcribe_audio(audio_path)
+
+async def extract_from_video(
+    *,
+    video_url: Optional[str] = None,
+    local_path: Optional[Path] = None,
+    title: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    transcript: str = "refined",
+) -> VideoResult:
+    """Transcribe (in a worker thread), then extract skills; long transcripts go through map-reduce.
+
+    transcript: "refined" (default, WHISPER_MODEL) or "draft" (WHISPER_DRAFT_MODEL, faster).
+    """
+    report = progress or (lambda stage, message: None)
+    title, text, transcription_model, segments = await asyncio.to_thread(
+        transcribe_video, video_url=video_url, local_path=local_path, title=title, progress=progress, transcript=transcript
+    )
+    if not text:
+        text, segments = "Transcript not available", []
+
+    report("extract", "Extracting skills from transcript")
 
     extracted_skills: List[Dict[str, Any]] = []
+    llm_usage = None
+    llm_error = None
     try:
-        extracted_skills = extract_skills_from_transcript(
-            {
-                "title": title,
-                "description": "",
-                "transcript": transcript,
-            }
-        )
-    except Exception:
-        extracted_skills = _fallback_skills(transcript)
+        extracted_skills, llm_usage = await extract_skills(title, text, segments)
+        report("extract", f"Extracted {len(extracted_skills)} skills ({llm_usage['windows']} windows, {llm_usage['total_tokens']} tokens)")
+        if llm_usage["merge_error"]:
+            report("extract", f"Skill merge failed, kept per-window candidates ({llm_usage['merge_error']})")
+    except LLMDeadlineError:
+        # Rate limited past the deadline: fail loudly; the transcript is cached for the retry.
+        raise
+    except Exception as exc:
+        llm_error = f"{type(exc).__name__}: {exc}"
+        report("extract", f"LLM extraction failed, using keyword fallback ({llm_error})")
+        extracted_skills = _fallback_skills(text)
+
+    return VideoResult(
+        title=title,
+        transcript=text,
+        extracted_skills=extracted_skills,
+        transcription_model=transcription_model,
+        llm_usage=llm_usage,
+        llm_error=llm_error,
+    )
+
+
+async def extract_from_video_shared(
+    *,
+    video_url: Optional[str] = None,
+    local_path: Optional[Path] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    transcript: str = "refined",
+) -> VideoResult:
+    """extract_from_video, but concurrent calls for the same video (and transcript quality) share one run."""
+    key = flight_key("video", video_url or str(local_path), transcript=transcript)
+    return await extraction_flights.run(
+        key,
+        lambda progress: extract_from_video(
+            video_url=video_url, local_path=local_path, progress=progress, transcript=transcript
+        ),
+        on_progress=on_progress,
+    )
+
+
+def _segment_sections(segments: List[Dict[str, Any]], start: int = 1) -> List[Section]:
+    return [
+        Section(title=f"Segment {index}", content=seg["text"], start_time=seg["start"], end_time=seg["end"])
+        for index, seg in enumerate(segments, start=start)
+    ]
 
-    return VideoResult(title=title, transcript=transcript, extracted_skills=extracted_skills)
+
+async def stream_video_sections(
+    *,
+    video_url: Optional[str] = None,
+    local_path: Optional[Path] = None,
+    transcript: str = "refined",
+) -> AsyncIterator[Section]:
+    """Yield transcript sections as each audio chunk finishes decoding.
+
+    Shares the transcript cache with transcribe_video: a hit replays the cached
+    segments, and a stream that runs to completion stores its transcript.
+    Download and transcription run inside the same stage limits as extraction jobs.
+    """
+    if not video_url and not local_path:
+        raise ValueError("video_url or local_path is required")
+
+    model_name = transcript_model(transcript)
+    source_key = canonical_source_key(video_url) if video_url else None
+    cached = await asyncio.to_thread(_cached_transcript, source_key, model_name) if source_key else None
+    if cached:
+        for section in _segment_sections(cached.segments):
+            yield section
+        return
+
+    info = await asyncio.to_thread(_resolve_info, video_url) if video_url else None
+    subtitle = await asyncio.to_thread(_subtitles, info) if info else None
+    if subtitle:
+        title = info.get("title") or video_url
+        await asyncio.to_thread(_store_subtitles, subtitle, source_key, title)
+        for section in _segment_sections(subtitle.segments):
+            yield section
+        return
+
+    _require_backend()
+    if video_url:
+        async with stage_limits.stage("download"):
+            audio_path = await asyncio.to_thread(_download_audio, video_url, info)
+    else:
+        audio_path = local_path
+    try:
+        audio_hash = await asyncio.to_thread(hash_file, audio_path)
+        cached = await asyncio.to_thread(transcript_cache.get_by_audio, audio_hash, model_name, None)
+        if cached:
+            result = {"text": cached.text, "segments": cached.segments, "language": cached.language}
+            transcription_model = cached.transcription_model
+            for section in _segment_sections(cached.segments):
+                yield section
+        else:
+            transcription_model = model_name
+            if model_name == "auto":
+                duration = (info or {}).get("duration") or await asyncio.to_thread(probe_duration, audio_path)
+                transcription_model = model_policy.choose(
+                    duration, stage_limits.waiting("transcribe"), cpu_budget()
+                ).model_size
+            collected: List[Dict[str, Any]] = []
+            # Same bounded stage as /api/v1/extract jobs, so streams count against the worker pool too.
+            async with stage_limits.stage("transcribe"):
+                async for segments in iter_transcription(audio_path, model_size=transcription_model):
+                    for section in _segment_sections(segments, start=len(collected) + 1):
+                        yield section
+                    collected.extend(segments)
+            result = {"text": "".join(seg["text"] for seg in collected), "segments": collected, "language": None}
+
+        # Only reached when the consumer read the whole stream.
+        source_type, source_id = source_key or ("file", audio_hash[:16])
+        title = (info or {}).get("title") or video_url or audio_path.name
+        await asyncio.to_thread(
+            transcript_cache.put,
+            source_type,
+            source_id,
+            model_name,
+            None,
+            result,
+            transcription_model,
+            metadata={"title": title},
+            audio_hash=audio_hash,
+        )
+    finally:
+        if video_url:
+            storage.release(audio_path, delete=True)
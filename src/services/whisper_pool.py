@@ -0,0 +1,240 @@
+"""Process-wide Whisper model pool.
+
+Loading Whisper weights takes seconds and hundreds of MB, so every model is
+loaded once per (backend, model size, device, thread count) and shared
+between jobs.
+
+The pool is per process: chunked transcription workers (see transcription)
+each hold their own pool, preloaded at worker start and reported back with
+every chunk result.
+"""
+from __future__ import annotations
+
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.config import config
+from src.services.transcription_backends import BackendRegistry
+
+
+ModelKey = Tuple[str, str, str, int]  # (backend, model size, device, threads)
+
+# Approximate resident size of one loaded fp32 model including runtime buffers (MB);
+# used to size transcription workers before a model has been loaded and measured.
+MODEL_MEMORY_MB = {"tiny": 250, "base": 400, "small": 1100, "medium": 3000, "large": 6000, "turbo": 3500}
+WORKER_OVERHEAD_MB = 200  # interpreter and inference runtime of one transcription worker process
+
+
+@dataclass
+class _PoolEntry:
+    key: ModelKey
+    model: Any
+    semaphore: threading.BoundedSemaphore
+    load_seconds: float
+    memory_bytes: int
+    in_use: int = 0
+    hits: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def available_memory_mb() -> Optional[int]:
+    """Read MemAvailable from /proc/meminfo; None when unknown (non-Linux)."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def estimate_model_mb(model_size: str, backend: Optional[str] = None) -> int:
+    """Expected memory of one loaded model; quantized faster-whisper weights take about a third."""
+    base = next(
+        (mb for name, mb in MODEL_MEMORY_MB.items() if model_size.split(".")[0].startswith(name)),
+        MODEL_MEMORY_MB["small"],
+    )
+    if BackendRegistry.get(backend).name == "faster-whisper" and config.FASTER_WHISPER_COMPUTE_TYPE.startswith("int8"):
+        return base // 3
+    return base
+
+
+class WhisperModelPool:
+    """Loads each Whisper model once and hands it out with a per-model concurrency cap."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, min_free_mb: Optional[int] = None) -> None:
+        self.max_concurrency = max(1, max_concurrency or config.WHISPER_MAX_CONCURRENCY)
+        self.min_free_mb = config.WHISPER_MIN_FREE_MB if min_free_mb is None else min_free_mb
+        self._entries: Dict[ModelKey, _PoolEntry] = {}
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(
+        model_size: str,
+        device: Optional[str] = None,
+        threads: Optional[int] = None,
+        backend: Optional[str] = None,
+    ) -> ModelKey:
+        return (
+            BackendRegistry.get(backend).name,
+            model_size,
+            device or config.WHISPER_DEVICE,
+            config.WHISPER_THREADS if threads is None else threads,
+        )
+
+    def _get_or_load(self, key: ModelKey) -> _PoolEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the pool lock so other models stay available meanwhile.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.hits += 1
+                    return entry
+
+            backend_name, model_size, device, threads = key
+            backend = BackendRegistry.get(backend_name)
+            backend.require()
+
+            self.evict_for_memory()
+            started = time.perf_counter()
+            model = backend.load(model_size, device, threads)
+            load_seconds = time.perf_counter() - started
+            entry = _PoolEntry(
+                key=key,
+                model=model,
+                semaphore=threading.BoundedSemaphore(self.max_concurrency),
+                load_seconds=load_seconds,
+                memory_bytes=backend.memory_bytes(model),
+            )
+            with self._lock:
+                self._entries[key] = entry
+                self._loads += 1
+            print(f"[whisper-pool] Loaded {backend_name}:{model_size} on {device} in {load_seconds:.1f}s")
+            return entry
+
+    @contextmanager
+    def acquire(
+        self,
+        model_size: str,
+        device: Optional[str] = None,
+        threads: Optional[int] = None,
+        backend: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Borrow a shared model instance, blocking while the model is at its concurrency cap."""
+        key = self.make_key(model_size, device, threads, backend)
+        entry = self._get_or_load(key)
+        entry.semaphore.acquire()
+        with self._lock:
+            entry.in_use += 1
+        try:
+            BackendRegistry.get(key[0]).apply_threads(key[3])
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+            entry.semaphore.release()
+
+    def preload(
+        self,
+        model_sizes: List[str],
+        device: Optional[str] = None,
+        threads: Optional[int] = None,
+        backend: Optional[str] = None,
+    ) -> None:
+        for model_size in model_sizes:
+            self._get_or_load(self.make_key(model_size, device, threads, backend))
+
+    def _evict(self, keys: List[ModelKey]) -> int:
+        with self._lock:
+            removed = [self._entries.pop(key) for key in keys if key in self._entries]
+            self._evictions += len(removed)
+        count = len(removed)
+        if not count:
+            return 0
+        for entry in removed:
+            print(f"[whisper-pool] Evicted {entry.key[0]}:{entry.key[1]} ({entry.memory_bytes / 2**20:.0f} MB)")
+        del removed, entry
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        return count
+
+    def evict_idle(self, max_idle_seconds: float = 0.0) -> int:
+        """Drop every model that is not in use and has been idle for at least max_idle_seconds."""
+        now = time.monotonic()
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry.in_use == 0 and now - entry.last_used >= max_idle_seconds
+            ]
+        return self._evict(keys)
+
+    def evict_for_memory(self) -> int:
+        """Evict idle models, least recently used first, until MemAvailable is above the floor."""
+        evicted = 0
+        while True:
+            available = available_memory_mb()
+            if available is None or available >= self.min_free_mb:
+                return evicted
+            with self._lock:
+                idle = sorted(
+                    (entry for entry in self._entries.values() if entry.in_use == 0),
+                    key=lambda entry: entry.last_used,
+                )
+                key = idle[0].key if idle else None
+                del idle
+            if key is None:
+                return evicted
+            evicted += self._evict([key])
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models = [
+                {
+                    "backend": entry.key[0],
+                    "model_size": entry.key[1],
+                    "device": entry.key[2],
+                    "threads": entry.key[3],
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "hits": entry.hits,
+                    "in_use": entry.in_use,
+                    "memory_mb": round(entry.memory_bytes / 2**20, 1),
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+                for entry in self._entries.values()
+            ]
+            loads, evictions = self._loads, self._evictions
+        return {
+            "models": models,
+            "loads": loads,
+            "hits": sum(item["hits"] for item in models),
+            "evictions": evictions,
+            "memory_mb": round(sum(item["memory_mb"] for item in models), 1),
+            "available_memory_mb": available_memory_mb(),
+            "max_concurrency": self.max_concurrency,
+            "backend": BackendRegistry.get().name,
+        }
+
+
+whisper_pool = WhisperModelPool()
@@ -1,9 +1,49 @@
 """Skills Forge - 内容源处理器基类"""
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import hashlib
 import re
 
-from src.models.unified import UnifiedContent, SourceType
+from src.models.unified import UnifiedContent, SourceType, Section
+from src.core.config import config
+
+
+T = TypeVar("T")
+
+# 有界线程池: yt-dlp、文件哈希等阻塞操作在此执行, 不占用事件循环
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=config.SOURCE_IO_WORKERS,
+    thread_name_prefix="source-io",
+)
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """在有界线程池中执行阻塞调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, partial(func, *args, **kwargs))
+
+
+async def run_process(cmd: List[str]) -> str:
+    """异步执行子进程; 任务被取消时 (如客户端断开) 终止子进程"""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.decode("utf-8", "replace").strip() or f"{cmd[0]} failed")
+    return stdout.decode("utf-8", "replace")
 
 
 class SourceProcessor(ABC):
@@ -26,9 +66,23 @@ class SourceProcessor(ABC):
         """提取并返回统一格式内容"""
         pass
     
+    async def stream_sections(self, url: str, **options) -> AsyncIterator[Section]:
+        """流式产出章节 (默认实现: 完整提取后逐段产出, 子类可边解码边产出)"""
+        content = await self.extract_content(url, **options)
+        for section in content.sections:
+            yield section
+    
     def get_source_id(self, url: str) -> Optional[str]:
         """从URL提取源ID"""
         return None
+    
+    def can_handle_list(self, url: str) -> bool:
+        """判断是否为该源的列表URL (播放列表、合集、UP主空间等)"""
+        return False
+    
+    async def list_entries(self, url: str, limit: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """枚举列表URL中的条目, 返回 (列表标题, [{'url', 'title'}])"""
+        raise NotImplementedError(f"{self.__class__.__name__} does not support list URLs")
 
 
 class SourceRegistry:
@@ -49,7 +103,31 @@ class SourceRegistry:
                 return processor
         return None
     
+    @classmethod
+    def get_list_processor(cls, url: str) -> Optional[SourceProcessor]:
+        """根据列表URL获取对应的处理器"""
+        for processor in cls._processors:
+            if processor.can_handle_list(url):
+                return processor
+        return None
+    
     @classmethod
     def list_processors(cls) -> list[SourceProcessor]:
         """列出所有处理器"""
         return cls._processors.copy()
+
+
+YOUTUBE_ID_PATTERN = r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/)|youtu\.be/)([\w-]{11})'
+
+
+def canonical_source_key(url: str) -> Tuple[str, str]:
+    """返回 (source_type, source_id), 同一视频的不同URL写法得到相同的键"""
+    processor = SourceRegistry.get_processor(url)
+    if processor:
+        source_id = processor.get_source_id(url)
+        if source_id:
+            return processor.source_type.value, source_id
+    match = re.search(YOUTUBE_ID_PATTERN, url)
+    if match:
+        return "youtube", match.group(1)
+    return "url", hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:16]
@@ -2,25 +2,52 @@
 import re
 import uuid
 import json
-import subprocess
+import copy
+import time
+import asyncio
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any
-import tempfile
-
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Iterator, List, Tuple
 try:
     import yt_dlp
 except ImportError:
     yt_dlp = None
 
-try:
-    import whisper
-except ImportError:
-    whisper = None
-
-from src.sources.base import SourceProcessor, SourceRegistry
+from src.sources.base import SourceProcessor, SourceRegistry, run_blocking, run_process
 from src.models.unified import UnifiedContent, SourceType, Section
+from src.models.transcript import CompactTranscript
 from src.core.config import config
+from src.services.transcription import atranscribe_file, iter_transcription, cpu_budget
+from src.services.model_policy import model_policy
+from src.services.refinement import refinements
+from src.services.audio_ingest import AUDIO_FORMAT, select_audio_format, pcm_command
+from src.services.transcript_cache import transcript_cache, hash_file
+from src.services.stages import stage_limits
+from src.services.storage import storage
+from src.services import subtitles
+from src.services.subtitles import fetch_subtitles
+from src.services.transcript_export import iter_srt
+
+
+def _extract_info(url: str, ydl_opts: dict) -> dict:
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def _download(url: str, ydl_opts: dict, info: Optional[dict] = None) -> None:
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        if info is None:
+            ydl.download([url])
+        else:
+            # 复用已解析的info, 仅按本次的format重新选择格式
+            ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+
+def _report(progress: Optional[Callable[[str, str], None]], stage: str, message: str) -> None:
+    """上报阶段进度 (stage: cache/metadata/download/decode/transcribe)"""
+    if progress:
+        progress(stage, message)
 
 
 class BilibiliProcessor(SourceProcessor):
@@ -35,36 +62,106 @@ class BilibiliProcessor(SourceProcessor):
         r'bilibili\.com/video/av(\d+)',
     ]
     
+    # 列表URL: UP主空间、合集/系列、收藏夹、播放列表
+    LIST_PATTERNS = [
+        r'space\.bilibili\.com/\d+',
+        r'bilibili\.com/list/',
+        r'bilibili\.com/medialist/',
+        r'bilibili\.com/festival/',
+    ]
+    
     def __init__(self):
-        self.temp_dir = Path(tempfile.gettempdir()) / "skills_forge"
+        self.temp_dir = config.TEMP_DIR
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        # source_id -> (过期时间, yt-dlp info)
+        self._info_cache: Dict[str, Tuple[float, dict]] = {}
     
     def can_handle(self, url: str) -> bool:
         """判断是否为Bilibili URL"""
         return any(re.search(p, url) for p in self.URL_PATTERNS)
     
     def get_source_id(self, url: str) -> Optional[str]:
-        """从URL提取BV号"""
+        """从URL提取BV号 (分P视频的第N>1P为 BVxxx_pN)"""
         for pattern in self.URL_PATTERNS:
             match = re.search(pattern, url)
             if match:
+                part = re.search(r'[?&]p=(\d+)', url)
+                if part and int(part.group(1)) > 1:
+                    return f"{match.group(1)}_p{part.group(1)}"
                 return match.group(1)
         return None
     
-    async def extract_metadata(self, url: str) -> dict:
-        """提取视频元数据"""
+    def can_handle_list(self, url: str) -> bool:
+        """判断是否为Bilibili列表URL"""
+        return any(re.search(p, url) for p in self.LIST_PATTERNS)
+    
+    async def list_entries(self, url: str, limit: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """平铺解析 (extract_flat) 列表中的视频, 不逐个请求视频详情"""
         if not yt_dlp:
             raise ImportError("yt-dlp is required. Install with: pip install yt-dlp")
         
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
-            'extract_flat': False,
+            'extract_flat': 'in_playlist',
         }
+        if limit:
+            ydl_opts['playlistend'] = limit
+        async with stage_limits.stage("metadata"):
+            info = await run_blocking(_extract_info, url, ydl_opts)
+        
+        entries = []
+        seen = set()
+        for entry in info.get('entries') or []:
+            if not entry:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url') or ''
+            if not entry_url.startswith('http') and entry.get('id'):
+                entry_url = f"https://www.bilibili.com/video/{entry['id']}"
+            if not entry_url or entry_url in seen:
+                continue
+            seen.add(entry_url)
+            entries.append({'url': entry_url, 'title': entry.get('title', '')})
+        return info.get('title', ''), entries[:limit] if limit else entries
+    
+    async def resolve_info(self, url: str) -> dict:
+        """解析视频信息 (元数据 + 已选定的音频格式URL), 结果按TTL缓存供后续步骤复用"""
+        if not yt_dlp:
+            raise ImportError("yt-dlp is required. Install with: pip install yt-dlp")
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+        key = self.get_source_id(url) or url
+        cached = self._info_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
         
+        ydl_opts = {
+            'format': AUDIO_FORMAT,
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+            # 仅列出字幕轨 (download=False时不会写文件), 供字幕优先路径使用
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+        }
+        
+        async with stage_limits.stage("metadata"):
+            info = await run_blocking(_extract_info, url, ydl_opts)
+        self._info_cache[key] = (time.monotonic() + config.METADATA_CACHE_TTL, info)
+        self._prune_info_cache()
+        return info
+    
+    def _prune_info_cache(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._info_cache.items() if expires <= now]:
+            self._info_cache.pop(key, None)
+    
+    async def extract_metadata(self, url: str) -> dict:
+        """提取视频元数据"""
+        info = await self.resolve_info(url)
+        return self._metadata_from_info(info)
+    
+    @staticmethod
+    def _metadata_from_info(info: dict) -> dict:
         return {
             'id': info.get('id', ''),
             'title': info.get('title', ''),
@@ -80,13 +177,21 @@ class BilibiliProcessor(SourceProcessor):
             'thumbnail': info.get('thumbnail', ''),
         }
     
-    async def download_video(self, url: str, output_path: Optional[Path] = None) -> Path:
-        """下载视频"""
+    async def download_video(
+        self,
+        url: str,
+        output_path: Optional[Path] = None,
+        info: Optional[dict] = None
+    ) -> Path:
+        """下载视频 (传入info时复用已解析结果, 不再重新请求页面)
+        
+        未指定output_path时在临时目录分配并固定(pin)路径, 用完后须调用 storage.release
+        """
         if not yt_dlp:
             raise ImportError("yt-dlp is required")
         
         if output_path is None:
-            output_path = self.temp_dir / f"{uuid.uuid4()}.mp4"
+            output_path = storage.allocate("temp", ".mp4", expected_bytes=(info or {}).get('filesize_approx') or 0)
         
         ydl_opts = {
             'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
@@ -96,49 +201,75 @@ class BilibiliProcessor(SourceProcessor):
             'merge_output_format': 'mp4',
         }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        # 取消时由进度回调中止下载线程
+        cancelled = threading.Event()
+        
+        def check_cancelled(_status: dict) -> None:
+            if cancelled.is_set():
+                raise yt_dlp.utils.DownloadCancelled()
+        
+        ydl_opts['progress_hooks'] = [check_cancelled]
+        
+        try:
+            await run_blocking(_download, url, ydl_opts, info)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
         
         return output_path
     
+    async def download_audio(
+        self,
+        url: str,
+        output_path: Optional[Path] = None,
+        info: Optional[dict] = None
+    ) -> Path:
+        """仅下载音频流, 一次ffmpeg直接转为16kHz单声道PCM (不落地mp4/mp3)
+        
+        未指定output_path时在临时目录分配并固定(pin)路径, 用完后须调用 storage.release
+        """
+        if info is None:
+            info = await self.resolve_info(url)
+        if output_path is None:
+            # 16kHz单声道16bit PCM: 每秒32000字节
+            output_path = storage.allocate("temp", ".wav", expected_bytes=int((info.get('duration') or 0) * 32000))
+        fmt = select_audio_format(info)
+        headers = fmt.get('http_headers') or info.get('http_headers')
+        
+        try:
+            await run_process(pcm_command(fmt['url'], output_path, headers))
+        except BaseException:
+            storage.release(output_path, delete=True)
+            raise
+        return output_path
+    
     async def extract_audio(self, video_path: Path) -> Path:
-        """从视频提取音频"""
-        audio_path = video_path.with_suffix('.mp3')
+        """从视频提取音频 (16kHz单声道PCM, Whisper可直接读取); 返回的路径已固定, 用完后须调用 storage.release"""
+        audio_path = video_path.with_suffix('.wav')
+        storage.acquire(audio_path)
         
         cmd = [
             'ffmpeg', '-i', str(video_path),
-            '-vn', '-acodec', 'libmp3lame', '-q:a', '2',
+            '-vn', '-ac', '1', '-ar', '16000', '-c:a', 'pcm_s16le',
             '-y', str(audio_path)
         ]
         
-        subprocess.run(cmd, check=True, capture_output=True)
+        try:
+            await run_process(cmd)
+        except BaseException:
+            storage.release(audio_path, delete=True)
+            raise
         return audio_path
     
     async def transcribe_audio(
         self, 
         audio_path: Path, 
         model_size: str = "base",
-        language: str = "zh"
+        language: str = "zh",
+        threads: Optional[int] = None
     ) -> Dict[str, Any]:
-        """转录音频为文本"""
-        if not whisper:
-            raise ImportError("whisper is required. Install with: pip install openai-whisper")
-        
-        model = whisper.load_model(model_size)
-        result = model.transcribe(str(audio_path), language=language)
-        
-        return {
-            'text': result['text'],
-            'segments': [
-                {
-                    'start': seg['start'],
-                    'end': seg['end'],
-                    'text': seg['text']
-                }
-                for seg in result['segments']
-            ],
-            'language': result.get('language', language)
-        }
+        """转录音频为文本 (长音频按静音切分后多进程并行转录; 任务取消时终止正在转录的分块)"""
+        return await atranscribe_file(audio_path, model_size=model_size, language=language, threads=threads)
     
     async def extract_content(
         self, 
@@ -147,16 +278,263 @@ class BilibiliProcessor(SourceProcessor):
         model_size: str = "base",
         language: str = "zh",
         keep_video: bool = False,
+        prefer_subtitles: bool = True,
+        progressive: bool = False,
+        progress: Optional[Callable[[str, str], None]] = None,
         **options
     ) -> UnifiedContent:
-        """完整提取流程：元数据 + 视频下载 + 音频提取 + 转录"""
+        """完整提取流程：元数据 + 字幕 (有可用字幕时直接返回) / 音频下载 (keep_video时下载视频再提取音频) + 转录
+        
+        progressive=True 时先返回草稿 (自动字幕或WHISPER_DRAFT_MODEL转录), 状态为"refining",
+        再在后台用model_size精修并整体替换full_text与sections。
+        """
+        
+        # 0. 转录缓存 (命中时不访问网络)
+        url_source_id = self.get_source_id(url)
+        use_subtitles = prefer_subtitles and config.SUBTITLE_FAST_PATH and not keep_video
+        if transcribe and url_source_id:
+            cached = self._cached(url_source_id, model_size, language, use_subtitles)
+            if cached:
+                _report(progress, "cache", f"命中转录缓存: {url_source_id}")
+                content = self._build_content(url, cached.metadata)
+                self._apply_transcript(content, cached.text, cached.segments, cached.transcription_model)
+                return content
         
         # 1. 提取元数据
-        print(f"[1/4] 提取元数据: {url}")
-        metadata = await self.extract_metadata(url)
+        _report(progress, "metadata", f"[1/4] 提取元数据: {url}")
+        info = await self.resolve_info(url)
+        metadata = self._metadata_from_info(info)
+        content = self._build_content(url, metadata)
         
+        if not transcribe:
+            return content
+        
+        # 1.5 平台字幕 (CC / AI字幕) 优先, 质量不达标时回退到转录
+        if use_subtitles:
+            subtitle = await run_blocking(fetch_subtitles, info, language)
+            if subtitle:
+                _report(progress, "subtitle", f"使用平台字幕: {subtitle.language} (质量 {subtitle.score})")
+                transcription_model = f"subtitle:{subtitle.language}"
+                transcript = {'text': subtitle.text, 'segments': subtitle.segments, 'language': subtitle.language}
+                self._apply_transcript(content, subtitle.text, subtitle.segments, transcription_model)
+                if progressive and subtitle.automatic:
+                    # 自动字幕仅作为草稿, 后台下载音频并精修 (草稿不写入缓存)
+                    self._start_refinement(
+                        content, url, info, None, None,
+                        await self._refine_model(model_size, metadata, progress), model_size, language, metadata, progress,
+                    )
+                    return content
+                # 字幕按独立的键缓存, 不冒充Whisper模型的转录结果
+                await run_blocking(
+                    transcript_cache.put,
+                    self.source_type.value,
+                    url_source_id or content.source_id,
+                    subtitles.cache_key(language),
+                    language,
+                    transcript,
+                    transcription_model,
+                    metadata=metadata,
+                )
+                return content
+        
+        video_path = None
+        audio_path = None
+        
+        try:
+            if keep_video:
+                # 2. 下载视频
+                _report(progress, "download", "[2/4] 下载视频...")
+                async with stage_limits.stage("download"):
+                    video_path = await self.download_video(url, info=info)
+                
+                # 3. 提取音频
+                _report(progress, "decode", "[3/4] 提取音频...")
+                async with stage_limits.stage("decode"):
+                    audio_path = await self.extract_audio(video_path)
+            else:
+                # 2-3. 仅下载音频并直接解码为PCM
+                _report(progress, "download", "[2/4] 下载音频...")
+                async with stage_limits.stage("download"):
+                    audio_path = await self.download_audio(url, info=info)
+            
+            # 4. 转录 (相同音频内容按哈希复用)
+            audio_hash = await run_blocking(hash_file, audio_path)
+            cached = transcript_cache.get_by_audio(audio_hash, model_size, language)
+            refine_model = None
+            cache_model = model_size
+            if cached:
+                _report(progress, "cache", f"命中音频哈希缓存: {audio_hash[:12]}")
+                transcript = {'text': cached.text, 'segments': cached.segments, 'language': cached.language}
+                transcription_model = cached.transcription_model
+            else:
+                if progressive:
+                    refine_model = await self._refine_model(model_size, metadata, progress)
+                    if refine_model == config.WHISPER_DRAFT_MODEL:
+                        refine_model = None
+                if refine_model:
+                    # 草稿只按草稿模型缓存, 不占用目标模型的缓存键
+                    cache_model = config.WHISPER_DRAFT_MODEL
+                transcript, transcription_model = await self._transcribe_timed(
+                    audio_path, cache_model, language, metadata, progress
+                )
+            
+            self._apply_transcript(content, transcript['text'], transcript['segments'], transcription_model)
+            await run_blocking(
+                transcript_cache.put,
+                self.source_type.value,
+                url_source_id or content.source_id,
+                cache_model,
+                language,
+                transcript,
+                transcription_model,
+                metadata=metadata,
+                audio_hash=audio_hash,
+            )
+            if refine_model:
+                self._start_refinement(
+                    content, url, info, audio_path, audio_hash, refine_model, model_size, language, metadata, progress
+                )
+                audio_path = None  # 由精修任务负责清理
+            
+        finally:
+            # 清理临时文件 (keep_video时视频保留在临时目录, 由配额按LRU回收)
+            storage.release(audio_path, delete=True)
+            storage.release(video_path, delete=not keep_video)
+        
+        return content
+    
+    def _cached(self, source_id: str, model_size: str, language: str, use_subtitles: bool):
+        """按模型查找转录缓存; use_subtitles时再查找字幕缓存 (旧版本写在模型键下的字幕不算命中)"""
+        cached = transcript_cache.get(self.source_type.value, source_id, model_size, language)
+        if cached and not subtitles.is_subtitle(cached.transcription_model):
+            return cached
+        if use_subtitles:
+            return transcript_cache.get(self.source_type.value, source_id, subtitles.cache_key(language), language)
+        return None
+    
+    async def _transcribe_timed(
+        self,
+        audio_path: Path,
+        model_size: str,
+        language: str,
+        metadata: dict,
+        progress: Optional[Callable[[str, str], None]],
+    ) -> Tuple[Dict[str, Any], str]:
+        """在transcribe阶段限流下转录, 返回 (转录结果, 实际使用的模型); VAD与选模决策写入metadata"""
+        # model_size="auto": 按时长、排队深度与可用核数选择模型
+        run_model, threads, decision = model_size, None, None
+        if model_size == "auto":
+            decision = model_policy.choose(
+                metadata.get('duration') or 0, stage_limits.waiting("transcribe"), cpu_budget()
+            )
+            run_model, threads = decision.model_size, decision.threads
+            _report(progress, "transcribe", f"自动选模: {run_model} ({decision.reason})")
+        _report(progress, "transcribe", f"[4/4] 转录音频 (模型: {run_model})...")
+        async with stage_limits.stage("transcribe"):
+            started = time.monotonic()
+            transcript = await self.transcribe_audio(audio_path, run_model, language, threads=threads)
+            elapsed = time.monotonic() - started
+        if decision:
+            metadata['transcription_policy'] = model_policy.observe(decision, elapsed)
+        if transcript.get('vad'):
+            # 记录VAD节省的比例 (随元数据写入缓存)
+            metadata['vad'] = transcript['vad']
+            _report(progress, "vad", f"VAD跳过了 {transcript['vad']['skipped_ratio']:.1%} 的音频")
+        return transcript, run_model
+    
+    async def _refine_model(
+        self,
+        model_size: str,
+        metadata: dict,
+        progress: Optional[Callable[[str, str], None]] = None,
+    ) -> str:
+        """精修所用模型: auto时草稿已满足延迟目标, 取策略建议的更大模型
+
+        与非渐进路径一致, 选模决策写入metadata['transcription_policy'] 并上报进度, 便于审计auto的选择。
+        """
+        if model_size != "auto":
+            return model_size
+        decision = model_policy.choose(
+            metadata.get('duration') or 0, stage_limits.waiting("transcribe"), cpu_budget()
+        )
+        refine_model = decision.refine_model or decision.model_size
+        metadata['transcription_policy'] = {**decision.to_dict(), "refine_with": refine_model}
+        _report(progress, "transcribe", f"自动选模: 精修使用 {refine_model} ({decision.reason})")
+        return refine_model
+    
+    def _start_refinement(
+        self,
+        content: UnifiedContent,
+        url: str,
+        info: dict,
+        audio_path: Optional[Path],
+        audio_hash: Optional[str],
+        refine_model: str,
+        cache_model: str,
+        language: str,
+        metadata: dict,
+        progress: Optional[Callable[[str, str], None]],
+    ) -> None:
+        content.transcript_status = "refining"
+        _report(progress, "draft", f"草稿转录已就绪 ({content.transcription_model}), 后台精修 (模型: {refine_model})")
+        refinements.start(
+            content.content_id,
+            self._refine(content, url, info, audio_path, audio_hash, refine_model, cache_model, language, metadata),
+        )
+    
+    async def _refine(
+        self,
+        content: UnifiedContent,
+        url: str,
+        info: dict,
+        audio_path: Optional[Path],
+        audio_hash: Optional[str],
+        refine_model: str,
+        cache_model: str,
+        language: str,
+        metadata: dict,
+    ) -> None:
+        """后台精修: 用更大的模型重新转录, 完成后整体替换草稿"""
+        def notify(stage: str, message: str) -> None:
+            refinements.notify(content.content_id, stage, message)
+        
+        try:
+            if audio_path is None:
+                notify("refine", "下载音频用于精修...")
+                async with stage_limits.stage("download"):
+                    audio_path = await self.download_audio(url, info=info)
+                audio_hash = await run_blocking(hash_file, audio_path)
+            notify("refine", f"后台精修转录 (模型: {refine_model})...")
+            transcript, transcription_model = await self._transcribe_timed(
+                audio_path, refine_model, language, metadata, notify
+            )
+            # 同步替换 (期间无await), 读取方不会看到草稿与精修稿混杂的内容
+            self._apply_transcript(content, transcript['text'], transcript['segments'], transcription_model)
+            content.transcript_status = "final"
+            await run_blocking(
+                transcript_cache.put,
+                self.source_type.value,
+                content.source_id,
+                cache_model,
+                language,
+                transcript,
+                transcription_model,
+                metadata=metadata,
+                audio_hash=audio_hash,
+            )
+            notify("refined", f"精修完成 (模型: {transcription_model})")
+        except asyncio.CancelledError:
+            content.transcript_status = "refine_failed"
+            raise
+        except Exception as exc:
+            content.transcript_status = "refine_failed"
+            notify("refine_failed", f"精修失败, 保留草稿: {exc}")
+        finally:
+            storage.release(audio_path, delete=True)
+    
+    def _build_content(self, url: str, metadata: dict) -> UnifiedContent:
+        """由元数据构建UnifiedContent (尚无转录内容)"""
         source_id = self.get_source_id(url) or metadata.get('id', '')
-        content_id = str(uuid.uuid4())
         
         # 解析上传日期
         upload_date = None
@@ -166,9 +544,8 @@ class BilibiliProcessor(SourceProcessor):
             except ValueError:
                 pass
         
-        # 初始化UnifiedContent
-        content = UnifiedContent(
-            content_id=content_id,
+        return UnifiedContent(
+            content_id=str(uuid.uuid4()),
             source_type=SourceType.BILIBILI,
             source_url=url,
             source_id=source_id,
@@ -179,69 +556,121 @@ class BilibiliProcessor(SourceProcessor):
             description=metadata.get('description', ''),
             raw_metadata=metadata,
         )
+    
+    def _apply_transcript(
+        self,
+        content: UnifiedContent,
+        text: str,
+        segments: list,
+        transcription_model: str
+    ) -> None:
+        """写入转录文本, 并将segments转换为列式存储的sections (标题按需生成)"""
+        sections = CompactTranscript.from_segments(segments)
+        content.full_text = text
+        content.transcription_model = transcription_model
+        content.sections = sections
+    
+    async def stream_sections(
+        self,
+        url: str,
+        model_size: str = "base",
+        language: str = "zh",
+        prefer_subtitles: bool = True,
+        **options
+    ) -> AsyncIterator[Section]:
+        """流式转录: 每个音频块解码完成后立即产出对应的Section
         
-        if not transcribe:
-            return content
+        与extract_content共用转录缓存与字幕快速通道: 缓存命中或有可用平台字幕时直接产出全部Section,
+        否则边转录边产出, 完整转录结束后写入缓存; 中途放弃的流不写入。
+        """
+        url_source_id = self.get_source_id(url)
+        use_subtitles = prefer_subtitles and config.SUBTITLE_FAST_PATH
+        if url_source_id:
+            cached = self._cached(url_source_id, model_size, language, use_subtitles)
+            if cached:
+                for section in self._replay_sections(cached.segments):
+                    yield section
+                return
+        
+        info = await self.resolve_info(url)
+        metadata = self._metadata_from_info(info)
+        
+        if use_subtitles:
+            subtitle = await run_blocking(fetch_subtitles, info, language)
+            if subtitle:
+                await run_blocking(
+                    transcript_cache.put,
+                    self.source_type.value,
+                    url_source_id or metadata.get('id', ''),
+                    subtitles.cache_key(language),
+                    language,
+                    {'text': subtitle.text, 'segments': subtitle.segments, 'language': subtitle.language},
+                    f"subtitle:{subtitle.language}",
+                    metadata=metadata,
+                )
+                for section in self._replay_sections(subtitle.segments):
+                    yield section
+                return
         
-        video_path = None
         audio_path = None
         
         try:
-            # 2. 下载视频
-            print(f"[2/4] 下载视频...")
-            video_path = await self.download_video(url)
-            
-            # 3. 提取音频
-            print(f"[3/4] 提取音频...")
-            audio_path = await self.extract_audio(video_path)
+            async with stage_limits.stage("download"):
+                audio_path = await self.download_audio(url, info=info)
             
-            # 4. 转录
-            print(f"[4/4] 转录音频 (模型: {model_size})...")
-            transcript = await self.transcribe_audio(audio_path, model_size, language)
-            
-            # 更新内容
-            content.full_text = transcript['text']
-            content.transcription_model = model_size
-            
-            # 转换segments为sections
-            content.sections = [
-                Section(
-                    title=f"段落 {i+1}",
-                    content=seg['text'],
-                    start_time=seg['start'],
-                    end_time=seg['end']
-                )
-                for i, seg in enumerate(transcript['segments'])
-            ]
+            # 相同音频内容按哈希复用
+            audio_hash = await run_blocking(hash_file, audio_path)
+            cached = transcript_cache.get_by_audio(audio_hash, model_size, language)
+            if cached:
+                transcript = {'text': cached.text, 'segments': cached.segments, 'language': cached.language}
+                transcription_model = cached.transcription_model
+                for section in self._replay_sections(cached.segments):
+                    yield section
+            else:
+                transcription_model = model_size
+                if model_size == "auto":
+                    transcription_model = model_policy.choose(
+                        info.get('duration') or 0, stage_limits.waiting("transcribe"), cpu_budget()
+                    ).model_size
+                
+                collected = []
+                async with stage_limits.stage("transcribe"):
+                    async for segments in iter_transcription(audio_path, transcription_model, language):
+                        for seg in segments:
+                            collected.append(seg)
+                            yield self._section(len(collected), seg)
+                transcript = {
+                    'text': "".join(seg['text'] for seg in collected),
+                    'segments': collected,
+                    'language': language,
+                }
             
+            await run_blocking(
+                transcript_cache.put,
+                self.source_type.value,
+                url_source_id or metadata.get('id', ''),
+                model_size,
+                language,
+                transcript,
+                transcription_model,
+                metadata=metadata,
+                audio_hash=audio_hash,
+            )
         finally:
-            # 清理临时文件
-            if audio_path and audio_path.exists():
-                audio_path.unlink()
-            if video_path and video_path.exists() and not keep_video:
-                video_path.unlink()
-        
-        return content
+            storage.release(audio_path, delete=True)
+    
+    @staticmethod
+    def _section(index: int, seg: dict) -> Section:
+        return Section(title=f"段落 {index}", content=seg['text'], start_time=seg['start'], end_time=seg['end'])
+    
+    def _replay_sections(self, segments: list) -> Iterator[Section]:
+        """按缓存的segments依次产出Section (与实时转录的编号一致)"""
+        for index, seg in enumerate(segments, start=1):
+            yield self._section(index, seg)
     
     def format_transcript_srt(self, content: UnifiedContent) -> str:
-        """格式化为SRT字幕"""
-        def format_time(seconds: float) -> str:
-            h = int(seconds // 3600)
-            m = int((seconds % 3600) // 60)
-            s = int(seconds % 60)
-            ms = int((seconds % 1) * 1000)
-            return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
-        
-        lines = []
-        for i, section in enumerate(content.sections, 1):
-            if section.start_time is not None and section.end_time is not None:
-                lines.append(str(i))
-                lines.append(f"{format_time(section.start_time)} --> {format_time(section.end_time)}")
-                lines.append(section.content)
-                lines.append("")
-        
-        return "\n".join(lines)
-
+        """格式化为SRT字幕 (API导出使用同一个流式生成器)"""
+        return "".join(iter_srt(content.sections))
 
 # 注册处理器
 SourceRegistry.register(BilibiliProcessor())
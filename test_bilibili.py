@@ -62,7 +62,8 @@ async def test_full_extraction(url: str, model_size: str = "base"):
             url,
             transcribe=True,
             model_size=model_size,
-            language="zh"
+            language="zh",
+            progress=lambda stage, message: print(f"  [{stage}] {message}")
         )
         
         print("\n✅ 提取完成!")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+批量导入测试: 停机或崩溃中断的批次在重启后只续跑未完成的条目, 失败条目可手动重试
+用法: pytest test_bulk_ingest.py
+
+列表枚举与单条提取以本地假实现替代, 批次状态写入临时目录, 无需网络。
+"""
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.models.unified import SourceType, UnifiedContent
+from src.services import bulk_ingest
+from src.services.bulk_ingest import Batch, BatchItem, BatchManager
+
+
+LIST_URL = "https://space.bilibili.com/1/lists/1"
+ENTRY_URLS = [f"https://example.invalid/video/{index}" for index in range(4)]
+
+
+class FakeProcessor:
+    """按URL产出内容; block 中的URL一直挂起, fail 中的URL抛出异常"""
+
+    def __init__(self, block=(), fail=()):
+        self.block = set(block)
+        self.fail = set(fail)
+        self.calls = []
+
+    async def list_entries(self, url, limit=None):
+        return "list", [{"url": entry, "title": entry.rsplit("/", 1)[-1]} for entry in ENTRY_URLS]
+
+    async def extract_content(self, url, progress=None, **options):
+        self.calls.append(url)
+        if url in self.block:
+            await asyncio.Event().wait()
+        if url in self.fail:
+            raise RuntimeError(f"cannot extract {url}")
+        return UnifiedContent(
+            content_id=f"content-{url.rsplit('/', 1)[-1]}",
+            source_type=SourceType.BILIBILI,
+            source_url=url,
+            source_id=url,
+            title="t",
+            author="a",
+            full_text=url,
+        )
+
+
+def _patch(processor: FakeProcessor):
+    """让SourceRegistry对所有URL返回假处理器; 返回恢复函数"""
+
+    class FakeRegistry:
+        @staticmethod
+        def get_processor(url):
+            return processor
+
+        @staticmethod
+        def get_list_processor(url):
+            return processor
+
+    originals = (bulk_ingest.SourceRegistry, config.BATCH_CONCURRENCY)
+    bulk_ingest.SourceRegistry = FakeRegistry
+    config.BATCH_CONCURRENCY = len(ENTRY_URLS)
+
+    def restore():
+        bulk_ingest.SourceRegistry, config.BATCH_CONCURRENCY = originals
+
+    return restore
+
+
+async def _wait_until(predicate, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def _statuses(batch) -> list:
+    return [item.status for item in batch.items]
+
+
+def test_batch_interrupted_by_shutdown_resumes_unfinished_items_only():
+    store = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        first = FakeProcessor(block=[ENTRY_URLS[2]], fail=[ENTRY_URLS[3]])
+        restore = _patch(first)
+        try:
+            async def interrupted():
+                manager = BatchManager(store, root=Path(tmp))
+                await manager.start()
+                batch = manager.submit(LIST_URL)
+                await _wait_until(lambda: _statuses(batch) == ["completed", "completed", "running", "failed"])
+                await manager.stop()
+                return batch
+
+            batch = asyncio.run(interrupted())
+        finally:
+            restore()
+        saved = json.loads((Path(tmp) / f"{batch.batch_id}.json").read_text(encoding="utf-8"))
+        assert saved["status"] == "interrupted"
+        assert [item["status"] for item in saved["items"]] == ["completed", "completed", "pending", "failed"]
+
+        second = FakeProcessor()
+        restore = _patch(second)
+        try:
+            async def resumed():
+                manager = BatchManager(store, root=Path(tmp))
+                await manager.start()
+                resumed_batch = manager.get(batch.batch_id)
+                await resumed_batch.task
+                return resumed_batch
+
+            batch = asyncio.run(resumed())
+        finally:
+            restore()
+    # 只重跑被中断的条目; 已完成与已失败的条目不再提取
+    assert second.calls == [ENTRY_URLS[2]]
+    assert batch.status == "completed"
+    assert _statuses(batch) == ["completed", "completed", "completed", "failed"]
+
+
+def test_item_running_when_the_process_died_is_retried():
+    with tempfile.TemporaryDirectory() as tmp:
+        # 进程在第二个条目运行中途被杀: 磁盘上留下 running 状态
+        batch = Batch(batch_id="crashed", url=LIST_URL, options={}, status="running", items=[
+            BatchItem(index=0, url=ENTRY_URLS[0], status="failed", error="earlier"),
+            BatchItem(index=1, url=ENTRY_URLS[1], status="running", started_at=1.0),
+        ])
+        (Path(tmp) / "crashed.json").write_text(json.dumps(batch.to_dict()), encoding="utf-8")
+        processor = FakeProcessor()
+        restore = _patch(processor)
+        try:
+            async def run():
+                manager = BatchManager({}, root=Path(tmp))
+                await manager.start()
+                batch = manager.get("crashed")
+                await batch.task
+                return manager, batch
+
+            manager, batch = asyncio.run(run())
+        finally:
+            restore()
+    assert processor.calls == [ENTRY_URLS[1]]
+    assert _statuses(batch) == ["failed", "completed"] and batch.status == "completed"
+    assert manager.report(batch)["failures"] == [{"index": 0, "url": ENTRY_URLS[0], "error": "earlier"}]
+
+
+def test_resume_retries_failed_items():
+    store = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = FakeProcessor(fail=[ENTRY_URLS[1]])
+        restore = _patch(processor)
+        try:
+            async def run():
+                manager = BatchManager(store, root=Path(tmp))
+                batch = manager.submit(LIST_URL)
+                await batch.task
+                assert _statuses(batch) == ["completed", "failed", "completed", "completed"]
+                processor.fail.clear()
+                processor.calls.clear()
+                await manager.resume(batch.batch_id).task
+                return batch
+
+            batch = asyncio.run(run())
+        finally:
+            restore()
+    assert processor.calls == [ENTRY_URLS[1]]
+    assert _statuses(batch) == ["completed"] * 4 and batch.error is None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+列式转录存储测试: 切片与 between() 视图、缺失时间、自定义标题与digest
+用法: pytest test_compact_transcript.py
+
+纯数据结构测试, 无需网络。
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.models.transcript import CompactTranscript
+from src.models.unified import Section
+
+
+def _transcript() -> CompactTranscript:
+    # 段落 i 覆盖 [10i, 10i+10)
+    return CompactTranscript.from_segments({"start": 10.0 * i, "end": 10.0 * i + 10, "text": f"t{i}"} for i in range(6))
+
+
+def test_between_selects_overlapping_sections():
+    transcript = _transcript()
+    assert [s.content for s in transcript.between(15, 35)] == ["t1", "t2", "t3"]
+    # 区间左闭右开: 恰好在end开始的段落不包含, 恰好在start结束的段落也不包含
+    assert [s.content for s in transcript.between(20, 30)] == ["t2"]
+    assert [s.content for s in transcript.between(None, 10)] == ["t0"]
+    assert [s.content for s in transcript.between(45, None)] == ["t4", "t5"]
+    assert len(transcript.between()) == 6
+    assert not transcript.between(100, 200)
+    assert not transcript.between(30, 20)
+
+
+def test_between_on_a_view_stays_inside_it():
+    transcript = _transcript()
+    view = transcript[1:4]
+    assert [s.content for s in view.between(0, 100)] == ["t1", "t2", "t3"]
+    assert [s.content for s in view.between(35)] == ["t3"]
+    # 视图与原对象共享底层存储, 标题保留原编号
+    assert view.between(0, 15)._starts is transcript._starts
+    assert view.between(0, 15)[0].title == "段落 2"
+
+
+def test_slicing_and_indexing():
+    transcript = _transcript()
+    view = transcript[2:5]
+    assert len(view) == 3 and view.text == "t2t3t4"
+    assert view[0].title == "段落 3" and view[-1].content == "t4"
+    assert [s.content for s in view[1:]] == ["t3", "t4"]
+    assert len(transcript[4:2]) == 0
+    try:
+        transcript[::2]
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("non-contiguous slice accepted")
+    try:
+        view[3]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("index past the view accepted")
+
+
+def test_missing_times_round_trip_as_none():
+    transcript = CompactTranscript.from_segments([{"start": None, "end": None, "text": "x"}, {"start": 1.0, "end": 2.0, "text": "y"}])
+    assert transcript[0].start_time is None and transcript[0].end_time is None
+    assert transcript.to_dicts()[0] == {"title": "段落 1", "content": "x", "start_time": None, "end_time": None}
+
+
+def test_from_sections_keeps_custom_titles_and_equality():
+    sections = [Section("开场", "a", 0.0, 1.0), Section("正文", "bc", 1.0, 3.0)]
+    transcript = CompactTranscript.from_sections(sections)
+    assert transcript == sections
+    assert [s.title for s in transcript] == ["开场", "正文"]
+    assert CompactTranscript.of(transcript) is transcript
+    default = CompactTranscript.from_sections([Section("段落 1", "a", 0.0, 1.0)])
+    assert default._titles is None
+
+
+def test_digest_depends_on_view_content():
+    transcript = _transcript()
+    assert transcript[1:3].digest == _transcript()[1:3].digest
+    assert transcript[1:3].digest != transcript[1:4].digest
+    renamed = CompactTranscript.from_sections([Section("x", s.content, s.start_time, s.end_time) for s in transcript])
+    assert renamed.digest != transcript.digest
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+内容接口测试: /content/{id} 的时间窗口、分页、字段选择、NDJSON输出与压缩协商
+用法: pytest test_content_api.py
+
+直接向内存存储放入内容, 通过TestClient调用路由, 无需网络。
+"""
+import sys
+import json
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.models.transcript import CompactTranscript
+from src.models.unified import SourceType, UnifiedContent
+
+
+CONTENT_ID = "content-window"
+
+
+def _client() -> TestClient:
+    # 段落 i 覆盖 [10i, 10i+10)
+    sections = CompactTranscript.from_segments({"start": 10.0 * i, "end": 10.0 * i + 10, "text": f"t{i}"} for i in range(10))
+    routes.content_store[CONTENT_ID] = UnifiedContent(
+        content_id=CONTENT_ID,
+        source_type=SourceType.BILIBILI,
+        source_url="https://www.bilibili.com/video/BV1window",
+        source_id="BV1window",
+        title="窗口",
+        author="a",
+        full_text=sections.text,
+        sections=sections,
+    )
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def _get(params=None, headers=None):
+    return _client().get(f"/api/v1/content/{CONTENT_ID}", params=params, headers=headers)
+
+
+def _contents(payload) -> list:
+    return [section["content"] for section in payload["sections"]]
+
+
+def test_full_content_has_no_paging_fields():
+    payload = _get().json()
+    assert _contents(payload) == [f"t{i}" for i in range(10)]
+    assert payload["full_text"] == "".join(f"t{i}" for i in range(10))
+    assert "total_sections" not in payload and "next_offset" not in payload
+
+
+def test_time_window_selects_overlapping_sections():
+    payload = _get({"start": 15, "end": 45}).json()
+    assert _contents(payload) == ["t1", "t2", "t3", "t4"]
+    # 窗口内的full_text只含窗口段落
+    assert payload["full_text"] == "t1t2t3t4"
+    assert payload["total_sections"] == 4 and payload["next_offset"] is None
+    assert payload["sections"][0]["start_time"] == 10.0
+
+
+def test_pagination_walks_the_window():
+    pages, offset = [], 0
+    while offset is not None:
+        payload = _get({"start": 20, "offset": offset, "limit": 3}).json()
+        assert payload["total_sections"] == 8
+        pages.append(_contents(payload))
+        offset = payload["next_offset"]
+    assert pages == [["t2", "t3", "t4"], ["t5", "t6", "t7"], ["t8", "t9"]]
+    assert _get({"offset": 20, "limit": 3}).json()["sections"] == []
+
+
+def test_field_selection_and_validation():
+    payload = _get({"fields": "title,text", "end": 20}).json()
+    assert payload == {"title": "窗口", "full_text": "t0t1"}
+    response = _get({"fields": "sections,bogus"})
+    assert response.status_code == 400 and "bogus" in response.json()["detail"]
+    assert _get({"limit": 0}).status_code == 422
+    assert _client().get("/api/v1/content/missing").status_code == 404
+
+
+def test_ndjson_streams_header_then_sections():
+    response = _get({"format": "ndjson", "start": 60, "limit": 2})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "content" and lines[0]["total_sections"] == 4
+    assert "sections" not in lines[0] and lines[0]["full_text"] == "t6t7t8t9"
+    assert [(line["type"], line["content"]) for line in lines[1:]] == [("section", "t6"), ("section", "t7")]
+    # 未选择sections时只输出首行
+    assert len(_get({"format": "ndjson", "fields": "title"}).text.splitlines()) == 1
+
+
+def test_response_is_gzipped_when_accepted():
+    plain = _get(headers={"Accept-Encoding": "identity"})
+    gzipped = _get(headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers.get("content-encoding") == "gzip"
+    assert gzipped.json() == plain.json()
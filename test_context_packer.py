@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+上下文打包测试: 打包结果始终不超出token预算, 按优先级保留、按上限截断、放不下的段落被丢弃并记入报告
+用法: pytest test_context_packer.py
+
+纯文本处理, 无需API密钥。
+"""
+import sys
+import json
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core_agents.skill_generator import build_prompt
+from src.services.context_packer import ContextSection, pack_context, shrink
+from src.services.tokens import count_tokens
+
+
+def _records(count: int, words: int = 60) -> list:
+    return [
+        {"title": f"result {index}", "content": "detail " * words, "url": f"https://example.com/{index}", "score": None}
+        for index in range(count)
+    ]
+
+
+def _sections() -> list:
+    return [
+        ContextSection("web_search", _records(20), priority=30, fields=["title", "content"], max_items=5),
+        ContextSection("sources", "来源说明" * 300, priority=90),
+        ContextSection("notes", {"summary": "short", "steps": ["step " * 40 for _ in range(30)]}, priority=60, max_tokens=200),
+    ]
+
+
+def test_prompt_stays_within_budget():
+    for budget in (80, 200, 500, 1500, 6000):
+        prompt, report = pack_context(_sections(), budget, header="Task: demo\nContext:")
+        assert count_tokens(prompt) <= budget, budget
+        assert report["prompt_tokens"] == count_tokens(prompt) <= budget
+        assert prompt.startswith("Task: demo")
+
+
+def test_priority_decides_what_survives():
+    prompt, report = pack_context(_sections(), 400)
+    # 高优先级的sources先占预算, 低优先级的段落被丢弃
+    assert "## sources" in prompt and "sources" in report["trimmed"]
+    assert "web_search" in report["dropped"] and "## web_search" not in prompt
+    assert report["sections"]["web_search"]["packed"] == 0
+
+
+def test_sections_keep_their_original_order():
+    prompt, _ = pack_context(_sections(), 10_000)
+    positions = [prompt.index(f"## {name}") for name in ("web_search", "sources", "notes")]
+    assert positions == sorted(positions)
+
+
+def test_fields_items_and_caps_are_applied():
+    prompt, report = pack_context(_sections(), 10_000)
+    block = prompt.split("## web_search\n", 1)[1].split("\n## ", 1)[0]
+    records = json.loads(block)
+    # 只保留指定字段与前max_items条, 空值被去掉
+    assert len(records) == 5 and all(set(record) == {"title", "content"} for record in records)
+    assert report["sections"]["notes"]["packed"] <= 200 and "notes" in report["trimmed"]
+
+
+def test_shrink_cuts_strings_before_dropping_items():
+    value = [{"name": "a", "content": "word " * 200}, {"name": "b", "content": "short"}]
+    fitted = shrink(value, 80)
+    assert count_tokens(json.dumps(fitted, ensure_ascii=False, separators=(",", ":"))) <= 80
+    assert [item["name"] for item in fitted] == ["a", "b"]
+    assert fitted[0]["content"].endswith("…")
+    assert shrink({"content": "x"}, 1) is None
+
+
+def test_oversized_header_is_truncated_too():
+    prompt, _ = pack_context(_sections(), 100, header="Task: " + "very long task " * 100)
+    assert count_tokens(prompt) <= 100
+
+
+def test_skill_generator_prompt_respects_budget():
+    context = {
+        "sources": "来源" * 2000,
+        "web_search": _records(30, words=200),
+        "local_skills": [{"name": f"skill {index}", "content": "body " * 500} for index in range(10)],
+        "github": [{"full_name": f"repo/{index}", "description": "d " * 100, "stars": index} for index in range(20)],
+    }
+    for budget in (300, 1200, 4000):
+        prompt, report = build_prompt("写一个技能", context, budget=budget)
+        assert count_tokens(prompt) <= budget and report["budget"] == budget
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+事件循环响应性测试: 提取过程中 (yt-dlp / ffmpeg / 转录均为阻塞操作) 事件循环不应被卡住
+用法: python test_event_loop.py   (或 pytest test_event_loop.py)
+
+yt-dlp、ffmpeg 与 Whisper 均以本地假实现替代, 无需网络。
+(转录在worker进程池中执行, 见 test_transcription_cancel.py)
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.sources import bilibili
+from src.sources.bilibili import BilibiliProcessor
+from src.services.transcript_cache import TranscriptCache
+
+
+STAGE_SECONDS = 0.5
+TEST_URL = "https://www.bilibili.com/video/BV1eventloop"
+
+
+class FakeYoutubeDL:
+    """阻塞式的yt-dlp替身"""
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        time.sleep(STAGE_SECONDS)
+        return {"id": "BV1eventloop", "title": "event loop", "url": "http://example.invalid/audio.m4a"}
+
+
+class FakeYtDlp:
+    YoutubeDL = FakeYoutubeDL
+
+
+def fake_ffmpeg(sleep_seconds: float, pid_file: Path):
+    """返回一个慢速"ffmpeg"命令: 记录pid, 睡眠后写出输出文件"""
+    script = (
+        "import os, sys, time\n"
+        f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+        f"time.sleep({sleep_seconds})\n"
+        "open(sys.argv[1], 'wb').write(b'RIFF')\n"
+    )
+    return lambda url, output_path, headers=None: [sys.executable, "-c", script, str(output_path)]
+
+
+async def fake_transcribe(audio_path, model_size="base", language=None, threads=None):
+    # 真实实现在worker进程中转录, 不占用事件循环
+    await asyncio.sleep(STAGE_SECONDS)
+    return {"text": "你好", "segments": [{"start": 0.0, "end": 1.0, "text": "你好"}], "language": "zh"}
+
+
+def _patch(tmp: Path, ffmpeg_seconds: float, pid_file: Path):
+    """替换bilibili模块中的外部依赖; 返回恢复函数 (测试结束时在finally中调用, 不影响其他测试)"""
+    replacements = {
+        "yt_dlp": FakeYtDlp,
+        "pcm_command": fake_ffmpeg(ffmpeg_seconds, pid_file),
+        "atranscribe_file": fake_transcribe,
+        "transcript_cache": TranscriptCache(root=tmp / "cache"),
+    }
+    originals = {name: getattr(bilibili, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(bilibili, name, value)
+
+    def restore():
+        for name, value in originals.items():
+            setattr(bilibili, name, value)
+
+    return restore
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.02) -> float:
+    """返回心跳的最大延迟 (秒)"""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    last = loop.time()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = loop.time()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+async def _run_responsive(tmp: Path) -> float:
+    processor = BilibiliProcessor()
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop))
+    started = time.monotonic()
+    content = await processor.extract_content(TEST_URL, model_size="base", language="zh")
+    elapsed = time.monotonic() - started
+    stop.set()
+    worst = await beat
+    assert content.full_text == "你好"
+    assert elapsed >= STAGE_SECONDS * 3
+    return worst
+
+
+async def _run_cancel(tmp: Path) -> int:
+    pid_file = tmp / "ffmpeg.pid"
+    processor = BilibiliProcessor()
+    task = asyncio.create_task(processor.extract_content(TEST_URL, model_size="base", language="zh"))
+    for _ in range(200):
+        if pid_file.exists() and pid_file.read_text():
+            break
+        await asyncio.sleep(0.05)
+    pid = int(pid_file.read_text())
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return pid
+
+
+def test_event_loop_stays_responsive():
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), STAGE_SECONDS, Path(tmp) / "ffmpeg.pid")
+        try:
+            worst = asyncio.run(_run_responsive(Path(tmp)))
+        finally:
+            restore()
+    assert worst < 0.2, f"event loop blocked for {worst:.3f}s"
+
+
+def test_cancel_kills_ffmpeg():
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), 30, Path(tmp) / "ffmpeg.pid")
+        try:
+            pid = asyncio.run(_run_cancel(Path(tmp)))
+        finally:
+            restore()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return
+    raise AssertionError(f"ffmpeg child {pid} still running after cancellation")
+
+
+def main():
+    test_event_loop_stays_responsive()
+    print("✓ 提取过程中事件循环保持响应")
+    test_cancel_kills_ffmpeg()
+    print("✓ 取消任务后ffmpeg子进程已终止")
+
+
+if __name__ == "__main__":
+    main()
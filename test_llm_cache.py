@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+LLM响应缓存测试: 请求键归一化、可缓存规则 (采样请求需显式允许, 确定性调用默认缓存)、TTL过期与LRU容量上限
+用法: pytest test_llm_cache.py
+
+使用临时sqlite文件, 无需网络与API密钥。
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.services.llm import _extract_request, _merge_request, _skill_request, _tests_request
+from src.services.llm_cache import LLMCache, request_key
+
+
+def _request(content: str, temperature: float = 0.0, model: str = "m") -> dict:
+    return {
+        "model": model,
+        "temperature": temperature,
+        "response_format": {"type": "json_object"},
+        "messages": [{"role": "system", "content": "sys"}, {"role": "user", "content": content}],
+    }
+
+
+def _settings(**values):
+    """临时修改config; 返回恢复函数"""
+    originals = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    return lambda: [setattr(config, name, value) for name, value in originals.items()]
+
+
+def test_key_ignores_line_endings_and_trailing_whitespace():
+    assert request_key(_request("a  \r\nb\n\n")) == request_key(_request("a\nb"))
+    # 行内空白会改变提示词, 不归一化
+    assert request_key(_request("a b")) != request_key(_request("a  b"))
+
+
+def test_key_covers_model_temperature_and_format():
+    base = request_key(_request("x"))
+    assert request_key(_request("x", model="other")) != base
+    assert request_key(_request("x", temperature=0.3)) != base
+    plain = _request("x")
+    plain.pop("response_format")
+    assert request_key(plain) != base
+    # 请求中的其他字段 (如max_tokens) 不参与键
+    assert request_key({**_request("x"), "max_tokens": 10}) == base
+
+
+def test_cacheability_rules():
+    cache = LLMCache(path=Path(tempfile.gettempdir()) / "unused.sqlite3")
+    restore = _settings(LLM_CACHE_ENABLED=True, LLM_CACHE_SAMPLED=False)
+    try:
+        assert cache.cacheable(_request("x"), None)
+        assert not cache.cacheable(_request("x"), False)
+        # 采样请求 (temperature > 0) 只有调用方显式允许时才缓存
+        assert not cache.cacheable(_request("x", 0.3), None)
+        assert cache.cacheable(_request("x", 0.3), True)
+        config.LLM_CACHE_SAMPLED = True
+        assert cache.cacheable(_request("x", 0.3), None)
+        assert not cache.cacheable(_request("x", 0.3), False)
+        config.LLM_CACHE_ENABLED = False
+        assert not cache.cacheable(_request("x"), True)
+    finally:
+        restore()
+
+
+def test_deterministic_calls_are_cached_by_default():
+    restore = _settings(LLM_CACHE_ENABLED=True, LLM_CACHE_SAMPLED=False)
+    try:
+        cache = LLMCache(path=Path(tempfile.gettempdir()) / "unused.sqlite3")
+        # 提取、合并与测试生成以temperature 0运行, 重复运行命中缓存
+        for request in (_extract_request({"transcript": "x"}), _merge_request("t", []), _tests_request("task", {})):
+            assert request["temperature"] == 0
+            assert cache.cacheable(request, None)
+        # 按提示词生成技能保持采样, 默认不缓存
+        assert not cache.cacheable(_skill_request("prompt"), None)
+    finally:
+        restore()
+
+
+def test_ttl_expires_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(path=Path(tmp) / "llm.sqlite3", ttl_seconds=3600)
+        cache.put("fresh", "1")
+        cache.put("old", "2")
+        cache._conn().execute("UPDATE responses SET created = created - 7200 WHERE key = 'old'")
+        assert cache.get("fresh") == "1"
+        assert cache.get("old") is None
+        assert cache.stats()["entries"] == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_size_bound_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(path=Path(tmp) / "llm.sqlite3", max_bytes=250, ttl_seconds=3600)
+        cache.put("a", "x" * 100)
+        cache.put("b", "x" * 100)
+        conn = cache._conn()
+        conn.execute("UPDATE responses SET accessed = accessed - 20 WHERE key = 'a'")
+        conn.execute("UPDATE responses SET accessed = accessed - 10 WHERE key = 'b'")
+        assert cache.get("a") is not None  # 访问后a比b更新
+        cache.put("c", "x" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.evictions == 1
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+LLM调度测试: 令牌桶、Retry-After解析、429后的退避与暂停、按优先级放行
+用法: pytest test_llm_scheduler.py
+
+429响应在本地构造, 无需网络与API密钥。
+"""
+import sys
+import time
+import asyncio
+from email.utils import formatdate
+from pathlib import Path
+
+import httpx
+import openai
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.services.llm_scheduler import (
+    BACKGROUND,
+    DEFAULT,
+    INTERACTIVE,
+    LLMDeadlineError,
+    LLMScheduler,
+    TokenBucket,
+    retry_after,
+)
+
+
+def _rate_limited(headers: dict) -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://llm.invalid/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_token_bucket_waits_and_refills():
+    bucket = TokenBucket(60)  # 每秒补充1个
+    bucket._updated = 0.0
+    assert bucket.wait_time(60, 0.0) == 0.0
+    bucket.take(60, 0.0)
+    assert bucket.wait_time(1, 0.0) == 1.0
+    assert bucket.wait_time(1, 0.5) == 0.5
+    assert bucket.wait_time(1, 1.0) == 0.0
+    # 补充不超过一分钟的量
+    assert bucket.wait_time(60, 1000.0) == 0.0 and bucket.level == 60
+
+
+def test_token_bucket_oversized_request_waits_for_full_bucket():
+    bucket = TokenBucket(100)
+    bucket._updated = 0.0
+    bucket.take(50, 0.0)
+    # 超过桶容量的请求按整桶计算, 不会永远等待
+    assert bucket.wait_time(1000, 0.0) == 30.0
+    bucket.take(1000, 30.0)
+    assert bucket.level == 0
+
+
+def test_token_bucket_adjust_and_disabled():
+    bucket = TokenBucket(100)
+    bucket._updated = 0.0
+    bucket.take(80, 0.0)
+    bucket.adjust(-50)  # 实际用量比估计少50: 退回
+    assert bucket.level == 70
+    bucket.adjust(-1000)
+    assert bucket.level == 100
+    disabled = TokenBucket(0)
+    disabled.take(10**9, 0.0)
+    assert disabled.wait_time(10**9, 0.0) == 0.0
+
+
+def test_retry_after_parsing():
+    assert retry_after(_rate_limited({"retry-after-ms": "250"})) == 0.25
+    assert retry_after(_rate_limited({"Retry-After": "7"})) == 7.0
+    delay = retry_after(_rate_limited({"Retry-After": formatdate(time.time() + 30, usegmt=True)}))
+    assert 28 <= delay <= 31
+    assert retry_after(_rate_limited({"Retry-After": formatdate(time.time() - 30, usegmt=True)})) == 0.0
+    assert retry_after(_rate_limited({"Retry-After": "soon"})) is None
+    assert retry_after(_rate_limited({})) is None
+    assert retry_after(ValueError("no response")) is None
+
+
+def test_admits_by_priority_then_arrival():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=1)
+    order = []
+    holder = scheduler._enqueue(DEFAULT, 0, lambda: order.append("holder"))
+    assert holder.granted
+    for priority, name in [(BACKGROUND, "background"), (DEFAULT, "default-1"), (INTERACTIVE, "interactive"), (DEFAULT, "default-2")]:
+        scheduler._enqueue(priority, 0, lambda name=name: order.append(name))
+    for _ in range(4):
+        scheduler._release()
+    assert order == ["holder", "interactive", "default-1", "default-2", "background"]
+    assert scheduler.stats()["admitted"] == {"interactive": 1, "default": 3, "background": 1}
+
+
+def test_cancelled_waiter_is_skipped():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=1)
+    order = []
+    scheduler._enqueue(DEFAULT, 0, lambda: order.append("holder"))
+    first = scheduler._enqueue(INTERACTIVE, 0, lambda: order.append("first"))
+    scheduler._enqueue(BACKGROUND, 0, lambda: order.append("second"))
+    assert scheduler._cancel(first)
+    scheduler._release()
+    assert order == ["holder", "second"]
+
+
+def test_retries_after_retry_after_and_pauses_admission():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_retries=3, deadline=10)
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _rate_limited({"retry-after-ms": "300"})
+        return "ok"
+
+    assert asyncio.run(scheduler.acall(call)) == "ok"
+    assert attempts[1] - attempts[0] >= 0.3
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["rate_limited"]) == (1, 1)
+    assert scheduler._paused_until > attempts[0]
+
+
+def test_backoff_without_retry_after_is_capped_full_jitter():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_retries=100, deadline=10**6)
+    exc = openai.APIConnectionError(request=httpx.Request("POST", "http://llm.invalid/v1/chat/completions"))
+    for attempt in range(12):
+        limit = min(config.LLM_BACKOFF_MAX, config.LLM_BACKOFF_BASE * 2**attempt)
+        delays = [scheduler._backoff(exc, attempt, float("inf")) for _ in range(20)]
+        assert all(0 <= delay <= limit for delay in delays)
+    # 连接错误不是限流, 不暂停其他请求的放行
+    assert scheduler.stats()["rate_limited"] == 0 and scheduler._paused_until == 0.0
+
+
+def test_gives_up_when_retry_after_passes_deadline():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_retries=5, deadline=1)
+
+    def call():
+        raise _rate_limited({"Retry-After": "30"})
+
+    started = time.monotonic()
+    try:
+        scheduler.call(call)
+    except LLMDeadlineError as exc:
+        assert "deadline" in str(exc)
+    else:
+        raise AssertionError("expected LLMDeadlineError")
+    # 不等待注定超时的重试
+    assert time.monotonic() - started < 1
+    assert scheduler.stats()["deadline_exceeded"] == 1
+
+
+def test_non_retryable_errors_are_raised():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_retries=5, deadline=10)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    try:
+        scheduler.call(call)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert calls == [1] and scheduler.active == 0
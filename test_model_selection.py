@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+自动选模审计测试: model_size="auto" 时, 普通与渐进 (草稿+后台精修) 两条路径都把选模决策写入raw_metadata并上报进度
+用法: pytest test_model_selection.py
+
+yt-dlp、ffmpeg 与 Whisper 均以本地假实现替代, 无需网络。
+"""
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.sources import bilibili
+from src.sources.bilibili import BilibiliProcessor
+from src.services.refinement import refinements
+from src.services.transcript_cache import TranscriptCache
+
+
+TEST_URL = "https://www.bilibili.com/video/BV1autopolicy"
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        return {"id": "BV1autopolicy", "title": "auto", "duration": 600, "url": "http://example.invalid/audio.m4a"}
+
+
+class FakeYtDlp:
+    YoutubeDL = FakeYoutubeDL
+
+
+def fake_pcm_command(url, output_path, headers=None):
+    return [sys.executable, "-c", "import sys; open(sys.argv[1], 'wb').write(b'RIFF')", str(output_path)]
+
+
+class FakeWhisper:
+    def __init__(self):
+        self.models = []
+
+    async def __call__(self, audio_path, model_size="base", language=None, threads=None):
+        self.models.append(model_size)
+        return {"text": model_size, "segments": [{"start": 0.0, "end": 1.0, "text": model_size}], "language": "zh"}
+
+
+def _patch(tmp: Path, whisper: FakeWhisper):
+    """替换bilibili模块中的外部依赖; 返回恢复函数"""
+    replacements = {
+        "yt_dlp": FakeYtDlp,
+        "pcm_command": fake_pcm_command,
+        "atranscribe_file": whisper,
+        "transcript_cache": TranscriptCache(root=tmp / "cache"),
+    }
+    originals = {name: getattr(bilibili, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(bilibili, name, value)
+
+    def restore():
+        for name, value in originals.items():
+            setattr(bilibili, name, value)
+
+    return restore
+
+
+def _extract(progressive: bool):
+    whisper = FakeWhisper()
+    events = []
+
+    async def run():
+        content = await BilibiliProcessor().extract_content(
+            TEST_URL,
+            model_size="auto",
+            language="zh",
+            progressive=progressive,
+            progress=lambda stage, message: events.append((stage, message)),
+        )
+        await refinements.wait(content.content_id, timeout=10)
+        return content
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), whisper)
+        try:
+            content = asyncio.run(run())
+        finally:
+            restore()
+    return content, whisper.models, events
+
+
+def test_auto_decision_is_recorded():
+    content, models, events = _extract(progressive=False)
+    policy = content.raw_metadata["transcription_policy"]
+    assert models == [policy["model_size"]] and policy["duration"] == 600
+    assert "actual_seconds" in policy
+    assert any(message.startswith("自动选模") for _, message in events)
+
+
+def test_auto_decision_is_recorded_for_progressive_refinement():
+    content, models, events = _extract(progressive=True)
+    policy = content.raw_metadata["transcription_policy"]
+    # 先用草稿模型, 再用策略选出的模型在后台精修
+    assert models == [config.WHISPER_DRAFT_MODEL, policy["refine_with"]]
+    assert content.transcript_status == "final" and content.full_text == policy["refine_with"]
+    assert policy["refine_with"] in (policy["refine_model"], policy["model_size"])
+    assert any(message == f"自动选模: 精修使用 {policy['refine_with']} ({policy['reason']})" for _, message in events)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+单飞去重测试: 同一键的并发调用共享一次执行、结果、错误与进度; 流式调用共享生产者并为迟到者重放
+用法: pytest test_single_flight.py
+
+纯asyncio测试, 无需网络。
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.single_flight import SingleFlight, flight_key
+
+
+def test_flight_key_canonicalises_url_and_ignores_callbacks():
+    watch = flight_key("content", "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=3", model_size="base", progress=print)
+    short = flight_key("content", "https://youtu.be/dQw4w9WgXcQ", model_size="base")
+    assert watch == short
+    assert flight_key("content", "https://youtu.be/dQw4w9WgXcQ", model_size="small") != short
+    assert flight_key("video", "https://youtu.be/dQw4w9WgXcQ", model_size="base") != short
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    events = {"a": [], "b": []}
+
+    async def work(progress):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        progress("transcribe", "half")
+        await asyncio.sleep(0.05)
+        return {"text": "done"}
+
+    async def run():
+        return await asyncio.gather(
+            flights.run("k", work, on_progress=lambda *event: events["a"].append(event)),
+            flights.run("k", work, on_progress=lambda *event: events["b"].append(event)),
+            flights.run("other", work),
+        )
+
+    first, second, other = asyncio.run(run())
+    assert first is second and first == {"text": "done"} and other is not first
+    assert len(calls) == 2
+    # 两个调用者都收到共享执行的进度
+    assert events["a"] == events["b"] == [("transcribe", "half")]
+    assert flights.stats() == {"in_flight": 0, "waiters": 0, "started": 2, "joined": 1}
+
+
+def test_error_is_shared_and_the_key_is_released():
+    flights = SingleFlight()
+    calls = []
+
+    async def failing(progress):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flights.run("k", failing), flights.run("k", failing), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError, ValueError] and len(calls) == 1
+    # 失败后键被释放, 下一次调用重新执行
+    assert isinstance(asyncio.run(run())[0], ValueError) and len(calls) == 2
+
+
+def test_cancelled_caller_does_not_stop_shared_work():
+    flights = SingleFlight()
+
+    async def work(progress):
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def run():
+        leaving = asyncio.ensure_future(flights.run("k", work))
+        staying = asyncio.ensure_future(flights.run("k", work))
+        await asyncio.sleep(0.02)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_stream_fans_out_and_replays_to_late_joiners():
+    flights = SingleFlight()
+    produced = []
+
+    async def numbers():
+        for index in range(4):
+            produced.append(index)
+            yield index
+            await asyncio.sleep(0.02)
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        return [item async for item in flights.stream("k", numbers)]
+
+    async def run():
+        return await asyncio.gather(consume(0), consume(0.03))
+
+    early, late = asyncio.run(run())
+    assert early == late == [0, 1, 2, 3]
+    assert produced == [0, 1, 2, 3]
+    assert flights.stats()["in_flight"] == 0 and flights.joined == 1
+
+
+def test_stream_error_reaches_every_subscriber():
+    flights = SingleFlight()
+
+    async def broken():
+        yield "first"
+        await asyncio.sleep(0.02)
+        raise RuntimeError("stream failed")
+
+    async def consume():
+        items = []
+        try:
+            async for item in flights.stream("k", broken):
+                items.append(item)
+        except RuntimeError as exc:
+            return items, str(exc)
+        return items, None
+
+    async def run():
+        return await asyncio.gather(consume(), consume())
+
+    assert asyncio.run(run()) == [(["first"], "stream failed")] * 2
+
+
+def test_abandoned_stream_cancels_the_producer():
+    flights = SingleFlight()
+    state = {"cancelled": False}
+
+    async def endless():
+        try:
+            index = 0
+            while True:
+                yield index
+                index += 1
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def run():
+        stream = flights.stream("k", endless)
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+        await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+    # 最后一个读者离开时取消生产者, 新调用者会启动新的流
+    assert state["cancelled"] and flights.stats()["in_flight"] == 0
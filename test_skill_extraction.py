@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Map-reduce技能提取测试: 按段落切分窗口、候选去重与合并、合并失败时的回退
+用法: pytest test_skill_extraction.py
+
+LLM调用以本地假实现替代, 无需API密钥。
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.config import config
+from src.services import skill_extraction
+from src.services.llm_scheduler import LLMDeadlineError
+from src.services.skill_extraction import extract_skills, split_windows
+from src.services.tokens import count_tokens
+
+
+def _skill(name: str, content: str = "") -> dict:
+    return {"name": name, "description": "", "content": content}
+
+
+class FakeLLM:
+    """记录调用的提取/合并替身; merge_error 不为空时合并调用抛出该异常"""
+
+    def __init__(self, names_per_window=None, merge_error=None):
+        self.names_per_window = names_per_window or (lambda payload: [payload.get("part", "only")])
+        self.merge_error = merge_error
+        self.windows = []
+        self.merges = []
+
+    async def extract(self, payload, cache=None, usage=None):
+        self.windows.append(payload)
+        return [_skill(name) for name in self.names_per_window(payload)]
+
+    async def merge(self, title, candidates, cache=None, usage=None):
+        self.merges.append([candidate["name"] for candidate in candidates])
+        if self.merge_error is not None:
+            raise self.merge_error
+        return [_skill("merged")]
+
+    def run(self, transcript, segments=None, window_tokens=256):
+        originals = (skill_extraction.aextract_skills_from_transcript, skill_extraction.amerge_skills, config.LLM_EXTRACT_WINDOW_TOKENS)
+        skill_extraction.aextract_skills_from_transcript = self.extract
+        skill_extraction.amerge_skills = self.merge
+        config.LLM_EXTRACT_WINDOW_TOKENS = window_tokens
+        try:
+            return asyncio.run(extract_skills("title", transcript, segments))
+        finally:
+            skill_extraction.aextract_skills_from_transcript, skill_extraction.amerge_skills, config.LLM_EXTRACT_WINDOW_TOKENS = originals
+
+
+def _segments(count: int, words: int = 100) -> list:
+    return [f"segment {index} " + "word " * words for index in range(count)]
+
+
+def test_split_windows_respects_budget_and_segment_boundaries():
+    segments = _segments(10)
+    windows = split_windows("".join(segments), 300, segments)
+    assert len(windows) > 1
+    assert "".join(windows) == "".join(segments)
+    assert all(count_tokens(window) <= 300 for window in windows)
+    # 窗口只在段落之间切分
+    assert all(window.startswith("segment ") for window in windows)
+
+
+def test_split_windows_cuts_an_oversized_segment():
+    huge = "word " * 2000
+    windows = split_windows(huge, 256, ["intro. ", huge, "outro."])
+    assert windows[0] == "intro. " and windows[-1].endswith("outro.")
+    assert "".join(windows) == "intro. " + huge + "outro."
+    assert all(count_tokens(window) <= 256 for window in windows)
+
+
+def test_split_windows_without_segments_uses_sentences():
+    text = "第一句。第二句！Third sentence? Fourth. " * 200
+    windows = split_windows(text, 256)
+    assert len(windows) > 1
+    # 句间空白保留在窗口中, 拼接后与原文一致 (末尾的纯空白除外)
+    assert "".join(windows) == text.rstrip()
+    assert all(window.rstrip().endswith((".", "。", "！", "?")) for window in windows)
+
+
+def test_short_transcript_is_one_call_without_merge():
+    llm = FakeLLM()
+    skills, report = llm.run("short transcript")
+    assert len(llm.windows) == 1 and "part" not in llm.windows[0]
+    assert llm.merges == [] and report["windows"] == 1
+    assert [skill["name"] for skill in skills] == ["only"]
+
+
+def test_reduce_dedupes_candidates_before_merging():
+    # 各窗口都产出"Git Basics"的不同写法, 外加一个窗口特有的技能
+    llm = FakeLLM(lambda payload: ["Git Basics", "git-basics!", f"Skill {payload['part']}"])
+    segments = _segments(6)
+    skills, report = llm.run("".join(segments), segments)
+    windows = report["windows"]
+    assert windows > 1 and len(llm.windows) == windows
+    assert llm.merges == [["Git Basics"] + [f"Skill {index}/{windows}" for index in range(1, windows + 1)]]
+    assert [skill["name"] for skill in skills] == ["merged"]
+    assert report["merge_error"] is None
+
+
+def test_oversized_candidate_lists_are_merged_in_groups():
+    llm = FakeLLM()
+
+    async def extract(payload, cache=None, usage=None):
+        llm.windows.append(payload)
+        return [_skill(f"Skill {payload['part']}", "detail " * 150)]
+
+    llm.extract = extract
+    segments = _segments(8)
+    skills, _ = llm.run("".join(segments), segments)
+    # 候选超过一个窗口: 先分组合并, 再做最终合并
+    assert len(llm.merges) > 2
+    assert llm.merges[-1] == ["merged"]
+    assert [skill["name"] for skill in skills] == ["merged"]
+
+
+def test_failed_merge_keeps_candidates_and_is_reported():
+    llm = FakeLLM(lambda payload: [f"Skill {payload['part']}"], merge_error=ValueError("not json"))
+    segments = _segments(6)
+    skills, report = llm.run("".join(segments), segments)
+    assert len(skills) == 3 and skills[0]["name"].startswith("Skill 1/")
+    assert report["merge_error"] == "ValueError: not json"
+
+
+def test_merge_deadline_propagates():
+    llm = FakeLLM(lambda payload: [f"Skill {payload['part']}"], merge_error=LLMDeadlineError("deadline"))
+    segments = _segments(6)
+    try:
+        llm.run("".join(segments), segments)
+    except LLMDeadlineError:
+        return
+    raise AssertionError("LLMDeadlineError from the final merge was swallowed")
+
+
+def test_all_windows_failing_raises():
+    llm = FakeLLM()
+
+    async def extract(payload, cache=None, usage=None):
+        raise LLMDeadlineError("deadline")
+
+    llm.extract = extract
+    segments = _segments(6)
+    try:
+        llm.run("".join(segments), segments)
+    except LLMDeadlineError:
+        return
+    raise AssertionError("expected LLMDeadlineError when every window failed")
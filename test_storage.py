@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+磁盘配额测试: 超出配额时按LRU淘汰未被占用的文件, 占用中的文件与区域外的文件从不删除, 启动时清理遗留文件
+用法: pytest test_storage.py
+
+使用临时目录, 无需网络。
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services import storage
+from src.services.storage import StorageArea, StorageManager
+from src.services.transcript_cache import TranscriptCache
+
+
+def _manager(root: Path, quota_bytes: int = 300) -> StorageManager:
+    return StorageManager([
+        StorageArea(
+            name="temp",
+            root=root,
+            quota_bytes=quota_bytes,
+            patterns=("*.wav", "*.mp4"),
+            orphan_patterns=("*.wav",),
+        )
+    ])
+
+
+def _file(root: Path, name: str, size: int = 100, mtime: float = 1000.0) -> Path:
+    path = root / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_evicts_least_recently_used_until_it_fits():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = _manager(root)
+        old, mid, new = (_file(root, f"{name}.wav", mtime=1000 + index) for index, name in enumerate(("old", "mid", "new")))
+        # 300字节配额已满, 再放入150字节需要淘汰两个最旧的文件
+        assert manager.ensure_space("temp", incoming_bytes=150) == 2
+        assert not old.exists() and not mid.exists() and new.exists()
+        assert manager.stats()["evicted_bytes"] == 200 and manager.evictions == 2
+
+
+def test_pinned_files_are_never_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = _manager(root)
+        old = _file(root, "old.wav", mtime=1000)
+        mid = _file(root, "mid.wav", mtime=1001)
+        with manager.pinned(old):
+            # acquire 计为一次使用并刷新mtime; 即便如此, 占用期间也不会被淘汰
+            os.utime(old, (900, 900))
+            assert manager.ensure_space("temp", incoming_bytes=250) == 1
+            assert old.exists() and not mid.exists()
+            assert manager.stats()["areas"]["temp"]["pinned"] == 1
+        # 释放后恢复为可淘汰
+        assert manager.ensure_space("temp", incoming_bytes=250) == 1
+        assert not old.exists()
+
+
+def test_over_quota_with_only_pinned_files_is_allowed():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = _manager(root, quota_bytes=100)
+        busy = _file(root, "busy.wav", size=200)
+        manager.acquire(busy)
+        manager.acquire(busy)
+        assert manager.ensure_space("temp") == 0 and busy.exists()
+        # 引用计数嵌套: 释放一次仍被占用
+        manager.release(busy, delete=True)
+        assert busy.exists()
+        manager.release(busy, delete=True)
+        assert not busy.exists()
+
+
+def test_files_outside_the_patterns_are_left_alone():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = _manager(root, quota_bytes=0)
+        foreign = _file(root, "notes.txt", mtime=1)
+        owned = _file(root, "clip.mp4", mtime=2)
+        assert manager.ensure_space("temp") == 1
+        assert foreign.exists() and not owned.exists()
+
+
+def test_allocate_pins_a_fresh_path_after_making_room():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "temp"
+        root.mkdir()
+        manager = _manager(root)
+        old = _file(root, "old.wav", size=250)
+        path = manager.allocate("temp", ".wav", prefix="job-", expected_bytes=100)
+        assert not old.exists()
+        assert path.parent == root and path.name.startswith("job-") and path.suffix == ".wav"
+        path.write_bytes(b"x" * 400)
+        assert manager.ensure_space("temp") == 0 and path.exists()
+        manager.release(path, delete=True)
+        assert not path.exists()
+
+
+def test_sweep_orphans_skips_kept_and_pinned_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manager = _manager(root, quota_bytes=10**6)
+        leftover = _file(root, "leftover.wav")
+        busy = _file(root, "busy.wav")
+        kept = _file(root, "kept.mp4")
+        manager.acquire(busy)
+        # 清理同时会清扫转录缓存, 换成临时目录中的缓存以免触及真实数据
+        original, storage.transcript_cache = storage.transcript_cache, TranscriptCache(root=root / "cache")
+        try:
+            assert manager.sweep_orphans() == 1
+        finally:
+            storage.transcript_cache = original
+        assert not leftover.exists() and busy.exists() and kept.exists()
+        assert manager.orphans_removed == 1
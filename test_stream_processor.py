@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+流式delta合并测试: 首个delta立即发出, 间隔内的delta合并, 结束时flush发出剩余文本
+用法: pytest test_stream_processor.py
+
+用可控时钟代替time.monotonic, 无需等待真实时间。
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.application import stream_processor
+from src.application.stream_processor import DeltaCoalescer
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+def _run(steps, per_second: float):
+    """steps: (秒数, 文本) 序列, 依次推进时钟并推入文本; 返回 (发出的事件, 合并器)"""
+    sent = []
+
+    async def send(text, chars):
+        sent.append((clock.now, text, chars))
+
+    clock = FakeClock()
+    original, stream_processor.time = stream_processor.time, clock
+    try:
+        async def run():
+            deltas = DeltaCoalescer(send, per_second)
+            for advance, text in steps:
+                clock.now += advance
+                await deltas(text)
+            await deltas.flush()
+            return deltas
+
+        deltas = asyncio.run(run())
+    finally:
+        stream_processor.time = original
+    return sent, deltas
+
+
+def test_first_delta_is_sent_immediately_and_the_rest_are_joined():
+    # 每秒最多4次: 0.25秒内的delta合并到下一次发送
+    steps = [(0, "a"), (0.1, "b"), (0.1, "c"), (0.1, "d"), (0.05, "e"), (0.3, "f")]
+    sent, deltas = _run(steps, per_second=4)
+    assert [(text, chars) for _, text, chars in sent] == [("a", 1), ("bcd", 4), ("ef", 6)]
+    assert deltas.events == 3 and deltas.chars == 6
+
+
+def test_event_rate_is_bounded():
+    # 10秒内每10毫秒一个delta: 事件数约为 10秒 x 4次/秒, 文本完整无丢失
+    steps = [(0.01, "x")] * 1000
+    sent, deltas = _run(steps, per_second=4)
+    assert "".join(text for _, text, _ in sent) == "x" * 1000
+    assert deltas.events <= 10 * 4 + 2
+    gaps = [later - earlier for (earlier, _, _), (later, _, _) in zip(sent, sent[1:-1])]
+    assert all(gap >= 0.25 - 1e-9 for gap in gaps)
+
+
+def test_flush_sends_the_tail_once():
+    steps = [(0, "a"), (0.01, "b")]
+    sent, deltas = _run(steps, per_second=1)
+    assert [text for _, text, _ in sent] == ["a", "b"]
+
+    async def again():
+        await deltas.flush()
+
+    asyncio.run(again())
+    assert deltas.events == 2
+
+
+def test_zero_rate_disables_throttling():
+    steps = [(0, "a"), (0, "b"), (0, "c")]
+    sent, _ = _run(steps, per_second=0)
+    assert [text for _, text, _ in sent] == ["a", "b", "c"]
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+平台字幕测试: 各格式解析、滚动字幕去重、质量评分与字幕轨选择
+用法: pytest test_subtitles.py
+
+字幕下载以httpx.MockTransport模拟, 无需网络。
+"""
+import sys
+import json
+from pathlib import Path
+
+import httpx
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services import subtitles
+from src.services.subtitles import (
+    cache_key,
+    is_subtitle,
+    parse_subtitles,
+    pick_tracks,
+    quality_score,
+)
+
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+第一句
+
+2
+00:00:02,500 --> 00:00:04,000
+<i>第二句</i> &amp; 更多
+
+3
+00:01:00,000 --> 00:01:02,000
+
+"""
+
+VTT = """WEBVTT
+Kind: captions
+
+00:00:01.000 --> 00:00:02.000 align:start
+hello
+
+00:00:02.000 --> 00:00:03.000
+hello
+
+00:00:03.000 --> 00:00:04.500
+world
+"""
+
+
+def test_parse_srt():
+    segments = parse_subtitles(SRT, "srt")
+    assert segments == [
+        {"start": 1.0, "end": 2.5, "text": "第一句"},
+        {"start": 2.5, "end": 4.0, "text": "第二句 & 更多"},
+    ]
+
+
+def test_parse_vtt_merges_rolling_repeats():
+    segments = parse_subtitles(VTT, "vtt")
+    # 滚动自动字幕会重复同一行: 连续相同的cue合并为一段
+    assert segments == [
+        {"start": 1.0, "end": 3.0, "text": "hello"},
+        {"start": 3.0, "end": 4.5, "text": "world"},
+    ]
+
+
+def test_parse_vtt_with_hours_and_bom():
+    text = "\ufeffWEBVTT\n\n01:02:03.5 --> 01:02:04.25\nlate\n"
+    assert parse_subtitles(text, "vtt") == [{"start": 3723.5, "end": 3724.25, "text": "late"}]
+
+
+def test_parse_json3():
+    text = json.dumps({"events": [
+        {"tStartMs": 1000, "dDurationMs": 1500, "segs": [{"utf8": "a "}, {"utf8": "b"}]},
+        {"tStartMs": 2500, "dDurationMs": 500, "segs": [{"utf8": "\n"}]},
+        {"tStartMs": 3000},
+    ]})
+    assert parse_subtitles(text, "json3") == [{"start": 1.0, "end": 2.5, "text": "a b"}]
+
+
+def test_parse_bilibili_json():
+    text = json.dumps({"body": [
+        {"from": 0.5, "to": 1.5, "content": " 你好 "},
+        {"from": 1.5, "to": 2.0, "content": ""},
+        {"from": 2.0, "to": 3.0, "content": "世界"},
+    ]})
+    assert parse_subtitles(text, "json") == [
+        {"start": 0.5, "end": 1.5, "text": "你好"},
+        {"start": 2.0, "end": 3.0, "text": "世界"},
+    ]
+
+
+def test_quality_score_coverage_and_repeats():
+    segments = [{"start": 0.0, "end": 30.0, "text": "a"}, {"start": 30.0, "end": 60.0, "text": "b"}]
+    assert quality_score(segments, 60.0) == 1.0
+    assert quality_score(segments, 120.0) == 0.5
+    # 未知时长时只按去重率评分
+    assert quality_score(segments, None) == 1.0
+    repeated = segments + [{"start": 60.0, "end": 90.0, "text": "a"}, {"start": 90.0, "end": 120.0, "text": "a"}]
+    assert quality_score(repeated, 120.0) == 0.5
+    assert quality_score([], 60.0) == 0.0
+
+
+def test_pick_tracks_manual_before_automatic():
+    fmt = [{"ext": "vtt", "url": "http://x/vtt"}, {"ext": "json3", "url": "http://x/json3"}]
+    info = {
+        "language": "zh",
+        "subtitles": {"zh-Hans": fmt, "danmaku": [{"ext": "xml", "url": "http://x/d"}]},
+        "automatic_captions": {"zh": fmt},
+    }
+    tracks = pick_tracks(info, None)
+    # 人工字幕排在自动字幕之前; 弹幕轨被忽略; 同一轨优先json3
+    assert [(lang, automatic, chosen["ext"]) for lang, automatic, chosen in tracks] == [
+        ("zh-Hans", False, "json3"),
+        ("zh", True, "json3"),
+    ]
+
+
+def test_pick_tracks_falls_back_to_matching_automatic():
+    fmt = [{"ext": "srt", "url": "http://x/srt"}]
+    info = {"language": "en", "automatic_captions": {"en-orig": fmt, "fr": fmt, "ai-en": fmt}}
+    tracks = pick_tracks(info, None)
+    assert [(lang, automatic) for lang, automatic, _ in tracks] == [("en-orig", True), ("ai-en", True)]
+
+
+def test_pick_tracks_skips_translated_automatic_tracks():
+    fmt = [{"ext": "vtt", "url": "http://x/vtt"}]
+    translated = {lang: fmt for lang in ("de", "fr", "ja", "en", "es")}
+    # 视频语言未知: 只保留-orig轨, 不挑机器翻译轨
+    info = {"automatic_captions": {**translated, "en-orig": fmt}}
+    assert [lang for lang, _, _ in pick_tracks(info, None)] == ["en-orig"]
+    # 既无-orig也不知道语言: 无法判断哪条是原文, 全部跳过
+    assert pick_tracks({"automatic_captions": translated}, None) == []
+    # 明确请求的语言照常可用
+    assert [lang for lang, _, _ in pick_tracks({"automatic_captions": translated}, "ja")] == ["ja"]
+
+
+def _serve(tracks: dict, duration: float, passing: set):
+    """假的字幕服务: 返回 (info, 请求过的URL列表); passing中的轨覆盖全程, 其余只覆盖1秒"""
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        lang = request.url.path.strip("/")
+        end = duration if lang in passing else 1.0
+        return httpx.Response(200, text=f"1\n00:00:00,000 --> {_srt_time(end)}\n{lang}\n")
+
+    info = {
+        "duration": duration,
+        **{key: {lang: [{"ext": "srt", "url": f"http://subs.invalid/{lang}"}] for lang in langs} for key, langs in tracks.items()},
+    }
+    return info, requested, handler
+
+
+def _srt_time(seconds: float) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d},000"
+
+
+def _fetch(info, handler, language=None):
+    original = subtitles.httpx.Client
+    subtitles.httpx.Client = lambda **options: original(transport=httpx.MockTransport(handler), **options)
+    try:
+        return subtitles.fetch_subtitles(info, language)
+    finally:
+        subtitles.httpx.Client = original
+
+
+def test_fetch_stops_at_first_usable_track():
+    automatic = [f"l{i}" for i in range(120)] + ["en-orig"]
+    info, requested, handler = _serve({"automatic_captions": automatic}, 60.0, {"en-orig"})
+    result = _fetch(info, handler)
+    # 120条机器翻译轨一条都不下载
+    assert requested == ["http://subs.invalid/en-orig"]
+    assert (result.language, result.automatic) == ("en-orig", True)
+
+
+def test_fetch_accepts_automatic_when_manual_is_poor_and_caps_attempts():
+    info, requested, handler = _serve({"subtitles": ["en"], "automatic_captions": ["en-orig"]}, 60.0, {"en-orig"})
+    info["language"] = "en"
+    result = _fetch(info, handler)
+    assert requested == ["http://subs.invalid/en", "http://subs.invalid/en-orig"]
+    assert result.language == "en-orig"
+
+    manual = [f"en-{i}" for i in range(10)]
+    info, requested, handler = _serve({"subtitles": manual}, 60.0, set())
+    assert _fetch(info, handler, "en") is None
+    assert len(requested) == subtitles.config.SUBTITLE_MAX_TRACKS
+
+
+def test_cache_key_is_separate_from_models():
+    assert cache_key("zh") == "subtitle:zh"
+    assert cache_key(None) == "subtitle:auto"
+    assert is_subtitle("subtitle:zh") and not is_subtitle("base") and not is_subtitle(None)
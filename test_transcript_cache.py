@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+转录缓存测试: 按来源与音频哈希读写、模型/语言隔离、半途写入与失效别名的清理、LRU容量上限
+用法: pytest test_transcript_cache.py
+
+使用临时目录, 无需Whisper。
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.transcript_cache import TranscriptCache, hash_file
+
+
+TRANSCRIPT = {
+    "text": "你好世界",
+    "segments": [{"start": 0.0, "end": 1.23456, "text": "你好"}, {"start": 1.23456, "end": 2.5, "text": "世界"}],
+    "language": "zh",
+}
+
+
+def test_round_trip_by_source():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp))
+        assert cache.get("bilibili", "BV1", "base", "zh") is None
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base", metadata={"title": "t"})
+        cached = cache.get("bilibili", "BV1", "base", "zh")
+        assert cached.text == "你好世界" and cached.language == "zh"
+        assert cached.transcription_model == "base" and cached.metadata == {"title": "t"}
+        # 时间戳按毫秒存储
+        assert cached.segments == [
+            {"start": 0.0, "end": 1.235, "text": "你好"},
+            {"start": 1.235, "end": 2.5, "text": "世界"},
+        ]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_model_and_language_are_part_of_the_key():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp))
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base")
+        assert cache.get("bilibili", "BV1", "small", "zh") is None
+        assert cache.get("bilibili", "BV1", "base", "en") is None
+        assert cache.get("youtube", "BV1", "base", "zh") is None
+        # 覆盖写入同一键
+        cache.put("bilibili", "BV1", "base", "zh", {**TRANSCRIPT, "text": "新"}, "base")
+        assert cache.get("bilibili", "BV1", "base", "zh").text == "新"
+        assert cache.stats()["entries"] == 1
+
+
+def test_same_audio_through_another_url_hits_by_hash():
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = Path(tmp) / "audio.wav"
+        audio.write_bytes(b"RIFF" + bytes(range(256)) * 100)
+        audio_hash = hash_file(audio, block_size=1000)
+        assert audio_hash == hash_file(audio)
+        cache = TranscriptCache(root=Path(tmp) / "cache")
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base", audio_hash=audio_hash)
+        assert cache.get_by_audio(audio_hash, "base", "zh").text == "你好世界"
+        assert cache.get_by_audio(audio_hash, "small", "zh") is None
+
+
+def test_alias_to_evicted_entry_is_dropped():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp))
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base", audio_hash="abc")
+        for entry in Path(tmp).glob("*.json.gz"):
+            entry.unlink()
+        assert cache.get_by_audio("abc", "base", "zh") is None
+        assert not list(Path(tmp).glob("by-audio/*.key"))
+
+
+def test_unreadable_or_old_entries_are_misses():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp))
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base")
+        entry = next(Path(tmp).glob("*.json.gz"))
+        entry.write_bytes(b"not gzip")
+        assert cache.get("bilibili", "BV1", "base", "zh") is None
+
+
+def test_sweep_removes_partial_writes_and_dangling_aliases():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp))
+        cache.put("bilibili", "BV1", "base", "zh", TRANSCRIPT, "base", audio_hash="abc")
+        cache.put("bilibili", "BV2", "base", "zh", TRANSCRIPT, "base", audio_hash="def")
+        (Path(tmp) / "half.123.tmp").write_bytes(b"x")
+        cache._entry_path(cache.source_key("bilibili", "BV2", "base", "zh")).unlink()
+        assert cache.sweep() == 2
+        assert cache.get_by_audio("abc", "base", "zh") is not None
+
+
+def test_evicts_least_recently_used_over_the_bound():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(root=Path(tmp), max_bytes=10**9)
+        for index, source_id in enumerate(("old", "mid", "new")):
+            cache.put("bilibili", source_id, "base", "zh", TRANSCRIPT, "base")
+            path = cache._entry_path(cache.source_key("bilibili", source_id, "base", "zh"))
+            os.utime(path, (1000 + index, 1000 + index))
+        # 读取会刷新mtime: "old" 变为最近使用
+        assert cache.get("bilibili", "old", "base", "zh") is not None
+        size = cache._entry_path(cache.source_key("bilibili", "old", "base", "zh")).stat().st_size
+        cache.max_bytes = size * 2
+        assert cache.evict() == 1
+        assert cache.get("bilibili", "mid", "base", "zh") is None
+        assert cache.get("bilibili", "old", "base", "zh") is not None
+        assert cache.get("bilibili", "new", "base", "zh") is not None
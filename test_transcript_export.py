@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+转录导出测试: SRT/VTT/JSONL格式、ETag条件请求返回304、转录变化后ETag随之变化
+用法: pytest test_transcript_export.py
+
+直接向内存存储放入内容, 通过TestClient调用路由, 无需网络。
+"""
+import sys
+import json
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.models.transcript import CompactTranscript
+from src.models.unified import SourceType, UnifiedContent
+
+
+CONTENT_ID = "content-export"
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": "你好"},
+    {"start": None, "end": None, "text": "无时间"},
+    {"start": 3661.25, "end": 3662.0, "text": "a < b --> c"},
+]
+
+
+def _client(segments=SEGMENTS) -> TestClient:
+    sections = CompactTranscript.from_segments(segments)
+    routes.content_store[CONTENT_ID] = UnifiedContent(
+        content_id=CONTENT_ID,
+        source_type=SourceType.BILIBILI,
+        source_url="https://www.bilibili.com/video/BV1export",
+        source_id="BV1export",
+        title="导出",
+        author="a",
+        full_text=sections.text,
+        sections=sections,
+    )
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def _url(fmt: str) -> str:
+    return f"/api/v1/content/{CONTENT_ID}/transcript.{fmt}"
+
+
+def test_srt_keeps_cue_numbers_and_skips_untimed_sections():
+    response = _client().get(_url("srt"))
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="BV1export.srt"'
+    assert response.text == (
+        "1\n00:00:00,000 --> 00:00:01,500\n你好\n\n"
+        "3\n01:01:01,250 --> 01:01:02,000\na < b --> c\n\n"
+    )
+
+
+def test_vtt_escapes_cue_text():
+    text = _client().get(_url("vtt")).text
+    assert text.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n你好\n\n")
+    assert text.endswith("01:01:01.250 --> 01:01:02.000\na &lt; b --&gt; c\n\n")
+    assert "无时间" not in text
+
+
+def test_jsonl_has_one_section_per_line():
+    lines = [json.loads(line) for line in _client().get(_url("jsonl")).text.splitlines()]
+    assert [line["content"] for line in lines] == ["你好", "无时间", "a < b --> c"]
+    assert lines[1]["start_time"] is None
+
+
+def test_unknown_format_and_missing_content():
+    client = _client()
+    assert client.get(_url("txt")).status_code == 400
+    assert client.get("/api/v1/content/missing/transcript.srt").status_code == 404
+
+
+def test_matching_etag_returns_304():
+    client = _client()
+    first = client.get(_url("srt"))
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "no-cache"
+    revalidated = client.get(_url("srt"), headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    # 列表中任一ETag匹配即可, * 总是匹配
+    assert client.get(_url("srt"), headers={"If-None-Match": f'W/"other", {etag}'}).status_code == 304
+    assert client.get(_url("srt"), headers={"If-None-Match": "*"}).status_code == 304
+    # 同一转录的不同格式ETag不同
+    assert client.get(_url("vtt"), headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_etag_changes_when_the_transcript_is_refined():
+    etag = _client().get(_url("srt")).headers["etag"]
+    refined = [{**segment, "text": segment["text"] + "!"} for segment in SEGMENTS]
+    client = _client(refined)
+    response = client.get(_url("srt"), headers={"If-None-Match": etag})
+    assert response.status_code == 200 and "你好!" in response.text
+    assert response.headers["etag"] != etag
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+转录取消测试: 任务取消后, worker进程中正在转录的分块应被终止, 排队的分块不再执行
+用法: python test_transcription_cancel.py   (或 pytest test_transcription_cancel.py)
+
+分块转录以本地慢速假实现替代 (在spawn出的worker进程中运行), 无需Whisper。
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services import transcription
+from src.services.transcription import Chunk
+
+
+CHUNK_SECONDS = 30
+WORKERS = 2
+
+
+def slow_chunk(audio_path, chunk, model_size, language, threads):
+    """慢速分块转录替身: 在audio_path旁记录worker的pid后睡眠 (时长可由旁边的seconds文件指定)"""
+    folder = Path(audio_path).parent
+    folder.joinpath(f"chunk-{chunk.index}.pid").write_text(str(os.getpid()))
+    seconds = folder / "seconds"
+    time.sleep(float(seconds.read_text()) if seconds.exists() else CHUNK_SECONDS)
+    return {"index": chunk.index, "language": language, "segments": []}
+
+
+def _alive(pid: int) -> bool:
+    try:
+        state = Path(f"/proc/{pid}/stat").read_text().split()[2]
+    except OSError:
+        return False
+    return state != "Z"
+
+
+def _patch():
+    """替换分块转录与切分计划; 返回恢复函数 (测试结束时在finally中调用)"""
+    chunks = [Chunk(index, index * 10.0, index * 10.0 + 10.0, index * 10.0, index * 10.0 + 10.0) for index in range(4)]
+    replacements = {
+        "transcribe_chunk": slow_chunk,
+        "_plan": lambda audio_path, always_chunk=False: (chunks, {}),
+        "cpu_budget": lambda: WORKERS,
+        "available_memory_mb": lambda: None,
+    }
+    originals = {name: getattr(transcription, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(transcription, name, value)
+
+    def restore():
+        transcription.shutdown_executor()
+        for name, value in originals.items():
+            setattr(transcription, name, value)
+
+    return restore
+
+
+async def _wait_for(path: Path, timeout: float = 60) -> int:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists() and path.read_text():
+            return int(path.read_text())
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"{path.name} not written within {timeout}s")
+
+
+async def _run_cancel(tmp: Path) -> list:
+    audio = tmp / "audio.wav"
+    task = asyncio.create_task(transcription.atranscribe_file(audio, "base", "zh"))
+    pids = [await _wait_for(tmp / f"chunk-{index}.pid") for index in range(WORKERS)]
+    started = time.monotonic()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    assert time.monotonic() - started < CHUNK_SECONDS / 2, "cancellation waited for the running chunks"
+    assert transcription._executor is None, "worker pool still in service after its only job was cancelled"
+    return pids
+
+
+async def _run_shared(tmp: Path) -> float:
+    """另一任务仍在使用worker时, 取消方等待自己正在运行的分块结束 (不终止共享的进程池)"""
+    own, other = tmp / "own", tmp / "other"
+    for folder in (own, other):
+        folder.mkdir()
+        (folder / "seconds").write_text("3")
+    first = asyncio.create_task(transcription.atranscribe_file(own / "audio.wav", "base", "zh"))
+    await _wait_for(own / "chunk-0.pid")
+    second = asyncio.create_task(transcription.atranscribe_file(other / "audio.wav", "base", "zh"))
+    await asyncio.sleep(0.2)
+    started = time.monotonic()
+    first.cancel()
+    try:
+        await first
+    except asyncio.CancelledError:
+        pass
+    waited = time.monotonic() - started
+    assert transcription._executor is not None, "shared worker pool was terminated"
+    second.cancel()
+    try:
+        await second
+    except asyncio.CancelledError:
+        pass
+    return waited
+
+
+def test_cancel_terminates_running_chunks():
+    restore = _patch()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pids = asyncio.run(_run_cancel(Path(tmp)))
+            deadline = time.monotonic() + 10
+            while any(_alive(pid) for pid in pids) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            assert not any(_alive(pid) for pid in pids), f"workers {pids} still running after cancellation"
+            assert not (Path(tmp) / f"chunk-{WORKERS}.pid").exists(), "queued chunk ran after cancellation"
+    finally:
+        restore()
+
+
+def test_cancel_waits_when_workers_are_shared():
+    restore = _patch()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            waited = asyncio.run(_run_shared(Path(tmp)))
+        # 运行中的分块在worker内无法中断: 取消方持有转录阶段名额直到它结束
+        assert waited > 1, f"cancelled job returned after {waited:.2f}s while its chunk was still running"
+    finally:
+        restore()
+
+
+def main():
+    test_cancel_terminates_running_chunks()
+    print("✓ 取消任务后worker中的分块转录已终止")
+    test_cancel_waits_when_workers_are_shared()
+    print("✓ 共享worker时取消方等待自己的分块结束")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+分块转录测试: 按静音切分 (plan_chunks) 与分块结果拼接 (SegmentStitcher)
+用法: pytest test_transcription_chunks.py
+
+纯函数测试, 无需Whisper与ffmpeg。
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services.transcription import Chunk, SegmentStitcher, plan_chunks, stitch_segments
+
+
+def _seg(start: float, end: float, text: str) -> dict:
+    return {"start": start, "end": end, "text": text}
+
+
+def test_short_audio_is_one_chunk():
+    chunks = plan_chunks(400.0, [], target_seconds=300, overlap=2)
+    assert len(chunks) == 1
+    assert (chunks[0].start, chunks[0].end, chunks[0].owned_start, chunks[0].owned_end) == (0.0, 400.0, 0.0, 400.0)
+
+
+def test_cuts_at_closest_silence():
+    # 理想切点为300s, 窗口 [150, 450] 内离300最近的静音中点是310
+    chunks = plan_chunks(1000.0, [(100.0, 102.0), (309.0, 311.0), (500.0, 520.0)], target_seconds=300, overlap=2)
+    assert chunks[0].owned_end == 310.0
+    assert chunks[1].owned_start == 310.0
+
+
+def test_chunks_tile_the_timeline():
+    chunks = plan_chunks(1800.0, [(290.0, 292.0), (640.0, 650.0)], target_seconds=300, overlap=2)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0].owned_start == 0.0 and chunks[-1].owned_end == 1800.0
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.owned_end == current.owned_start
+        # 相邻分块重叠overlap秒, 边界处的词不会被截断
+        assert current.start == current.owned_start - 2
+        assert previous.end == previous.owned_end + 2
+    assert all(chunk.owned_end - chunk.owned_start <= 450 for chunk in chunks)
+
+
+def test_without_silences_cuts_at_target():
+    chunks = plan_chunks(1000.0, [], target_seconds=300, overlap=0)
+    assert [chunk.owned_end for chunk in chunks] == [300.0, 600.0, 1000.0]
+
+
+def test_stitcher_keeps_segment_in_owning_chunk():
+    chunks = [Chunk(0, 0.0, 12.0, 0.0, 10.0), Chunk(1, 8.0, 20.0, 10.0, 20.0)]
+    stitcher = SegmentStitcher(len(chunks))
+    first = stitcher.add(chunks[0], {"segments": [_seg(0.0, 5.0, "一"), _seg(9.0, 11.5, "二")]})
+    # 中点10.25s属于第二块: 第一块丢弃, 由第二块保留
+    assert [seg["text"] for seg in first] == ["一"]
+    second = stitcher.add(chunks[1], {"segments": [_seg(9.0, 11.5, "二"), _seg(12.0, 18.0, "三")]})
+    assert [seg["text"] for seg in second] == ["二", "三"]
+    assert [seg["text"] for seg in stitcher.segments] == ["一", "二", "三"]
+
+
+def test_stitcher_drops_repeated_boundary_text():
+    chunks = [Chunk(0, 0.0, 12.0, 0.0, 10.0), Chunk(1, 8.0, 20.0, 10.0, 20.0)]
+    stitcher = SegmentStitcher(len(chunks))
+    stitcher.add(chunks[0], {"segments": [_seg(6.0, 9.9, "Hello, world!")]})
+    # 重叠区中再次识别出的同一句 (标点与大小写不同) 不重复输出
+    added = stitcher.add(chunks[1], {"segments": [_seg(10.0, 12.0, "hello world"), _seg(12.0, 15.0, "next")]})
+    assert [seg["text"] for seg in added] == ["next"]
+
+
+def test_stitcher_keeps_timeline_monotonic():
+    chunks = [Chunk(0, 0.0, 12.0, 0.0, 10.0), Chunk(1, 8.0, 20.0, 10.0, 20.0)]
+    stitcher = SegmentStitcher(len(chunks))
+    stitcher.add(chunks[0], {"segments": [_seg(5.0, 10.4, "甲")]})
+    stitcher.add(chunks[1], {"segments": [_seg(10.2, 13.0, "乙")]})
+    assert stitcher.segments[1]["start"] == 10.4
+    starts = [seg["start"] for seg in stitcher.segments]
+    assert starts == sorted(starts)
+
+
+def test_last_chunk_keeps_trailing_segment():
+    chunks = [Chunk(0, 0.0, 10.0, 0.0, 10.0)]
+    stitcher = SegmentStitcher(1)
+    # 末块不按owned_end截断 (解码结果可能略超出音频时长)
+    added = stitcher.add(chunks[0], {"segments": [_seg(9.0, 12.0, "尾")]})
+    assert [seg["text"] for seg in added] == ["尾"]
+
+
+def test_stitch_segments_skips_missing_results():
+    chunks = [Chunk(0, 0.0, 10.0, 0.0, 10.0), Chunk(1, 10.0, 20.0, 10.0, 20.0)]
+    results = [{"index": 1, "segments": [_seg(11.0, 12.0, "b")]}, {"index": 0, "segments": [_seg(1.0, 2.0, "a")]}]
+    assert [seg["text"] for seg in stitch_segments(chunks, results)] == ["a", "b"]
+    assert [seg["text"] for seg in stitch_segments(chunks, results[:1])] == ["b"]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+视频流水线测试: 流式转录受转录阶段并发上限约束, 完整读完的流写入转录缓存并可重放
+用法: pytest test_video_pipeline.py
+
+本地音频文件 + 假的分块转录, 无需Whisper与网络。
+"""
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.services import video_pipeline
+from src.services.stages import StageLimiter
+from src.services.transcript_cache import TranscriptCache
+
+
+class FakeTranscription:
+    """分块产出segments的假转录; 记录同时在转录的流数量"""
+
+    def __init__(self, chunks: int = 3, delay: float = 0.05):
+        self.chunks = chunks
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def __call__(self, audio_path, model_size="base", language=None):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            for index in range(self.chunks):
+                await asyncio.sleep(self.delay)
+                yield [{"start": float(index), "end": index + 1.0, "text": f"{Path(audio_path).stem}-{index}"}]
+        finally:
+            self.running -= 1
+
+
+def _patch(tmp: Path, fake: FakeTranscription, transcribe_limit: int = 1):
+    """替换video_pipeline中的依赖; 返回恢复函数"""
+    replacements = {
+        "iter_transcription": fake,
+        "_require_backend": lambda: None,
+        "transcript_cache": TranscriptCache(root=tmp / "cache"),
+        "stage_limits": StageLimiter({"transcribe": transcribe_limit}),
+    }
+    originals = {name: getattr(video_pipeline, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(video_pipeline, name, value)
+
+    def restore():
+        for name, value in originals.items():
+            setattr(video_pipeline, name, value)
+
+    return restore
+
+
+def _audio(tmp: Path, name: str) -> Path:
+    path = tmp / f"{name}.wav"
+    path.write_bytes(b"RIFF" + name.encode() * 64)
+    return path
+
+
+async def _collect(path: Path) -> list:
+    return [section.content async for section in video_pipeline.stream_video_sections(local_path=path)]
+
+
+def test_concurrent_streams_share_the_transcribe_stage():
+    fake = FakeTranscription()
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), fake, transcribe_limit=1)
+        try:
+            async def run():
+                return await asyncio.gather(*(_collect(_audio(Path(tmp), name)) for name in ("a", "b", "c")))
+
+            results = asyncio.run(run())
+        finally:
+            restore()
+    assert results == [[f"{name}-{index}" for index in range(3)] for name in ("a", "b", "c")]
+    # 转录阶段上限为1: 三个流依次转录, 从不并行
+    assert fake.calls == 3 and fake.peak == 1
+
+
+def test_completed_stream_is_cached_and_replayed():
+    fake = FakeTranscription()
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), fake, transcribe_limit=0)
+        try:
+            audio = _audio(Path(tmp), "talk")
+            first = asyncio.run(_collect(audio))
+            second = asyncio.run(_collect(audio))
+        finally:
+            restore()
+    assert first == second == ["talk-0", "talk-1", "talk-2"]
+    # 第二次按音频哈希命中缓存, 不再转录
+    assert fake.calls == 1
+
+
+def test_abandoned_stream_is_not_cached():
+    fake = FakeTranscription()
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _patch(Path(tmp), fake, transcribe_limit=1)
+        try:
+            audio = _audio(Path(tmp), "talk")
+
+            async def first_section():
+                stream = video_pipeline.stream_video_sections(local_path=audio)
+                section = await stream.__anext__()
+                await stream.aclose()
+                return section.content
+
+            assert asyncio.run(first_section()) == "talk-0"
+            assert video_pipeline.stage_limits.stats()["transcribe"]["active"] == 0
+            assert asyncio.run(_collect(audio)) == ["talk-0", "talk-1", "talk-2"]
+        finally:
+            restore()
+    # 中途放弃的流不写缓存 (部分转录不能冒充完整结果)
+    assert fake.calls == 2